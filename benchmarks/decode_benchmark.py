@@ -0,0 +1,79 @@
+'''
+Products/second of the page decoding path, before and after lib.decoder.
+
+The payload mimics a recorded /api/v1/produtos response of 10k products.
+Run from the repository root: python -m benchmarks.decode_benchmark
+'''
+import json
+import random
+import time
+from lib.decoder import loads, to_products
+from models import Product
+
+PRODUCTS = 10_000
+ROUNDS = 5
+
+def payload(size: int = PRODUCTS) -> bytes:
+    random.seed(42)
+    products = []
+    for i in range(size):
+        products.append({
+            "id": f"{i:012d}",
+            "datahora": "2024-11-22T10:15:00.000Z",
+            "desc": f"REFRIGERANTE COCA COLA PET {random.choice(['2L', '600ML', '1,5L'])}",
+            "distkm": round(random.uniform(0, 10), 2),
+            "estabelecimento": {
+                "codigo": str(random.randint(1000, 9999)),
+                "nm_emp": "SUPERMERCADO EXEMPLO LTDA",
+                "tp_logr": "RUA",
+                "nm_logr": "XV DE NOVEMBRO",
+                "nr_logr": str(random.randint(1, 3000)),
+                "mun": "CURITIBA",
+                "uf": "PR",
+            },
+            "gtin": str(7890000000000 + random.randint(0, 99999)),
+            "ncm": "22021000",
+            "nrdoc": str(random.randint(1, 999999)),
+            "tempo": "2 dias",
+            "valor": f"{random.uniform(1, 20):.2f}",
+            "valor_desconto": "0.00",
+        })
+    return json.dumps({"total": size, "produtos": products}).encode()
+
+def before(body: bytes) -> list[Product]:
+    total = json.loads(body)["total"]
+    products = json.loads(body)["produtos"]
+    return [Product(id=product["id"], 
+                    emission_date=product["datahora"], 
+                    description=product["desc"], 
+                    distkm=product["distkm"], 
+                    store_id=product["estabelecimento"]["codigo"],
+                    store_name=product["estabelecimento"]["nm_emp"],
+                    store_address=f"{product['estabelecimento']['tp_logr']} {product['estabelecimento']['nm_logr']}, N {product['estabelecimento']['nr_logr']}",
+                    gtin=product["gtin"], 
+                    ncm=product["ncm"], 
+                    nrdoc=product["nrdoc"], 
+                    tempo=product["tempo"], 
+                    value=float(product["valor"]), 
+                    discount_value=float(product["valor_desconto"]), 
+                ) for product in products]
+
+def after(body: bytes) -> list[Product]:
+    return to_products(loads(body)["produtos"])
+
+def measure(decode, body: bytes) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - start)
+    return PRODUCTS / best
+
+if __name__ == "__main__":
+    body = payload()
+    assert before(body) == after(body)
+    old = measure(before, body)
+    new = measure(after, body)
+    print(f"json backend: {loads.__module__}")
+    print(f"before: {old:,.0f} products/s")
+    print(f"after:  {new:,.0f} products/s ({new / old:.1f}x)")
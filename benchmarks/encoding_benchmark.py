@@ -0,0 +1,37 @@
+'''
+Encode time and request payload bytes of the two Sheets row encodings: every value as
+a text cell for appendCells (cells) and typed 2-D arrays for spreadsheets.values (values).
+
+Run from the repository root: python -m benchmarks.encoding_benchmark
+'''
+import json
+import time
+from benchmarks.decode_benchmark import payload
+from lib.decoder import loads, to_products
+from lib.encoder import ENCODINGS
+from lib.sheet_writer import HEADER
+
+PRODUCTS = 100_000
+ROUNDS = 5
+
+def body(encoding: str, rows: list) -> dict:
+    if encoding == "cells":
+        return {"requests": [{"appendCells": {"sheetId": 0, "rows": rows, "fields": "userEnteredValue"}}]}
+    return {"values": rows}
+
+def encode(encoding: str, products) -> list:
+    header, product = ENCODINGS[encoding]
+    rows = [header(HEADER)]
+    rows.extend(map(product, products))
+    return rows
+
+if __name__ == "__main__":
+    products = to_products(loads(payload(PRODUCTS))["produtos"])
+    for encoding in ENCODINGS:
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            rows = encode(encoding, products)
+            best = min(best, time.perf_counter() - start)
+        size = len(json.dumps(body(encoding, rows)).encode())
+        print(f"{encoding:<7} encode: {best * 1000:,.0f} ms  payload: {size / 2**20:,.1f} MiB ({size / PRODUCTS:,.0f} bytes/product)")
@@ -0,0 +1,59 @@
+'''
+Memory and construction time of 100k Product instances, with and without slots,
+and the cost of matching locals against a list versus a set.
+
+Run from the repository root: python -m benchmarks.model_benchmark
+'''
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from models import Local, Product
+
+PRODUCTS = 100_000
+LOCALS = 1_000
+ROUNDS = 5
+
+# the models as they were declared before slots
+PlainProduct = make_dataclass("PlainProduct", [(field.name, field.type) for field in fields(Product)])
+
+def rows(size: int = PRODUCTS) -> list[tuple]:
+    return [(f"{i:012d}", "2024-11-22T10:15:00.000Z", "REFRIGERANTE COCA COLA PET 2L", 1.5, "1234",
+             "SUPERMERCADO EXEMPLO LTDA", "RUA XV DE NOVEMBRO, N 100", "7890000000000", "22021000",
+             str(i), "2 dias", 9.99, 0.0) for i in range(size)]
+
+def memory(model, data: list[tuple]) -> int:
+    tracemalloc.start()
+    instances = [model(*row) for row in data]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return size
+
+def construction(model, data: list[tuple]) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        [model(*row) for row in data]
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def lookup(container, probes: list[Local]) -> float:
+    start = time.perf_counter()
+    for local in probes:
+        local in container
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    data = rows()
+    old, new = memory(PlainProduct, data), memory(Product, data)
+    print(f"memory before: {old / 2**20:,.1f} MiB")
+    print(f"memory after:  {new / 2**20:,.1f} MiB ({old / new:.1f}x smaller)")
+    old, new = construction(PlainProduct, data), construction(Product, data)
+    print(f"construction before: {PRODUCTS / old:,.0f} products/s")
+    print(f"construction after:  {PRODUCTS / new:,.0f} products/s ({old / new:.1f}x)")
+
+    locals = [Local(id=i, geohash=f"6gkz{i:05d}", name=f"REGIAO {i}") for i in range(LOCALS)]
+    probes = [Local(id=None, geohash=local.geohash, name=local.name.lower()) for local in locals]
+    old, new = lookup(locals, probes), lookup(set(locals), probes)
+    print(f"local lookup in list: {old * 1000:,.2f} ms")
+    print(f"local lookup in set:  {new * 1000:,.2f} ms ({old / new:.0f}x)")
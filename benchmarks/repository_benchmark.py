@@ -0,0 +1,93 @@
+'''
+Repository throughput with a fresh connection per call (before) and with the
+pooled, WAL-tuned ConnectionManager (after).
+
+Uses the test database. Run from the repository root:
+MODE=test python -m benchmarks.repository_benchmark
+'''
+import sqlite3
+import time
+from contextlib import contextmanager
+import database.cached_repository
+import database.category_repository
+import database.local_repository
+import database.query_repository
+from context import connections, database_context
+from database.local_repository import LocalRepository
+from database.migrations import migrations
+from database.query_repository import QueryRepository
+from models import Local
+
+MODULES = [database.cached_repository, database.category_repository, database.local_repository, database.query_repository]
+LOCALS = 500
+ROUNDS = 200
+
+@contextmanager
+def legacy_database_context():
+    connection = sqlite3.connect("test_menor-preco.db")
+    try:
+        yield connection
+    except Exception:
+        connection.rollback()
+        raise
+    else:
+        connection.commit()
+    finally:
+        connection.close()
+
+def setup(context):
+    for _, path in migrations():
+        with open(path, 'r') as file:
+            script = file.read()
+        with context() as connection:
+            connection.executescript(script)
+    with open('test_insertions.sql', 'r') as file:
+        script = file.read()
+    with context() as connection:
+        connection.executescript(script)
+
+def teardown(context):
+    with context() as connection:
+        cursor = connection.cursor()
+        for table in ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "spreadsheet_watermark", "watermark", "sheet_upload", "sheet_row", "sheet", "spreadsheet", "query_local", "query", "local", "category"]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+def workload() -> dict[str, float]:
+    local_repo = LocalRepository()
+    query_repo = QueryRepository()
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(LOCALS):
+        local_repo.save(Local(id=None, geohash=f"bench{i}", name=f"Bench {i}"))
+    results["local save"] = LOCALS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        local_repo.find_by_id(i % LOCALS + 1)
+    results["local find_by_id"] = ROUNDS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        query_repo.find_all()
+    results["query find_all"] = ROUNDS / (time.perf_counter() - start)
+    return results
+
+def run(context) -> dict[str, float]:
+    for module in MODULES:
+        module.database_context = context
+    setup(context)
+    try:
+        return workload()
+    finally:
+        teardown(context)
+
+if __name__ == "__main__":
+    connections.close()
+    connection = sqlite3.connect("test_menor-preco.db") # journal_mode is persistent, start from the legacy default
+    connection.execute("PRAGMA journal_mode = DELETE")
+    connection.close()
+    before = run(legacy_database_context)
+    after = run(database_context)
+    for name in before:
+        print(f"{name:<18} before: {before[name]:>10,.0f} ops/s  after: {after[name]:>10,.0f} ops/s ({after[name] / before[name]:.1f}x)")
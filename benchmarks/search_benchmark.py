@@ -0,0 +1,41 @@
+'''
+Description search over 1M stored products: a python scan over the Product
+dataclasses (before) and the product_fts index of ProductRepository.search (after).
+
+Uses the test database. Run from the repository root:
+MODE=test python -m benchmarks.search_benchmark
+'''
+import time
+from benchmarks.stats_benchmark import setup, teardown
+from context import connections
+from database.product_repository import ProductRepository
+
+TERMS = "produto 1234"
+ROUNDS = 20
+
+def before(repo: ProductRepository) -> set[str]:
+    words = TERMS.upper().split()
+    return {product.id for product in repo.find_by_query_id(1)
+            if all(any(token.startswith(word) for token in product.description.split()) for word in words)}
+
+def after(repo: ProductRepository) -> set[str]:
+    return {product.id for product in repo.search(TERMS, limit=-1)}
+
+if __name__ == "__main__":
+    repo = ProductRepository()
+    setup()
+    try:
+        start = time.perf_counter()
+        expected = before(repo)
+        old = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            result = after(repo)
+        new = (time.perf_counter() - start) / ROUNDS
+        assert expected == result
+        print(f"{len(result)} matches")
+        print(f"before: {old * 1000:,.1f} ms")
+        print(f"after:  {new * 1000:,.1f} ms ({old / new:,.0f}x)")
+    finally:
+        teardown()
+        connections.close()
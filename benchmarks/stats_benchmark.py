@@ -0,0 +1,92 @@
+'''
+Per-gtin price statistics computed in Python over Product dataclasses (before) and by
+ProductRepository.price_stats (after), which counts and averages every group from the price
+totals kept by triggers and reads min, max and percentiles from the indexes. Also times every table of `query stats`, with all
+of their groups and with the 20 groups the command shows by default.
+
+Uses the test database. Run from the repository root:
+MODE=test python -m benchmarks.stats_benchmark
+'''
+import random
+import statistics
+import time
+from collections import defaultdict
+from context import connections, database_context
+from database.migrations import migrate
+from database.product_repository import ProductRepository
+
+PRICES = 1_000_000
+GTINS = 2_000
+STORES = 300
+LOCALS = 5
+
+def setup(size: int = PRICES):
+    migrate()
+    random.seed(42)
+    with database_context() as connection:
+        cursor = connection.cursor()
+        cursor.execute("INSERT INTO category (nota_id, description) VALUES ('1', 'BENCH')")
+        cursor.execute("INSERT INTO query (term, radius, category_id) VALUES ('bench', 10, 1)")
+        cursor.executemany("INSERT INTO local (geohash, name) VALUES (?, ?)", [(f"bench{i}", f"Bench {i}") for i in range(LOCALS)])
+        cursor.executemany("INSERT INTO store (id, enterprise_name) VALUES (?, ?)", [(str(i), f"MERCADO {i}") for i in range(STORES)])
+        cursor.executemany('''
+            INSERT INTO product (id, query_id, local_id, store_id, emission_date, description, gtin, value)
+            VALUES (?, 1, ?, ?, '2024-11-22T10:00:00', ?, ?, ?)
+        ''', ((str(i), random.randint(1, LOCALS), str(random.randrange(STORES)), f"PRODUTO {gtin}", str(gtin),
+               round(random.uniform(1, 50), 2)) for i, gtin in ((i, random.randrange(GTINS)) for i in range(size))))
+        # a third of the products are also found for the next local
+        cursor.execute('''
+            INSERT INTO product_local (query_id, local_id, product_id, distkm, value)
+            SELECT query_id, local_id, id, distkm, value FROM product
+            UNION ALL
+            SELECT query_id, local_id % ? + 1, id, distkm, value FROM product WHERE rowid % 3 = 0
+        ''', (LOCALS,))
+
+def teardown():
+    with database_context() as connection:
+        cursor = connection.cursor()
+        for table in ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "query_local", "query", "local", "category"]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("PRAGMA user_version = 0")
+
+def before(repo: ProductRepository) -> dict[str, tuple]:
+    prices = defaultdict(list)
+    for product in repo.find_by_query_id(1):
+        prices[product.gtin].append(product.value)
+    stats = {}
+    for gtin, values in prices.items():
+        deciles = statistics.quantiles(values, n=10, method="inclusive")
+        stats[gtin] = (min(values), max(values), statistics.fmean(values), statistics.median(values), deciles[0], deciles[-1])
+    return stats
+
+def after(repo: ProductRepository) -> dict[str, tuple]:
+    return {stats.key: (stats.min, stats.max, stats.mean, stats.median, stats.p10, stats.p90) for stats in repo.price_stats(1, "gtin")}
+
+def measure(compute, repo: ProductRepository) -> tuple[float, dict]:
+    start = time.perf_counter()
+    result = compute(repo)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    repo = ProductRepository()
+    setup()
+    try:
+        old, expected = measure(before, repo)
+        new, result = measure(after, repo)
+        assert expected.keys() == result.keys()
+        assert all(abs(a - b) < 1e-6 for gtin in expected for a, b in zip(expected[gtin], result[gtin]))
+        for limit in [-1, 20]:
+            total = 0.0
+            for by in ["gtin", "store", "local"]:
+                elapsed, _ = measure(lambda repo: repo.price_stats(1, by, limit), repo)
+                total += elapsed
+                print(f"per {by} (limit {limit}): {elapsed:.2f}s")
+            elapsed, _ = measure(lambda repo: repo.store_spread(1, limit), repo)
+            total += elapsed
+            print(f"store spread (limit {limit}): {elapsed:.2f}s")
+            print(f"query stats (limit {limit}): {total:.2f}s")
+        print(f"per gtin before: {old:.2f}s")
+        print(f"per gtin after:  {new:.2f}s ({old / new:.1f}x)")
+    finally:
+        teardown()
+        connections.close()
@@ -0,0 +1,49 @@
+import typer
+from typing import Annotated, Optional
+from rich.console import Console
+from rich.table import Table
+from database.cached_repository import CachedLocalRepository
+from database.product_repository import ProductRepository
+from models import Product
+
+product_repo = ProductRepository()
+local_repo = CachedLocalRepository()
+app = typer.Typer()
+console = Console()
+
+def print_products(products: list[Product]):
+    if len(products) == 0:
+        console.print("[bold red] No products found [/ bold red]")
+        return
+    table = Table(title="Products", expand=True)
+    table.add_column("Description", justify="left", style="white")
+    table.add_column("Price", justify="right", style="green")
+    table.add_column("Store", justify="left", style="cyan")
+    table.add_column("Address", justify="left", style="white")
+    table.add_column("Date", justify="center", style="yellow")
+    table.add_column("GTIN", justify="center", style="magenta")
+
+    for product in products:
+        table.add_row(
+            str(product.description),
+            f"{product.value:.2f}",
+            str(product.store_name),
+            str(product.store_address),
+            str(product.emission_date),
+            str(product.gtin),
+        )
+    console.print(table)
+
+@app.command()
+def search(terms: str,
+           local: Annotated[Optional[str], typer.Option(help="Name of the region the products were scraped for")] = None,
+           max_price: Annotated[Optional[float], typer.Option(help="Highest price shown")] = None,
+           limit: Annotated[int, typer.Option(help="Maximum amount of products shown")] = 50):
+    local_id = None
+    if local:
+        found = local_repo.find_by_name(local)
+        if found is None:
+            console.print(f"[bold red] Region {local} not found [/ bold red]")
+            return
+        local_id = found.id
+    print_products(product_repo.search(terms, local_id=local_id, max_price=max_price, limit=limit))
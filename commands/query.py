@@ -2,13 +2,15 @@ import typer
 from typing import Annotated, List, Optional
 from rich.console import Console
 from rich.table import Table
-from database.category_repository import CategoryRepository
+from database.cached_repository import CachedCategoryRepository
+from database.product_repository import GROUPS, ProductRepository
 from database.query_repository import QueryRepository
 from lib.scrapper import get_categories, get_locals
-from models import Query
+from models import PriceStats, Query, StoreSpread
 
 query_repo = QueryRepository()
-category_repo = CategoryRepository()
+category_repo = CachedCategoryRepository()
+product_repo = ProductRepository()
 app = typer.Typer()
 console = Console()
 
@@ -46,6 +48,46 @@ def print_queries(queries: list[Query]):
         ) 
     console.print(table) 
 
+def print_price_stats(title: str, stats: list[PriceStats]):
+    table = Table(title=title, expand=True)
+    table.add_column("Key", justify="center", style="cyan")
+    table.add_column("Name", justify="left", style="white")
+    for name in ["Count", "Min", "P10", "Median", "Mean", "P90", "Max"]:
+        table.add_column(name, justify="right", style="green")
+
+    for row in stats:
+        table.add_row(
+            str(row.key),
+            str(row.label),
+            str(row.count),
+            *[f"{value:.2f}" for value in [row.min, row.p10, row.median, row.mean, row.p90, row.max]]
+        )
+    console.print(table)
+
+def print_store_spread(spreads: list[StoreSpread]):
+    table = Table(title="Price spread between stores", expand=True)
+    table.add_column("GTIN", justify="center", style="cyan")
+    table.add_column("Description", justify="left", style="white")
+    table.add_column("Stores", justify="right", style="white")
+    table.add_column("Cheapest", justify="left", style="green")
+    table.add_column("Price", justify="right", style="green")
+    table.add_column("Most expensive", justify="left", style="red")
+    table.add_column("Price", justify="right", style="red")
+    table.add_column("Spread", justify="right", style="yellow")
+
+    for spread in spreads:
+        table.add_row(
+            str(spread.gtin),
+            str(spread.description),
+            str(spread.stores),
+            str(spread.cheapest_store),
+            f"{spread.cheapest_price:.2f}",
+            str(spread.priciest_store),
+            f"{spread.priciest_price:.2f}",
+            f"{spread.spread:.2f}",
+        )
+    console.print(table)
+
 @app.command()
 def create(term: str, locals: Annotated[List[str], typer.Option()], radius: float):
     query = Query(id=None, term=term.replace(" ", "%20"), locals=get_locals(locals), category=None, radius=radius)
@@ -77,17 +119,32 @@ def update(q: Annotated[int, typer.Option(help="Id of the query that you want to
         query_repo.save(query)
 
 @app.command()
-def delete(q: Annotated[Optional[int], typer.Option(help="Id of the query that you want to update")]):
+def delete(q: Annotated[Optional[List[int]], typer.Option(help="Id of the query that you want to delete, can be repeated")] = None):
     if q:
-        query = query_repo.find_by_id(q)
-        if not query:
-            console.print(f"[bold red] Query with id: {id} not found [/ bold red]")
+        missing = set(q) - query_repo.exists_by_ids(q)
+        if missing:
+            console.print(f"[bold red] Queries with ids: {sorted(missing)} not found [/ bold red]")
             return
-        if typer.confirm("Are you sure you want to permanently delete this query?"):
-            query_repo.delete_by_id(q)
+        if typer.confirm("Are you sure you want to permanently delete the selected queries?"):
+            query_repo.delete_by_ids(q)
         return
 
 @app.command()
 def listall():
     print_queries(query_repo.find_all())
 
+@app.command()
+def stats(q: Annotated[int, typer.Option(help="Id of the query")],
+          by: Annotated[Optional[List[str]], typer.Option(help=f"Group the prices by {', '.join(GROUPS)}, can be repeated")] = None,
+          limit: Annotated[int, typer.Option(help="Maximum amount of rows of each table, negative for all of them")] = 20):
+    if not query_repo.exists_by_id(q):
+        console.print(f"[bold red] Query with id: {q} not found [/ bold red]")
+        return
+    groups = by or list(GROUPS)
+    invalid = [group for group in groups if group not in GROUPS]
+    if invalid:
+        console.print(f"[bold red] Can not group prices by {invalid}, expected one of {list(GROUPS)} [/ bold red]")
+        return
+    for group in groups:
+        print_price_stats(f"Prices per {group}", product_repo.price_stats(q, group, limit))
+    print_store_spread(product_repo.store_spread(q, limit))
@@ -4,6 +4,7 @@ from typing import Annotated, Optional
 from commands.query import print_queries
 from database.query_repository import QueryRepository
 from database.spreadsheet_repository import SpreadsheetRepository
+from lib.encoder import ENCODINGS
 from lib.sheet_writer import add_spreadsheet, populate_spreadsheet
 from lib.util import option_prompt
 from models import Spreadsheet
@@ -58,7 +59,16 @@ def create(q: Annotated[Optional[int], typer.Option(help="Id of the query used t
             console.print("[bold red] Could not populate spreadsheet[/ bold red]")
 
 @app.command()
-def populate(s: Annotated[Optional[int], typer.Option(help="Id of the spreadsheet")] = None):
+def populate(s: Annotated[Optional[int], typer.Option(help="Id of the spreadsheet")] = None,
+             incremental: Annotated[bool, typer.Option(help="Only fetch and append products newer than the last populate")] = False,
+             encoding: Annotated[str, typer.Option(help=f"How rows are written: {', '.join(ENCODINGS)}")] = "values",
+             sync: Annotated[bool, typer.Option(help="Fetch every product but only write the rows that changed since the last sync")] = False):
+    if encoding not in ENCODINGS:
+        console.print(f"[bold red] Unknown encoding {encoding}, expected one of {list(ENCODINGS)} [/ bold red]")
+        return
+    if sync and (incremental or encoding != "values"):
+        console.print("[bold red] --sync writes values in place and can't be used with --incremental or other encodings [/ bold red]")
+        return
     if s:
         spreadsheet = spreadsheet_repo.find_by_id(s)
         if not spreadsheet:
@@ -68,7 +78,7 @@ def populate(s: Annotated[Optional[int], typer.Option(help="Id of the spreadshee
         print_spreadsheets(spreadsheet_repo.find_all())
         s = spreadsheets_option_prompt()
 
-    populate_spreadsheet(s)
+    populate_spreadsheet(s, incremental=incremental, encoding=encoding, sync=sync)
 
 @app.command()
 def delete(s: Annotated[Optional[int], typer.Option(help="Id of the spreadsheet")] = None):
@@ -5,10 +5,38 @@ load_dotenv()
 
 URL = "https://menorpreco.notaparana.pr.gov.br"
 OFFSET = 50
+ORDER_DEFAULT = 0
+ORDER_NEWEST = int(os.getenv("ORDER_NEWEST", "1")) # value of "ordem" that sorts products by date, newest first
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(MAX_WORKERS)))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+RATE_LIMIT = float(os.getenv("RATE_LIMIT", "10")) # requests per second
+RATE_LIMIT_MIN = float(os.getenv("RATE_LIMIT_MIN", "1"))
+RATE_LIMIT_MAX = float(os.getenv("RATE_LIMIT_MAX", "50"))
+RATE_LIMIT_CONCURRENCY = int(os.getenv("RATE_LIMIT_CONCURRENCY", str(MAX_WORKERS)))
+RATE_LIMIT_LATENCY = float(os.getenv("RATE_LIMIT_LATENCY", "2")) # seconds
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30")) # seconds
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))) # bytes
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))) # negative means KiB
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "0")) or None # seconds, 0 keeps locals and categories cached for the whole run
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+UPLOAD_CHUNK_CELLS = int(os.getenv("UPLOAD_CHUNK_CELLS", "25000")) # cells per Sheets request
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4")) # sheets uploaded at the same time
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "5"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "20000"))
+CACHE_TTL = { # seconds, by endpoint
+    "/api/v1/produtos": float(os.getenv("CACHE_TTL_PRODUCTS", str(60 * 60))),
+    "/api/v1/categorias": float(os.getenv("CACHE_TTL_CATEGORIES", str(7 * 24 * 60 * 60))),
+    "/mapa/search": float(os.getenv("CACHE_TTL_SEARCH", str(30 * 24 * 60 * 60))),
+}
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 DATE_FORMAT = "%d-%m-%Y"
 
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 CLIENT_CREDENTIALS = os.getenv("CLIENT_CREDENTIALS")
 TOKEN = os.getenv("TOKEN")
+GOOGLE_TOKEN_REFRESH_MARGIN = float(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300")) # seconds before expiry the token is refreshed
 MODE = os.getenv("MODE")
@@ -1,67 +1,207 @@
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.errors import HttpError
 from googleapiclient.discovery import build
 from contextlib import contextmanager
-from constraints import CLIENT_CREDENTIALS, GOOGLE_APPLICATION_CREDENTIALS, MODE, SCOPES, TOKEN
+from constraints import CLIENT_CREDENTIALS, GOOGLE_APPLICATION_CREDENTIALS, GOOGLE_TOKEN_REFRESH_MARGIN, HTTP_TIMEOUT, MODE, SCOPES, SQLITE_CACHE_SIZE, SQLITE_MMAP_SIZE, TOKEN
 from dataclasses import dataclass
+import datetime
+import httplib2
 import os
 import sqlite3
+import threading
+import weakref
 
 @dataclass
 class CredentialsContext:
     service: object
 
-@contextmanager
-def google_credentials_context():
-    creds = None
-    if GOOGLE_APPLICATION_CREDENTIALS is None:
-        raise Exception("Credentials path should be especified")
+class GoogleServiceManager:
+    '''
+    Loads the Google credentials once per process and keeps one Sheets service per thread,
+    the httplib2 transport under a service is not thread safe. Each service keeps its
+    connections open between calls and is built from the discovery document shipped with
+    the client, the token is only refreshed when it is about to expire.
+    '''
+    def __init__(self, refresh_margin: float = GOOGLE_TOKEN_REFRESH_MARGIN) -> None:
+        self.refresh_margin = refresh_margin
+        self.__credentials: Credentials | None = None
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
 
-    if TOKEN is None:
-        raise Exception("Could not find token")
+    def credentials(self) -> Credentials:
+        with self.__lock:
+            if self.__credentials is None:
+                self.__credentials = self.__load()
+            elif self.__expiring(self.__credentials):
+                self.__refresh(self.__credentials)
+            return self.__credentials
 
-    if os.path.exists(TOKEN):
-        creds = Credentials.from_authorized_user_file(TOKEN, SCOPES)
+    def service(self):
+        credentials = self.credentials()
+        service = getattr(self.__local, "service", None)
+        if service is None:
+            http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+            try:
+                service = build("sheets", "v4", http=http, static_discovery=True, cache_discovery=False)
+            except HttpError:
+                raise Exception("Could not create sheets service")
+            self.__local.service = service
+        return service
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
+    def clear(self):
+        with self.__lock:
+            self.__credentials = None
+            self.__local = threading.local()
+
+    def __load(self) -> Credentials:
+        if GOOGLE_APPLICATION_CREDENTIALS is None:
+            raise Exception("Credentials path should be especified")
+
+        if TOKEN is None:
+            raise Exception("Could not find token")
+
+        creds = None
+        if os.path.exists(TOKEN):
+            creds = Credentials.from_authorized_user_file(TOKEN, SCOPES)
+
+        if creds and creds.refresh_token and (not creds.valid or self.__expiring(creds)):
+            self.__refresh(creds)
+        elif not creds or not creds.valid:
             flow = InstalledAppFlow.from_client_secrets_file(
                     CLIENT_CREDENTIALS, SCOPES
             )
             creds = flow.run_local_server(port=0)
+            self.__save(creds)
+        return creds
+
+    def __expiring(self, creds: Credentials) -> bool:
+        if creds.expiry is None:
+            return False
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) # google-auth keeps expiry as naive UTC
+        return creds.expiry - now < datetime.timedelta(seconds=self.refresh_margin)
+
+    def __refresh(self, creds: Credentials):
+        creds.refresh(Request())
+        self.__save(creds)
+
+    def __save(self, creds: Credentials):
+        assert TOKEN is not None
         with open(TOKEN, "w") as token:
             token.write(creds.to_json())
-    try:
-        service = build("sheets", "v4", credentials=creds)
-    except HttpError:
-        raise Exception("Could not create sheets service")
-
-    context = CredentialsContext(service)
 
-    yield context
+google = GoogleServiceManager()
 
 @contextmanager
-def database_context():
-    if MODE == "test":
-        connection = sqlite3.connect("test_menor-preco.db")
-    elif MODE == "dev":
-        connection = sqlite3.connect("menor-preco.db")
-    else:
-        raise Exception(f"Mode should be test or dev, not {MODE}")
-        
-
-
-    try:
-        yield connection
-    except Exception:
-        connection.rollback()
-        raise
-    else:
-        connection.commit()
-    finally:
-        connection.close()
+def google_credentials_context():
+    '''
+    yields the Sheets service of the calling thread, created on the first call
+    '''
+    yield CredentialsContext(google.service())
+
+class ConnectionOwner:
+    '''
+    Held only by the thread local storage of the thread a connection belongs to
+    '''
+
+class ConnectionManager:
+    '''
+    Keeps one long-lived connection per thread, tuned with the pragmas below, and
+    hands out units of work on it. Units of work nest: only the outermost one
+    commits, inner ones are savepoints that roll back on their own. Units are
+    deferred so reads never wait for a writer. A deferred unit that reads and then
+    writes can't upgrade its lock while another thread writes and fails without
+    waiting for the busy timeout, such units are begun immediate.
+    '''
+    PRAGMAS = [
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA foreign_keys = ON",
+    ]
+
+    def __init__(self) -> None:
+        self.__local = threading.local()
+        self.__connections: dict[int, sqlite3.Connection] = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        '''
+        return: how many connections are open
+        '''
+        with self.__lock:
+            return len(self.__connections)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            if MODE == "test":
+                path = "test_menor-preco.db"
+            elif MODE == "dev":
+                path = "menor-preco.db"
+            else:
+                raise Exception(f"Mode should be test or dev, not {MODE}")
+            # closed from whichever thread drops the last reference to the owner
+            connection = sqlite3.connect(path, isolation_level=None, timeout=30, check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                connection.execute(pragma)
+            # the thread local values are released when the thread exits, so is the owner
+            owner = ConnectionOwner()
+            self.__local.owner = owner
+            self.__local.connection = connection
+            self.__local.depth = 0
+            with self.__lock:
+                self.__connections[id(owner)] = connection
+            weakref.finalize(owner, self.__release, id(owner))
+        return connection
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        '''
+        Args:
+            immediate takes the write lock when the outermost unit begins, for units that read and then write
+        '''
+        connection = self.connection()
+        depth = self.__local.depth
+        savepoint = f"unit_of_work_{depth}"
+        if depth > 0:
+            connection.execute(f"SAVEPOINT {savepoint}")
+        else:
+            connection.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        self.__local.depth += 1
+        try:
+            yield connection
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK" if depth == 0 else f"ROLLBACK TO {savepoint}")
+                if depth > 0:
+                    connection.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            # executescript commits on its own, so the transaction may be gone already
+            if connection.in_transaction:
+                connection.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+        finally:
+            self.__local.depth = depth
+
+    def close(self):
+        with self.__lock:
+            for connection in self.__connections.values():
+                connection.close()
+            self.__connections.clear()
+        self.__local = threading.local()
+
+    def __release(self, key: int):
+        with self.__lock:
+            connection = self.__connections.pop(key, None)
+        if connection is not None:
+            connection.close()
+
+connections = ConnectionManager()
 
+def database_context(immediate: bool = False):
+    return connections.transaction(immediate)
@@ -0,0 +1,197 @@
+import threading
+import time
+from typing import Callable, Generic, Hashable, TypeVar
+from constraints import REFERENCE_CACHE_TTL
+from context import database_context
+from database.category_repository import CategoryRepository
+from database.local_repository import LocalRepository
+from lib.util import placeholders
+from models import Category, Local
+
+T = TypeVar('T')
+
+class IdentityMap(Generic[T]):
+    '''
+    In-memory copy of a small reference table, indexed by several keys. The first
+    read loads the whole table; it is reloaded once ttl seconds have passed (never
+    when ttl is None) or after clear().
+    '''
+    def __init__(self, keys: dict[str, Callable[[T], Hashable]], ttl: float | None = REFERENCE_CACHE_TTL) -> None:
+        self.keys = keys
+        self.ttl = ttl
+        self.loaded_at: float | None = None
+        self.__indexes: dict[str, dict[Hashable, T]] = {key: {} for key in keys}
+        self.__entries: dict[Hashable, list[tuple[str, Hashable]]] = {} # keys of each entity, by id
+        self.__lock = threading.RLock()
+
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None and (self.ttl is None or time.monotonic() - self.loaded_at < self.ttl)
+
+    def load(self, entities: list[T]):
+        with self.__lock:
+            self.__indexes = {key: {} for key in self.keys}
+            self.__entries = {}
+            for entity in entities:
+                self.add(entity)
+            self.loaded_at = time.monotonic()
+
+    def get(self, key: str, value: Hashable) -> T | None:
+        return self.__indexes[key].get(value)
+
+    def all(self) -> list[T]:
+        return list(self.__indexes["id"].values())
+
+    def add(self, entity: T):
+        with self.__lock:
+            id = self.keys["id"](entity)
+            self.remove_by_id(id)
+            entries = [(key, get_key(entity)) for key, get_key in self.keys.items()]
+            for key, value in entries:
+                self.__indexes[key][value] = entity
+            self.__entries[id] = entries
+
+    def remove_by_id(self, id: Hashable):
+        with self.__lock:
+            for key, value in self.__entries.pop(id, []):
+                self.__indexes[key].pop(value, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__indexes = {key: {} for key in self.keys}
+            self.__entries = {}
+            self.loaded_at = None
+
+local_map: IdentityMap[Local] = IdentityMap({
+    "id": lambda local: local.id,
+    "geohash": lambda local: local.geohash,
+    "name": lambda local: local.name.casefold(),
+})
+
+category_map: IdentityMap[Category] = IdentityMap({
+    "id": lambda category: category.id,
+    "nota_id": lambda category: category.nota_id,
+})
+
+class CachedLocalRepository(LocalRepository):
+    '''
+    LocalRepository serving reads from the process-wide local_map
+    '''
+    def __loaded(self) -> IdentityMap[Local]:
+        if not local_map.is_loaded():
+            local_map.load(super().find_all())
+        return local_map
+
+    def find_by_id(self, id: int) -> Local | None:
+        return self.__loaded().get("id", int(id))
+
+    def find_all(self) -> list[Local]:
+        return self.__loaded().all()
+
+    def find_by_geohash(self, geohash: str) -> Local | None:
+        return self.__loaded().get("geohash", geohash)
+
+    def find_by_name(self, name: str) -> Local | None:
+        return self.__loaded().get("name", name.casefold())
+
+    def find_by_names(self, names: list[str]) -> list[Local]:
+        locals = self.__loaded()
+        found = {}
+        for name in names:
+            local = locals.get("name", name.casefold())
+            if local is not None:
+                found[local.id] = local
+        return list(found.values())
+
+    def find_by_query_ids(self, ids: list[int]) -> dict[int, list[Local]]:
+        locals: dict[int, list[Local]] = {}
+        if len(ids) == 0:
+            return locals
+        cache = self.__loaded()
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                SELECT ql.query_id, ql.local_id
+                FROM query_local AS ql
+                WHERE ql.query_id IN ({placeholders(ids)})
+            ''', ids).fetchall()
+        if any(cache.get("id", local_id) is None for _, local_id in rows): # stored by someone else
+            cache.load(super().find_all())
+        for query_id, local_id in rows:
+            local = cache.get("id", local_id)
+            if local is not None:
+                locals.setdefault(query_id, []).append(local)
+        return locals
+
+    def find_by_query_id(self, id: int) -> list[Local]:
+        return self.find_by_query_ids([id]).get(id, [])
+
+    def save(self, entity: Local) -> Local:
+        saved = super().save(entity)
+        self.__loaded().add(saved)
+        return saved
+
+    def save_many(self, entities: list[Local]) -> list[Local]:
+        saved = super().save_many(entities)
+        cache = self.__loaded()
+        for local in saved:
+            cache.add(local)
+        return saved
+
+    def find_by_ids(self, ids: list[int]) -> list[Local]:
+        cache = self.__loaded()
+        found = [cache.get("id", int(id)) for id in dict.fromkeys(ids)]
+        return [local for local in found if local is not None]
+
+    def delete_by_ids(self, ids: list[int]):
+        super().delete_by_ids(ids)
+        for id in ids:
+            local_map.remove_by_id(int(id))
+
+class CachedCategoryRepository(CategoryRepository):
+    '''
+    CategoryRepository serving reads from the process-wide category_map
+    '''
+    def __loaded(self) -> IdentityMap[Category]:
+        if not category_map.is_loaded():
+            category_map.load(super().find_all())
+        return category_map
+
+    def find_by_id(self, id: int) -> Category | None:
+        return self.__loaded().get("id", int(id))
+
+    def find_all(self) -> list[Category]:
+        return self.__loaded().all()
+
+    def find_by_nota_id(self, id: str) -> Category | None:
+        return self.__loaded().get("nota_id", str(id))
+
+    def find_by_nota_ids(self, ids: list[str]) -> list[Category]:
+        categories = self.__loaded()
+        found = {}
+        for id in ids:
+            category = categories.get("nota_id", str(id))
+            if category is not None:
+                found[category.id] = category
+        return list(found.values())
+
+    def save(self, entity: Category) -> Category:
+        saved = super().save(entity)
+        self.__loaded().add(saved)
+        return saved
+
+    def save_many(self, entities: list[Category]) -> list[Category]:
+        saved = super().save_many(entities)
+        cache = self.__loaded()
+        for category in saved:
+            cache.add(category)
+        return saved
+
+    def find_by_ids(self, ids: list[int]) -> list[Category]:
+        cache = self.__loaded()
+        found = [cache.get("id", int(id)) for id in dict.fromkeys(ids)]
+        return [category for category in found if category is not None]
+
+    def delete_by_ids(self, ids: list[int]):
+        super().delete_by_ids(ids)
+        for id in ids:
+            category_map.remove_by_id(int(id))
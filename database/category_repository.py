@@ -1,5 +1,6 @@
 from context import database_context
 from database.repository_interface import Repository
+from lib.util import placeholders
 from models import Category
 
 class CategoryRepository(Repository[Category]):
@@ -44,17 +45,38 @@ class CategoryRepository(Repository[Category]):
             return entity 
 
     def delete_by_id(self, id: int):
+        self.delete_by_ids([id])
+
+    def exists_by_id(self, id: int):
+        return int(id) in self.exists_by_ids([id])
+
+    def find_by_ids(self, ids: list[int]) -> list[Category]:
+        if len(ids) == 0:
+            return []
         with database_context() as connection:
             cursor = connection.cursor()
-            cursor.execute("DELETE FROM category WHERE id = ?", (str(id),))
+            rows = cursor.execute(f'''
+                SELECT id, nota_id, description
+                FROM category
+                WHERE id IN ({placeholders(ids)})
+            ''', ids).fetchall()
+            return [Category(id=id, nota_id=nota_id, description=description) for id, nota_id, description in rows]
 
-    def exists_by_id(self, id: int):
+    def delete_by_ids(self, ids: list[int]):
+        if len(ids) == 0:
+            return
         with database_context() as connection:
             cursor = connection.cursor()
-            row = cursor.execute("SELECT * FROM category WHERE id = ?", (str(id),)).fetchone()
-            if row is None:
-                return False
-            return True
+            cursor.execute(f"UPDATE query SET category_id = NULL WHERE category_id IN ({placeholders(ids)})", ids)
+            cursor.execute(f"DELETE FROM category WHERE id IN ({placeholders(ids)})", ids)
+
+    def exists_by_ids(self, ids: list[int]) -> set[int]:
+        if len(ids) == 0:
+            return set()
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f"SELECT id FROM category WHERE id IN ({placeholders(ids)})", ids).fetchall()
+            return {row[0] for row in rows}
 
     def find_by_query_id(self, id: int) -> Category | None:
         with database_context() as connection:
@@ -86,3 +108,40 @@ class CategoryRepository(Repository[Category]):
                 category = Category(id=int(id), nota_id=nota_id, description=description)
             return category
 
+    def find_by_nota_ids(self, ids: list[str]) -> list[Category]:
+        if len(ids) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                SELECT id, nota_id, description
+                FROM category
+                WHERE nota_id IN ({placeholders(ids)})
+            ''', [str(id) for id in ids]).fetchall()
+            return [Category(id=int(id), nota_id=nota_id, description=description) for id, nota_id, description in rows]
+
+    def save_many(self, entities: list[Category]) -> list[Category]:
+        '''
+        Inserts every category in a single transaction, skipping nota_ids that are already stored.
+        return: the stored categories, in the same order as entities
+        '''
+        if len(entities) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT 
+                INTO category (nota_id, description)
+                VALUES (?, ?)
+                ON CONFLICT(nota_id) DO NOTHING
+            ''', [(entity.nota_id, entity.description) for entity in entities])
+            nota_ids = [entity.nota_id for entity in entities]
+            rows = cursor.execute(f'''
+                SELECT id, nota_id, description
+                FROM category
+                WHERE nota_id IN ({placeholders(nota_ids)})
+            ''', nota_ids).fetchall()
+            stored = {nota_id: Category(id=int(id), nota_id=nota_id, description=description) for id, nota_id, description in rows}
+            for entity in entities:
+                entity.id = stored[entity.nota_id].id
+            return [stored[entity.nota_id] for entity in entities]
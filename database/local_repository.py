@@ -1,5 +1,6 @@
 from context import database_context
 from database.repository_interface import Repository
+from lib.util import placeholders
 from models import Local
 
 class LocalRepository(Repository[Local]):
@@ -37,20 +38,50 @@ class LocalRepository(Repository[Local]):
                     INTO local (geohash, name)
                     VALUES (?, ?)
                 ''', (entity.geohash, entity.name)).fetchone()
+                entity.id = cursor.lastrowid
             else:
                 cursor.execute('''
                     UPDATE local
                     SET geohash = ?, name = ?
-                ''', (entity.geohash, entity.name))
-            id = cursor.lastrowid
-            if id:
-                entity.id = id 
+                    WHERE id = ?
+                ''', (entity.geohash, entity.name, entity.id))
             return entity 
 
     def delete_by_id(self, id: int):
+        self.delete_by_ids([id])
+
+    def exists_by_id(self, id: int) -> bool:
+        return int(id) in self.exists_by_ids([id])
+
+    def find_by_ids(self, ids: list[int]) -> list[Local]:
+        if len(ids) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                SELECT l.id, l.geohash, l.name
+                FROM local AS l
+                WHERE l.id IN ({placeholders(ids)})
+            ''', ids).fetchall()
+            return [Local(id=id, geohash=geohash, name=name) for id, geohash, name in rows]
+
+    def delete_by_ids(self, ids: list[int]):
+        if len(ids) == 0:
+            return
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f"DELETE FROM query_local WHERE local_id IN ({placeholders(ids)})", ids)
+            # products stay for the other locals they were found for, only the links to these locals are removed
+            cursor.execute(f"UPDATE product SET local_id = NULL WHERE local_id IN ({placeholders(ids)})", ids)
+            cursor.execute(f"DELETE FROM local WHERE id IN ({placeholders(ids)})", ids)
+
+    def exists_by_ids(self, ids: list[int]) -> set[int]:
+        if len(ids) == 0:
+            return set()
         with database_context() as connection:
             cursor = connection.cursor()
-            cursor.execute("DELETE FROM local WHERE id = ?", (str(id),))
+            rows = cursor.execute(f"SELECT id FROM local WHERE id IN ({placeholders(ids)})", ids).fetchall()
+            return {row[0] for row in rows}
 
     def find_by_query_id(self, id: int) -> list[Local]:
         with database_context() as connection:
@@ -60,13 +91,45 @@ class LocalRepository(Repository[Local]):
                 FROM local AS l
                 JOIN query_local AS ql ON ql.local_id = l.id
                 WHERE ql.query_id = ?
-            ''', (str(id))).fetchall()
+            ''', (id,)).fetchall()
             locals = []
             for row in rows:
                 local_id, geohash, name = row
                 locals.append(Local(local_id, geohash, name))
             return locals
 
+    def find_by_query_ids(self, ids: list[int]) -> dict[int, list[Local]]:
+        '''
+        return: locals of each query, by query id
+        '''
+        locals: dict[int, list[Local]] = {}
+        if len(ids) == 0:
+            return locals
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                SELECT ql.query_id, l.id, l.geohash, l.name
+                FROM local AS l
+                JOIN query_local AS ql ON ql.local_id = l.id
+                WHERE ql.query_id IN ({placeholders(ids)})
+            ''', ids).fetchall()
+            for query_id, local_id, geohash, name in rows:
+                locals.setdefault(query_id, []).append(Local(local_id, geohash, name))
+            return locals
+
+    def find_by_geohash(self, geohash: str) -> Local | None:
+        with database_context() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute('''
+                SELECT l.id, l.geohash, l.name 
+                FROM local AS l
+                WHERE l.geohash = ?
+            ''', (geohash,)).fetchone()
+            if row is None:
+                return None
+            id, geohash, name = row
+            return Local(id=id, geohash=geohash, name=name)
+
     def find_by_name(self, name: str) -> Local | None:
         local = None
         with database_context() as connection:
@@ -81,3 +144,41 @@ class LocalRepository(Repository[Local]):
                 local = Local(id=id, geohash=geohash, name=name) 
             return local
 
+
+    def find_by_names(self, names: list[str]) -> list[Local]:
+        if len(names) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                SELECT l.id, l.geohash, l.name
+                FROM local AS l
+                WHERE l.name COLLATE NOCASE IN ({placeholders(names)})
+            ''', names).fetchall()
+            return [Local(id=id, geohash=geohash, name=name) for id, geohash, name in rows]
+
+    def save_many(self, entities: list[Local]) -> list[Local]:
+        '''
+        Inserts every local in a single transaction, skipping geohashes that are already stored.
+        return: the stored locals, in the same order as entities
+        '''
+        if len(entities) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT 
+                INTO local (geohash, name)
+                VALUES (?, ?)
+                ON CONFLICT(geohash) DO NOTHING
+            ''', [(entity.geohash, entity.name) for entity in entities])
+            geohashes = [entity.geohash for entity in entities]
+            rows = cursor.execute(f'''
+                SELECT l.id, l.geohash, l.name
+                FROM local AS l
+                WHERE l.geohash IN ({placeholders(geohashes)})
+            ''', geohashes).fetchall()
+            stored = {geohash: Local(id=id, geohash=geohash, name=name) for id, geohash, name in rows}
+            for entity in entities:
+                entity.id = stored[entity.geohash].id
+            return [stored[entity.geohash] for entity in entities]
@@ -0,0 +1,42 @@
+import os
+import re
+from context import connections
+
+MIGRATIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+
+def migrations(path: str = MIGRATIONS_PATH) -> list[tuple[int, str]]:
+    '''
+    return: (version, file path) of every migration in path, sorted by version.
+    Migration files are named <version>_<description>.sql
+    '''
+    found = []
+    for name in os.listdir(path):
+        match = re.match(r"^(\d+)_.*\.sql$", name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(path, name)))
+    return sorted(found)
+
+def current_version() -> int:
+    return connections.connection().execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(path: str = MIGRATIONS_PATH) -> int:
+    '''
+    Applies, in order, every migration newer than the PRAGMA user_version of the database.
+    Each migration runs in its own transaction together with the user_version bump.
+    return: the schema version after migrating
+    '''
+    connection = connections.connection()
+    version = current_version()
+    for migration_version, file_path in migrations(path):
+        if migration_version <= version:
+            continue
+        with open(file_path, 'r') as file:
+            script = file.read()
+        try:
+            connection.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {migration_version};\nCOMMIT;")
+        except Exception:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        version = migration_version
+    return version
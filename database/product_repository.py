@@ -0,0 +1,255 @@
+from context import database_context
+from lib.stats import rank
+from lib.util import placeholders
+from models import PriceStats, Product, Store, StoreSpread
+
+# price totals and prices of each group, column they are grouped by, prices counted and expression
+# labelling each group key, keyed by the accepted group names. A product is priced once per local it
+# was found for, through product_local
+GROUPS = {
+    "gtin": ("gtin_store_price", "product", "gtin", "store_id IS NOT NULL AND value IS NOT NULL",
+             "(SELECT description FROM product WHERE gtin = key LIMIT 1)"),
+    "store": ("gtin_store_price", "product", "store_id", "gtin IS NOT NULL AND value IS NOT NULL",
+              "(SELECT enterprise_name FROM store WHERE id = key)"),
+    "local": ("local_price", "product_local", "local_id", "value IS NOT NULL", "(SELECT name FROM local WHERE id = key)"),
+}
+
+class ProductRepository:
+    SELECT = '''
+        SELECT p.id, p.emission_date, p.description, p.distkm, p.store_id, s.enterprise_name, 
+               s.tipo || ' ' || s.street_name || ', N ' || s.number,
+               p.gtin, p.ncm, p.nrdoc, p.tempo, p.value, p.discount_value
+        FROM product AS p
+        JOIN store AS s ON s.id = p.store_id
+    '''
+
+    def find_by_id(self, id: str) -> Product | None:
+        with database_context() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute(f"{self.SELECT} WHERE p.id = ?", (id,)).fetchone()
+            if row is None:
+                return None
+            return Product(*row)
+
+    def find_by_ids(self, ids: list[str]) -> list[Product]:
+        if len(ids) == 0:
+            return []
+        with database_context() as connection:
+            cursor = connection.cursor()
+            # a product found by several queries is stored once for each of them
+            rows = cursor.execute(f"{self.SELECT} WHERE p.id IN ({placeholders(ids)}) GROUP BY p.id", ids).fetchall()
+            return [Product(*row) for row in rows]
+
+    def find_by_query_id(self, query_id: int, local_id: int | None = None) -> list[Product]:
+        with database_context() as connection:
+            cursor = connection.cursor()
+            if local_id is None:
+                rows = cursor.execute(f"{self.SELECT} WHERE p.query_id = ?", (query_id,)).fetchall()
+            else: # every product found for the local, with its distance to that local
+                rows = cursor.execute('''
+                    SELECT p.id, p.emission_date, p.description, pl.distkm, p.store_id, s.enterprise_name, 
+                           s.tipo || ' ' || s.street_name || ', N ' || s.number,
+                           p.gtin, p.ncm, p.nrdoc, p.tempo, p.value, p.discount_value
+                    FROM product_local AS pl
+                    JOIN product AS p ON p.query_id = pl.query_id AND p.id = pl.product_id
+                    JOIN store AS s ON s.id = p.store_id
+                    WHERE pl.query_id = ? AND pl.local_id = ?
+                ''', (query_id, local_id)).fetchall()
+            return [Product(*row) for row in rows]
+
+    def search(self, terms: str, local_id: int | None = None, max_price: float | None = None, limit: int = 50) -> list[Product]:
+        '''
+        Args:
+            terms words looked up in the product descriptions through the product_fts index,
+            each one matching as a prefix, accents and case ignored
+            local_id only products scraped for this local
+            max_price only products up to this price
+        return: the matching products, most relevant first by bm25, once even when found by several queries
+        '''
+        match = self.__match(terms)
+        if match is None:
+            return []
+        filters, params = ["product_fts MATCH ?"], [match]
+        if local_id is not None:
+            filters.append("EXISTS (SELECT 1 FROM product_local AS pl WHERE pl.query_id = p.query_id AND pl.local_id = ? AND pl.product_id = p.id)")
+            params.append(local_id)
+        if max_price is not None:
+            filters.append("p.value <= ?")
+            params.append(max_price)
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f'''
+                {self.SELECT}
+                JOIN product_fts ON product_fts.rowid = p.rowid
+                WHERE {' AND '.join(filters)}
+                GROUP BY p.id
+                ORDER BY MIN(product_fts.rank)
+                LIMIT ?
+            ''', (*params, limit)).fetchall()
+            return [Product(*row) for row in rows]
+
+    def __match(self, terms: str) -> str | None:
+        '''
+        return: FTS5 query requiring every word of terms as a prefix, quoted so user input is never read as query syntax
+        '''
+        words = terms.split()
+        if len(words) == 0:
+            return None
+        return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+    def find_store_by_id(self, id: str) -> Store | None:
+        with database_context() as connection:
+            cursor = connection.cursor()
+            row = cursor.execute('''
+                SELECT id, bairro, city, enterprise_name, number, tipo, uf, complement, street_name
+                FROM store
+                WHERE id = ?
+            ''', (id,)).fetchone()
+            if row is None:
+                return None
+            return Store(*row)
+
+    def save_many(self, products: list[Product], stores: list[Store], query_id: int, local_id: int) -> int:
+        '''
+        Stores a whole page of products found by a query and their stores in a single transaction.
+        Products already stored for the query are ignored, stores and the distance of the products to the local are updated.
+        return: amount of products new to the query
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT 
+                INTO store (id, enterprise_name, tipo, street_name, number, complement, bairro, city, uf)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE
+                SET enterprise_name = excluded.enterprise_name, tipo = excluded.tipo, street_name = excluded.street_name,
+                    number = excluded.number, complement = excluded.complement, bairro = excluded.bairro,
+                    city = excluded.city, uf = excluded.uf
+            ''', [(store.id, store.enterprise_name, store.tipo, store.street_name, store.number, store.complement, 
+                   store.bairro, store.city, store.uf) for store in stores])
+            cursor.executemany('''
+                INSERT
+                INTO product (id, query_id, local_id, store_id, emission_date, description, distkm, gtin, ncm, nrdoc, tempo, value, discount_value)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(query_id, id) DO NOTHING
+            ''', [(product.id, query_id, local_id, product.store_id, product.emission_date, product.description, product.distkm, 
+                   product.gtin, product.ncm, product.nrdoc, product.tempo, product.value, product.discount_value) for product in products])
+            inserted = cursor.rowcount
+            self.__save_distances(cursor, products, query_id, local_id)
+            return inserted
+
+    def save_distances(self, products: list[Product], query_id: int, local_id: int):
+        '''
+        Records that products already stored for the query were also found for local_id
+        '''
+        with database_context() as connection:
+            self.__save_distances(connection.cursor(), products, query_id, local_id)
+
+    def __save_distances(self, cursor, products: list[Product], query_id: int, local_id: int):
+        cursor.executemany('''
+            INSERT
+            INTO product_local (query_id, local_id, product_id, distkm, value)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(query_id, local_id, product_id) DO UPDATE
+            SET distkm = excluded.distkm, value = excluded.value
+        ''', [(query_id, local_id, product.id, product.distkm, product.value) for product in products])
+
+    def delete_by_query_id(self, query_id: int):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM product WHERE query_id = ?", (query_id,))
+
+    def price_stats(self, query_id: int, by: str, limit: int = -1) -> list[PriceStats]:
+        '''
+        The groups are counted and averaged from the price totals the triggers keep, min, max and
+        percentiles are read from the index on the prices of each group, skipping straight to their rank
+        Args:
+            by one of GROUPS, the column the prices are grouped by
+            limit maximum amount of groups, the ones with the most prices first. Negative for all of them
+        return: min, max, mean, median, p10 and p90 of the product prices of each group
+        '''
+        if by not in GROUPS:
+            raise ValueError(f"Can not group prices by {by}, expected one of {list(GROUPS)}")
+        totals, table, key, filter, label = GROUPS[by]
+        where = f"query_id = ? AND {key} = ? AND {filter}"
+        with database_context() as connection:
+            cursor = connection.cursor()
+            groups = cursor.execute(f'''
+                SELECT {key}, SUM(count) AS count, SUM(total)
+                FROM {totals}
+                WHERE query_id = ?
+                GROUP BY {key}
+                ORDER BY count DESC, {key}
+                LIMIT ?
+            ''', (query_id, limit)).fetchall()
+            names = self.__labels(cursor, label, [group for group, _, _ in groups])
+            stats = []
+            for group, count, total in groups:
+                low, median, p10, p90, high = (self.__percentile(cursor, table, where, (query_id, group), count, p)
+                                               for p in (0, 0.5, 0.1, 0.9, 1))
+                stats.append(PriceStats(group, names.get(group, ''), count, low, high, total / count, median, p10, p90))
+            return stats
+
+    def __percentile(self, cursor, table: str, where: str, params: tuple, count: int, p: float) -> float:
+        '''
+        return: percentile p of the count prices matching where, read through the index on value
+        from whichever end is closer to its rank
+        '''
+        lower, fraction = rank(count, p)
+        upper = min(lower + 1, count - 1)
+        if lower < count - 1 - upper:
+            values = cursor.execute(f"SELECT value FROM {table} WHERE {where} ORDER BY value LIMIT ? OFFSET ?",
+                                    (*params, upper - lower + 1, lower)).fetchall()
+        else:
+            values = cursor.execute(f"SELECT value FROM {table} WHERE {where} ORDER BY value DESC LIMIT ? OFFSET ?",
+                                    (*params, upper - lower + 1, count - 1 - upper)).fetchall()[::-1]
+        first, last = values[0][0], values[-1][0]
+        return first + (last - first) * fraction
+
+    def store_spread(self, query_id: int, limit: int = -1) -> list[StoreSpread]:
+        '''
+        Compares the average price of each gtin between the stores selling it, read from the price totals
+        return: the cheapest and most expensive store of each gtin sold by more than one store, widest spread first
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            # the store of a bare column is the one with the MIN or MAX price of its gtin, the first by store_id on ties
+            spreads = cursor.execute('''
+                WITH cheapest AS (
+                    SELECT gtin, COUNT(*) AS stores, store_id, MIN(total / count) AS price
+                    FROM gtin_store_price
+                    WHERE query_id = ?
+                    GROUP BY gtin
+                    HAVING COUNT(*) > 1
+                ), priciest AS (
+                    SELECT gtin, store_id, MAX(total / count) AS price
+                    FROM gtin_store_price
+                    WHERE query_id = ?
+                    GROUP BY gtin
+                )
+                SELECT c.gtin, c.stores, c.store_id, c.price, p.store_id, p.price, p.price - c.price AS spread
+                FROM cheapest AS c
+                JOIN priciest AS p ON p.gtin = c.gtin
+                ORDER BY spread DESC, c.gtin
+                LIMIT ?
+            ''', (query_id, query_id, limit)).fetchall()
+
+            descriptions = self.__labels(cursor, GROUPS["gtin"][4], [spread[0] for spread in spreads])
+            names = self.__labels(cursor, GROUPS["store"][4], list({spread[2] for spread in spreads} | {spread[4] for spread in spreads}))
+            return [StoreSpread(gtin, descriptions.get(gtin, ''), count, names.get(cheapest_id, cheapest_id), cheapest,
+                                names.get(priciest_id, priciest_id), priciest, spread)
+                    for gtin, count, cheapest_id, cheapest, priciest_id, priciest, spread in spreads]
+
+    def __labels(self, cursor, label: str, keys: list) -> dict:
+        '''
+        return: label of each key, looked up once per key through the indexes
+        '''
+        if len(keys) == 0:
+            return {}
+        rows = cursor.execute(f"WITH keys(key) AS (VALUES {', '.join('(?)' for _ in keys)}) SELECT key, {label} FROM keys", keys)
+        return dict(rows.fetchall())
+
+    def count(self) -> int:
+        with database_context() as connection:
+            cursor = connection.cursor()
+            return cursor.execute("SELECT COUNT(*) FROM product").fetchone()[0]
@@ -1,108 +1,128 @@
 from context import database_context
-from database.category_repository import CategoryRepository
-from database.local_repository import LocalRepository
+from database.cached_repository import CachedCategoryRepository, CachedLocalRepository
 from database.repository_interface import Repository
-from models import Query
+from lib.util import placeholders
+from models import Category, Query
 
 class QueryRepository(Repository[Query]):    
     def __init__(self) -> None:
-        self.local_repo = LocalRepository()
-        self.category_repo = CategoryRepository()
+        self.local_repo = CachedLocalRepository()
+        self.category_repo = CachedCategoryRepository()
+
+    SELECT = '''
+        SELECT q.id, q.term, q.radius, c.id, c.nota_id, c.description
+        FROM query AS q
+        LEFT JOIN category AS c ON c.id = q.category_id
+    '''
 
     def find_by_id(self, id: int) -> Query | None:
-        query = None
         with database_context() as connection:
             cursor = connection.cursor()
-            query_row = cursor.execute('''
-                SELECT q.id, q.term, q.radius
-                FROM query AS q 
-                WHERE id = ?
-            ''', (str(id))).fetchone()
+            query_row = cursor.execute(f"{self.SELECT} WHERE q.id = ?", (id,)).fetchone()
             if query_row is None:
                 raise Exception(f"Query of id {id} not found")
-            if query_row:
-                id, term, radius = query_row
-                locals = self.local_repo.find_by_query_id(id)
-                category = self.category_repo.find_by_query_id(id)
-                query = Query(id=id, term=term, locals=locals, category=category, radius=radius)
-            return query
+            return self.__build([query_row])[0]
 
     def find_all(self) -> list[Query]:
         with database_context() as connection:
             cursor = connection.cursor()
-            rows = cursor.execute('''
-                SELECT q.id, q.term, q.radius
-                FROM query AS q
-            ''').fetchall()
-            queries = []
-            for row in rows:
-                id, term, radius = row
-                locals = self.local_repo.find_by_query_id(id)
-                category = self.category_repo.find_by_query_id(id)
-                queries.append(Query(id=id, term=term, locals=locals, category=category, radius=radius))
-            return queries 
+            rows = cursor.execute(self.SELECT).fetchall()
+            return self.__build(rows)
 
-    def save(self, entity: Query) -> Query:
+    def find_by_ids(self, ids: list[int]) -> list[Query]:
+        if len(ids) == 0:
+            return []
         with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute(f"{self.SELECT} WHERE q.id IN ({placeholders(ids)})", ids).fetchall()
+            return self.__build(rows)
+
+    def save(self, entity: Query) -> Query:
+        return self.save_many([entity])[0]
+
+    def save_many(self, entities: list[Query]) -> list[Query]:
+        '''
+        Updates the queries that are already stored and inserts the others, with their locals.
+        '''
+        for entity in entities:
             if entity.category is None or entity.category.id is None:
                 raise Exception("Category should be defined")
-            cursor = connection.cursor()       
+        with database_context() as connection:
+            cursor = connection.cursor()
+            existing = self.exists_by_ids([entity.id for entity in entities if entity.id])
+            cursor.executemany('''
+                UPDATE query
+                SET term = ?, radius = ?, category_id = ?
+                WHERE id = ?
+            ''', [(entity.term, entity.radius, entity.category.id, entity.id) for entity in entities 
+                  if entity.id in existing and entity.category])
 
-            if entity.id and self.exists_by_id(entity.id):
-                cursor.execute('''
-                    UPDATE query
-                    SET term = ?
-                    WHERE id = ?
-                ''', (entity.term, entity.id))
-            else:
+            inserted = [entity for entity in entities if entity.id not in existing]
+            for entity in inserted:
+                assert entity.category is not None
                 cursor.execute('''
                     INSERT 
                     INTO query (term, radius, category_id)
                     VALUES (?, ?, ?)
                 ''', (entity.term, entity.radius, entity.category.id))
-                query_id = cursor.lastrowid
-                if query_id:
-                    entity.id = query_id
-                
-                locals = self.local_repo.find_all()
+                entity.id = cursor.lastrowid
 
-                for local in locals:
-                    if local in entity.locals:
-                        cursor.execute('''
-                            INSERT 
-                            INTO query_local (query_id, local_id) 
-                            VALUES (?, ?)
-                        ''', (query_id, local.id))
-            return entity
+            links = []
+            for entity in inserted:
+                for local in set(entity.locals):
+                    stored = self.local_repo.find_by_geohash(local.geohash)
+                    if stored is not None:
+                        links.append((entity.id, stored.id))
+            cursor.executemany('''
+                INSERT OR IGNORE
+                INTO query_local (query_id, local_id) 
+                VALUES (?, ?)
+            ''', links)
+            return entities
 
     def delete_by_id(self, id: int):
+        self.delete_by_ids([id])
+
+    def delete_by_ids(self, ids: list[int]):
+        if len(ids) == 0:
+            return
         with database_context() as connection:
             cursor = connection.cursor()
-            cursor.execute("DELETE FROM query WHERE id = ?", (str(id)))
+            cursor.execute(f'''
+                DELETE FROM spreadsheet_watermark
+                WHERE spreadsheet_id IN (SELECT id FROM spreadsheet WHERE query_id IN ({placeholders(ids)}))
+            ''', ids)
+            cursor.execute(f"UPDATE spreadsheet SET query_id = NULL WHERE query_id IN ({placeholders(ids)})", ids)
+            cursor.execute(f"DELETE FROM query_local WHERE query_id IN ({placeholders(ids)})", ids)
+            cursor.execute(f"DELETE FROM product WHERE query_id IN ({placeholders(ids)})", ids)
+            cursor.execute(f"DELETE FROM query WHERE id IN ({placeholders(ids)})", ids)
 
     def exists_by_id(self, id: int):
+        return int(id) in self.exists_by_ids([id])
+
+    def exists_by_ids(self, ids: list[int]) -> set[int]:
+        if len(ids) == 0:
+            return set()
         with database_context() as connection:
             cursor = connection.cursor()
-            row = cursor.execute("SELECT * FROM query WHERE id = ?", (str(id))).fetchone()
-            if row is None:
-                return False
-            return True
-            
+            rows = cursor.execute(f"SELECT id FROM query WHERE id IN ({placeholders(ids)})", ids).fetchall()
+            return {row[0] for row in rows}
 
     def find_by_spreadsheet_id(self, id: int) -> Query | None:
-        query = None
         with database_context() as connection:
             cursor = connection.cursor()
-            query_row = cursor.execute('''
-                SELECT q.id, q.term, q.radius
-                FROM query AS q
-                JOIN spreadsheet AS s ON s.query_id = q.id 
-                WHERE s.id = ?
-            ''', (str(id))).fetchone()
-            if query_row:
-                query_id, term, radius = query_row
-                locals = self.local_repo.find_by_query_id(query_id)
-                category = self.category_repo.find_by_query_id(query_id)
-                query = Query(id=query_id, term=term,locals=locals, category=category, radius=radius)
-            return query
+            query_row = cursor.execute(f"{self.SELECT} JOIN spreadsheet AS s ON s.query_id = q.id WHERE s.id = ?", (id,)).fetchone()
+            if query_row is None:
+                return None
+            return self.__build([query_row])[0]
 
+    def __build(self, rows: list[tuple]) -> list[Query]:
+        '''
+        Builds queries from rows of SELECT, loading the locals of all of them with a single query
+        '''
+        locals = self.local_repo.find_by_query_ids([row[0] for row in rows])
+        queries = []
+        for id, term, radius, category_id, nota_id, description in rows:
+            category = Category(id=category_id, nota_id=nota_id, description=description) if category_id is not None else None
+            queries.append(Query(id=id, term=term, locals=locals.get(id, []), category=category, radius=radius))
+        return queries
@@ -20,3 +20,27 @@ class Repository(Generic[T], ABC):
     def delete_by_id(self, id: int):
         pass
 
+    @abstractmethod
+    def find_by_ids(self, ids: list[int]) -> list[T]:
+        pass
+
+    @abstractmethod
+    def save_many(self, entities: list) -> list[T]:
+        '''
+        saves every entity in a single transaction
+        '''
+        pass
+
+    @abstractmethod
+    def delete_by_ids(self, ids: list[int]):
+        '''
+        deletes every entity in a single transaction
+        '''
+        pass
+
+    @abstractmethod
+    def exists_by_ids(self, ids: list[int]) -> set[int]:
+        '''
+        return: the ids, among the given ones, that are stored
+        '''
+        pass
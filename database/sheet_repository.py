@@ -0,0 +1,41 @@
+from context import database_context
+from database.cached_repository import CachedLocalRepository
+from models import Sheet
+
+class SheetRepository:
+    def __init__(self):
+        self.local_repo = CachedLocalRepository()
+
+    def find_by_spreadsheet_id(self, spreadsheet_id: int) -> list[Sheet]:
+        '''
+        return: the stored tabs of the spreadsheet, in the order they were saved
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute('''
+                SELECT id, title, local_id
+                FROM sheet
+                WHERE spreadsheet_id = ?
+                ORDER BY rowid
+            ''', (spreadsheet_id,)).fetchall()
+            locals = {local.id: local for local in self.local_repo.find_by_ids(list({local_id for _, _, local_id in rows}))}
+            return [Sheet(id=id, title=title, local=locals[local_id]) for id, title, local_id in rows if local_id in locals]
+
+    def save_many(self, spreadsheet_id: int, entities: list[Sheet]):
+        for entity in entities:
+            if entity.local.id is None:
+                raise Exception("Local should be saved")
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT
+                INTO sheet (spreadsheet_id, id, title, local_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(spreadsheet_id, id) DO UPDATE
+                SET title = excluded.title, local_id = excluded.local_id
+            ''', [(spreadsheet_id, entity.id, entity.title, entity.local.id) for entity in entities])
+
+    def delete_by_spreadsheet_id(self, spreadsheet_id: int):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM sheet WHERE spreadsheet_id = ?", (spreadsheet_id,))
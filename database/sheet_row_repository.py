@@ -0,0 +1,40 @@
+from context import database_context
+
+class SheetRowRepository:
+    def find_by_sheet(self, spreadsheet_id: int, sheet_id: str) -> dict[str, tuple[int, str]]:
+        '''
+        return: row and hash of every product written to the sheet, by product id
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute('''
+                SELECT product_id, row, hash
+                FROM sheet_row
+                WHERE spreadsheet_id = ? AND sheet_id = ?
+            ''', (spreadsheet_id, sheet_id)).fetchall()
+            return {product_id: (row, hash) for product_id, row, hash in rows}
+
+    def save_changes(self, spreadsheet_id: int, sheet_id: str, changed: dict[str, tuple[int, str]], removed: list[str]):
+        '''
+        Args:
+            changed new row and hash of the products inserted, updated or moved, by product id
+            removed ids of the products no longer in the sheet
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                DELETE FROM sheet_row
+                WHERE spreadsheet_id = ? AND sheet_id = ? AND product_id = ?
+            ''', [(spreadsheet_id, sheet_id, product_id) for product_id in removed])
+            cursor.executemany('''
+                INSERT
+                INTO sheet_row (spreadsheet_id, sheet_id, product_id, row, hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(spreadsheet_id, sheet_id, product_id) DO UPDATE
+                SET row = excluded.row, hash = excluded.hash
+            ''', [(spreadsheet_id, sheet_id, product_id, row, hash) for product_id, (row, hash) in changed.items()])
+
+    def delete_by_sheet(self, spreadsheet_id: int, sheet_id: str):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM sheet_row WHERE spreadsheet_id = ? AND sheet_id = ?", (spreadsheet_id, sheet_id))
@@ -0,0 +1,29 @@
+from context import database_context
+
+class SheetUploadRepository:
+    def find_by_sheet(self, spreadsheet_id: int, sheet_id: str) -> set[str]:
+        '''
+        return: ids of the products appended to the sheet by populates that stopped midway
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute('''
+                SELECT product_id
+                FROM sheet_upload
+                WHERE spreadsheet_id = ? AND sheet_id = ?
+            ''', (spreadsheet_id, sheet_id)).fetchall()
+            return {product_id for product_id, in rows}
+
+    def save_many(self, spreadsheet_id: int, sheet_id: str, product_ids: list[str]):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT OR IGNORE
+                INTO sheet_upload (spreadsheet_id, sheet_id, product_id)
+                VALUES (?, ?, ?)
+            ''', [(spreadsheet_id, sheet_id, product_id) for product_id in product_ids])
+
+    def delete_by_sheet(self, spreadsheet_id: int, sheet_id: str):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM sheet_upload WHERE spreadsheet_id = ? AND sheet_id = ?", (spreadsheet_id, sheet_id))
@@ -1,79 +1,96 @@
 from context import database_context
 from database.query_repository import QueryRepository
 from database.repository_interface import Repository
-from lib.util import to_date
+from lib.util import placeholders, to_date
 from models import Spreadsheet
 
 class SpreadsheetRepository(Repository[Spreadsheet]):        
     def __init__(self):
         self.query_repo = QueryRepository()
 
+    SELECT = "SELECT s.id, s.google_id, s.query_id, s.is_populated, s.last_populated FROM spreadsheet AS s"
+
     def find_by_id(self, id: int) -> Spreadsheet | None:
-        spreadsheet = None
         with database_context() as context:
             cursor = context.cursor()
-            row = cursor.execute("SELECT s.id, s.google_id, s.is_populated, s.last_populated FROM spreadsheet AS s WHERE s.id = ?", (str(id),)).fetchone()
-            if row:
-                s_id, google_id, is_populated, last_populated = row
-                query = self.query_repo.find_by_spreadsheet_id(id) 
-                spreadsheet = Spreadsheet(id=s_id, google_id=google_id, query=query, is_populated=bool(is_populated), last_populated=to_date(last_populated))
-            return spreadsheet
+            row = cursor.execute(f"{self.SELECT} WHERE s.id = ?", (id,)).fetchone()
+            if row is None:
+                return None
+            return self.__build([row])[0]
 
     def find_all(self) -> list[Spreadsheet]:
         with database_context() as context:
             cursor = context.cursor()
-            rows = cursor.execute("SELECT s.id, s.google_id, s.is_populated, s.last_populated FROM spreadsheet AS s").fetchall()
-            spreadsheets = []
-            for row in rows:
-                id, google_id, is_populated, last_populated = row
-                query = self.query_repo.find_by_spreadsheet_id(id)
-                spreadsheets.append(Spreadsheet(id=id, google_id=google_id, query=query, is_populated=bool(is_populated), last_populated=to_date(last_populated)))
-            return spreadsheets
+            rows = cursor.execute(self.SELECT).fetchall()
+            return self.__build(rows)
 
-    def save(self, entity: Spreadsheet) -> Spreadsheet:
+    def find_by_ids(self, ids: list[int]) -> list[Spreadsheet]:
+        if len(ids) == 0:
+            return []
         with database_context() as context:
             cursor = context.cursor()
-            is_populated = 1 if entity.is_populated else 0
+            rows = cursor.execute(f"{self.SELECT} WHERE s.id IN ({placeholders(ids)})", ids).fetchall()
+            return self.__build(rows)
+
+    def save(self, entity: Spreadsheet) -> Spreadsheet:
+        return self.save_many([entity])[0]
+
+    def save_many(self, entities: list[Spreadsheet]) -> list[Spreadsheet]:
+        for entity in entities:
             if not entity.query:
                 raise Exception("Query should be defined")
-            if entity.id is None:
-                cursor.execute('''
-                    INSERT
-                    INTO spreadsheet (google_id, query_id, is_populated) 
-                    VALUES (?, ?, ?)
-                ''', (entity.google_id, entity.query.id, is_populated))
-            else: 
-                cursor.execute("""
-                    UPDATE spreadsheet
-                    SET google_id = ?, query_id = ?, is_populated = ?, last_populated = ?
-                    WHERE id = ?
-                """, (entity.google_id, entity.query.id, is_populated, entity.last_populated, entity.id))                
-            id = cursor.lastrowid
-            if id:
-                entity.id = id 
-            return entity 
+        with database_context() as context:
+            cursor = context.cursor()
+            cursor.executemany("""
+                UPDATE spreadsheet
+                SET google_id = ?, query_id = ?, is_populated = ?, last_populated = ?
+                WHERE id = ?
+            """, [(entity.google_id, entity.query.id, 1 if entity.is_populated else 0, entity.last_populated, entity.id) 
+                  for entity in entities if entity.id is not None and entity.query])
+            for entity in entities:
+                if entity.id is None and entity.query:
+                    cursor.execute('''
+                        INSERT
+                        INTO spreadsheet (google_id, query_id, is_populated) 
+                        VALUES (?, ?, ?)
+                    ''', (entity.google_id, entity.query.id, 1 if entity.is_populated else 0))
+                    entity.id = cursor.lastrowid
+            return entities
 
     def delete_by_id(self, id: int):
+        self.delete_by_ids([id])
+
+    def delete_by_ids(self, ids: list[int]):
+        if len(ids) == 0:
+            return
         with database_context() as context:
             cursor = context.cursor()
-            cursor.execute("DELETE FROM spreadsheet WHERE id = ?", (str(id)))
+            cursor.execute(f"DELETE FROM spreadsheet WHERE id IN ({placeholders(ids)})", ids)
 
     def exists_by_id(self, id: int) -> bool:
+        return int(id) in self.exists_by_ids([id])
+
+    def exists_by_ids(self, ids: list[int]) -> set[int]:
+        if len(ids) == 0:
+            return set()
         with database_context() as context:
             cursor = context.cursor()
-            row = cursor.execute("SELECT * FROM spreadsheet WHERE id = ?", (str(id))).fetchone()
-            if row is None:
-                return False
-            return True 
+            rows = cursor.execute(f"SELECT id FROM spreadsheet WHERE id IN ({placeholders(ids)})", ids).fetchall()
+            return {row[0] for row in rows}
 
     def find_by_google_id(self, google_id: str) -> Spreadsheet | None:
-        spreadsheet = None
         with database_context() as context:
             cursor = context.cursor()
-            row = cursor.execute("SELECT s.id, s.google_id, s.is_populated, s.last_populated FROM spreadsheet AS s WHERE s.google_id = ?", (str(google_id),)).fetchone()
-            if row:
-                id, google_id, is_populated, last_populated = row
-                query = self.query_repo.find_by_spreadsheet_id(id) 
-                spreadsheet = Spreadsheet(id=id, google_id=google_id, query=query, is_populated=bool(is_populated) ,last_populated=to_date(last_populated))
-            return spreadsheet
+            row = cursor.execute(f"{self.SELECT} WHERE s.google_id = ?", (str(google_id),)).fetchone()
+            if row is None:
+                return None
+            return self.__build([row])[0]
 
+    def __build(self, rows: list[tuple]) -> list[Spreadsheet]:
+        '''
+        Builds spreadsheets from rows of SELECT, loading all their queries at once
+        '''
+        query_ids = list({query_id for _, _, query_id, _, _ in rows if query_id is not None})
+        queries = {query.id: query for query in self.query_repo.find_by_ids(query_ids)}
+        return [Spreadsheet(id=id, google_id=google_id, query=queries.get(query_id), is_populated=bool(is_populated), last_populated=to_date(last_populated))
+                for id, google_id, query_id, is_populated, last_populated in rows]
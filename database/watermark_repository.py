@@ -0,0 +1,34 @@
+from context import database_context
+from models import Watermark
+
+class WatermarkRepository:
+    def find_by_spreadsheet_id(self, spreadsheet_id: int) -> dict[int, Watermark]:
+        '''
+        return: watermarks of the spreadsheet, by local id
+        '''
+        with database_context() as connection:
+            cursor = connection.cursor()
+            rows = cursor.execute('''
+                SELECT w.spreadsheet_id, w.local_id, w.emission_date, w.product_id
+                FROM spreadsheet_watermark AS w
+                WHERE w.spreadsheet_id = ?
+            ''', (spreadsheet_id,)).fetchall()
+            return {local_id: Watermark(spreadsheet_id=spreadsheet_id, local_id=local_id, emission_date=emission_date, product_id=product_id)
+                    for spreadsheet_id, local_id, emission_date, product_id in rows}
+
+    def save_many(self, entities: list[Watermark]):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.executemany('''
+                INSERT 
+                INTO spreadsheet_watermark (spreadsheet_id, local_id, emission_date, product_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(spreadsheet_id, local_id) DO UPDATE
+                SET emission_date = excluded.emission_date, product_id = excluded.product_id
+                WHERE excluded.emission_date >= spreadsheet_watermark.emission_date
+            ''', [(entity.spreadsheet_id, entity.local_id, entity.emission_date, entity.product_id) for entity in entities])
+
+    def delete_by_spreadsheet_id(self, spreadsheet_id: int):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM spreadsheet_watermark WHERE spreadsheet_id = ?", (spreadsheet_id,))
@@ -0,0 +1,78 @@
+import time
+from urllib.parse import urlsplit
+from context import database_context
+from constraints import CACHE_MAX_ENTRIES, CACHE_TTL
+
+class ResponseCache:
+    '''
+    Persistent cache of raw API responses, keyed by the normalized request url.
+    Entries expire after the ttl configured for their endpoint and the least
+    recently used ones are evicted once the cache grows past max_entries.
+    '''
+    def __init__(self, ttl: dict[str, float] = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = True
+        self.refresh = False
+
+    def get(self, url: str) -> bytes | None:
+        if not self.enabled or self.refresh:
+            return None
+        ttl = self.__ttl(url)
+        if ttl is None:
+            return None
+        key = normalize_url(url)
+        now = time.time()
+        # accessed_at is written after the read
+        with database_context(immediate=True) as connection:
+            cursor = connection.cursor()
+            row = cursor.execute('''
+                SELECT body, created_at
+                FROM http_cache
+                WHERE url = ?
+            ''', (key,)).fetchone()
+            if row is None:
+                return None
+            body, created_at = row
+            if created_at + ttl < now:
+                return None
+            cursor.execute("UPDATE http_cache SET accessed_at = ? WHERE url = ?", (now, key))
+            return body
+
+    def put(self, url: str, body: bytes):
+        if not self.enabled or self.__ttl(url) is None:
+            return
+        now = time.time()
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE
+                INTO http_cache (url, body, created_at, accessed_at)
+                VALUES (?, ?, ?, ?)
+            ''', (normalize_url(url), body, now, now))
+            cursor.execute('''
+                DELETE FROM http_cache
+                WHERE url IN (
+                    SELECT url
+                    FROM http_cache
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+
+    def clear(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM http_cache")
+
+    def __ttl(self, url: str) -> float | None:
+        path = urlsplit(url).path
+        for prefix, ttl in self.ttl.items():
+            if path.startswith(prefix):
+                return ttl
+        return None
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url)
+    params = sorted(param for param in parts.query.split("&") if param)
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path}?{'&'.join(params)}"
@@ -0,0 +1,93 @@
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from lib.cache import ResponseCache
+from lib.decoder import loads
+from lib.throttle import AdaptiveLimiter, CircuitBreaker
+from constraints import HTTP_BACKOFF, HTTP_POOL_SIZE, HTTP_RETRIES, HTTP_TIMEOUT, URL
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# failures of the connection or of reading the body, any other RequestException is raised right away
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.ContentDecodingError)
+
+class MenorPrecoClient:
+    '''
+    Thin wrapper around a pooled requests.Session so every call to the
+    Menor Preco API reuses the same warm connections.
+    '''
+    def __init__(self, base_url: str = URL, pool_size: int = HTTP_POOL_SIZE, timeout: float = HTTP_TIMEOUT,
+                 retries: int = HTTP_RETRIES, backoff: float = HTTP_BACKOFF, cache: ResponseCache | None = None,
+                 limiter: AdaptiveLimiter | None = None, breaker: CircuitBreaker | None = None) -> None:
+        self.base_url = base_url
+        self.cache = cache
+        self.limiter = limiter or AdaptiveLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path: str) -> requests.Response:
+        '''
+        Args:
+            path relative to the base url, query string included
+        return: the response, retried with exponential backoff on 5xx/429, connection and read errors
+        '''
+        url = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            self.breaker.before()
+            self.limiter.acquire()
+            start = time.perf_counter()
+            res, ok = None, False
+            try:
+                res = self.session.get(url, timeout=self.timeout)
+                ok = res.status_code not in RETRY_STATUS
+            except RETRY_ERRORS:
+                if attempt >= self.retries:
+                    raise
+            finally:
+                # released whatever the call raised, or in_flight and the half-open trial would never be given back
+                self.__record(start, ok=ok)
+            if res is not None and (ok or attempt >= self.retries):
+                res.raise_for_status()
+                return res
+            time.sleep(self.__delay(attempt, res.headers.get("Retry-After") if res is not None else None))
+            attempt += 1
+
+    def get_json(self, path: str):
+        if self.cache is None:
+            return loads(self.get(path).content)
+        url = f"{self.base_url}{path}"
+        body = self.cache.get(url)
+        if body is None:
+            body = self.get(path).content
+            self.cache.put(url, body)
+        return loads(body)
+
+    def diagnostics(self) -> dict:
+        return {**self.limiter.snapshot(), "breaker": self.breaker.snapshot()["state"]}
+
+    def close(self):
+        self.session.close()
+
+    def __record(self, start: float, ok: bool):
+        self.limiter.release(time.perf_counter() - start, throttled=not ok)
+        self.breaker.record(ok)
+
+    def __delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        # full jitter: spread retries of concurrent workers over the whole window
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+client = MenorPrecoClient(cache=ResponseCache())
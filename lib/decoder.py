@@ -0,0 +1,45 @@
+import json
+from operator import itemgetter
+from models import Product, Store
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    try:
+        import ujson
+        loads = ujson.loads
+    except ImportError:
+        loads = json.loads
+
+__product_fields = itemgetter("id", "datahora", "desc", "distkm", "gtin", "ncm", "nrdoc", "tempo", "valor", "valor_desconto", "estabelecimento")
+__store_fields = itemgetter("codigo", "nm_emp", "tp_logr", "nm_logr", "nr_logr")
+
+def to_products(products: list[dict], stores: dict[str, Store] | None = None) -> list[Product]:
+    '''
+    Args:
+        products raw "produtos" list of a page returned by /api/v1/produtos
+        stores when given, the store of every product not in it yet is added, by store id
+    return: the same products converted to Product, in order
+    '''
+    result = []
+    append = result.append
+    for product in products:
+        id, datahora, desc, distkm, gtin, ncm, nrdoc, tempo, valor, valor_desconto, store = __product_fields(product)
+        codigo, nm_emp, tp_logr, nm_logr, nr_logr = __store_fields(store)
+        if stores is not None and codigo not in stores:
+            stores[codigo] = to_store(store)
+        append(Product(id, datahora, desc, distkm, codigo, nm_emp, f"{tp_logr} {nm_logr}, N {nr_logr}",
+                       gtin, ncm, nrdoc, tempo, float(valor), float(valor_desconto)))
+    return result
+
+def to_store(store: dict) -> Store:
+    return Store(id=store["codigo"], 
+                 bairro=store.get("bairro", ""), 
+                 city=store.get("mun", ""), 
+                 enterprise_name=store["nm_emp"], 
+                 number=store["nr_logr"], 
+                 tipo=store["tp_logr"], 
+                 uf=store.get("uf", ""), 
+                 complement=store.get("complemento", ""), 
+                 street_name=store["nm_logr"])
@@ -0,0 +1,53 @@
+from dataclasses import fields
+from operator import attrgetter
+from typing import Callable
+from models import Product
+
+# Product is slotted, so its cells are read through the declared fields instead of __dict__
+__product_cells = attrgetter(*(field.name for field in fields(Product)))
+
+def to_cells_row(values) -> dict:
+    '''
+    return: row for an appendCells request, every value sent as text
+    '''
+    return {
+        "values": [{ "userEnteredValue": { "stringValue": str(cell) }} for cell in values]
+    }
+
+def product_to_cells(product: Product) -> dict:
+    return to_cells_row(__product_cells(product))
+
+def to_values_row(values) -> list:
+    '''
+    return: row for spreadsheets.values, every value sent as text
+    '''
+    return [f"'{value}" for value in values]
+
+def product_to_values(product: Product) -> list:
+    '''
+    return: row for spreadsheets.values written with valueInputOption USER_ENTERED. Prices and
+    distance are sent as numbers and the emission date as a date time the sheet parses, in UTC.
+    Texts go behind an apostrophe so ids and descriptions are never read as numbers or formulas
+    '''
+    return [f"'{product.id}", __date(product.emission_date), f"'{product.description}", __number(product.distkm),
+            f"'{product.store_id}", f"'{product.store_name}", f"'{product.store_address}", f"'{product.gtin}",
+            f"'{product.ncm}", f"'{product.nrdoc}", f"'{product.tempo}", __number(product.value),
+            __number(product.discount_value)]
+
+# header and product row encoders of each encoding accepted by populate
+ENCODINGS: dict[str, tuple[Callable[[list], object], Callable[[Product], object]]] = {
+    "values": (to_values_row, product_to_values),
+    "cells": (to_cells_row, product_to_cells),
+}
+
+def __date(value) -> str:
+    if isinstance(value, str) and len(value) >= 19 and value[10] == "T":
+        return f"{value[:10]} {value[11:19]}"
+    return f"'{value}"
+
+def __number(value) -> float | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    return float(value)
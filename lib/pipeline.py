@@ -0,0 +1,86 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+from rich.table import Table
+
+T = TypeVar('T')
+
+class StageTimer:
+    '''
+    Accumulates the time spent in each named stage of a pipeline. Safe to share
+    between the threads running the stages.
+    '''
+    def __init__(self) -> None:
+        self.elapsed: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.__lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.__lock:
+                self.elapsed[stage] = self.elapsed.get(stage, 0) + elapsed
+                self.counts[stage] = self.counts.get(stage, 0) + 1
+
+    def table(self) -> Table:
+        table = Table(title="Stage timings")
+        table.add_column("Stage", justify="left", style="cyan")
+        table.add_column("Calls", justify="right", style="white")
+        table.add_column("Seconds", justify="right", style="green")
+        for stage, elapsed in self.elapsed.items():
+            table.add_row(stage, str(self.counts[stage]), f"{elapsed:.2f}")
+        table.add_row("wall clock", "", f"{time.perf_counter() - self.started:.2f}")
+        return table
+
+class _Done:
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.error = error
+
+def threaded(source: Iterable[T], maxsize: int) -> Iterator[T]:
+    '''
+    Args:
+        source iterable drained by a background thread
+        maxsize amount of items buffered ahead of the consumer; the producer blocks once it is reached
+    return: iterator over the items of source, re-raising any error raised while producing them
+    '''
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in source:
+                if not put(item):
+                    return
+        except BaseException as error:
+            put(_Done(error))
+        else:
+            put(_Done())
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, _Done):
+                if item.error:
+                    raise item.error
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -1,77 +1,125 @@
-import requests
-from database.category_repository import CategoryRepository
-from database.local_repository import LocalRepository
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import date as Date
+from typing import Iterator
+from database.cached_repository import CachedCategoryRepository, CachedLocalRepository
+from error.RegionNotFound import RegionNotFound
+from lib.client import client
+from lib.decoder import to_products
 from lib.util import spinner
-from models import Category, Local, Query, Product
-from constraints import URL, OFFSET
+from models import Category, Local, Query, Product, Store, Watermark
+from constraints import MAX_WORKERS, OFFSET, ORDER_DEFAULT, ORDER_NEWEST
 
 def get_products(query: Query, local: Local) -> list[Product]:
     '''
     Args: 
         query used to scrap data
-    return: tuple containing the list of products found plus the amount of products
+    return: list of products found, in the order returned by the API
+    '''
+    return [product for page in iter_products(query, local) for product in page]
+
+def iter_products(query: Query, local: Local, stores: dict[str, Store] | None = None) -> Iterator[list[Product]]:
+    '''
+    Args: 
+        query used to scrap data
+        stores when given, receives the store of every product, by store id
+    return: generator yielding one list of products per page, in order, as soon as each page arrives.
+    At most MAX_WORKERS pages are downloaded ahead of the consumer.
     '''
     if query.category is None:
         raise Exception("Category should not be None")
-    
-    request_url =f"{URL}/api/v1/produtos?local={local.geohash}&termo={query.term}&categoria={query.category.nota_id}&offset=0&raio={query.radius}&data=-1&ordem=0"
-    res = requests.get(request_url)
-    total = res.json()["total"]
-    products = res.json()["produtos"]
+
+    first_page = client.get_json(__products_url(query, local, 0))
+    offsets = iter(range(OFFSET, first_page["total"], OFFSET))
+    products = to_products(first_page["produtos"], stores)
+    del first_page
+    yield products
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = deque(executor.submit(__fetch_page, query, local, offset, stores) for offset in islice(offsets, MAX_WORKERS))
+        while pending:
+            page = pending.popleft().result()
+            for offset in islice(offsets, 1):
+                pending.append(executor.submit(__fetch_page, query, local, offset, stores))
+            yield page
+
+def iter_new_products(query: Query, local: Local, since: Watermark, stores: dict[str, Store] | None = None) -> Iterator[list[Product]]:
+    '''
+    Args: 
+        query used to scrap data
+        since watermark of the last product already scraped for this query and local
+        stores when given, receives the store of every product, by store id
+    return: generator yielding pages of products newer than the watermark, newest first.
+    Only the days since the watermark are requested. Products older than the watermark are left out,
+    pagination stops at the watermark product or at the first page without any newer product, so
+    products slightly out of order within the requested days are not lost
+    '''
+    if query.category is None:
+        raise Exception("Category should not be None")
+
+    days = (Date.today() - Date.fromisoformat(since.emission_date[:10])).days + 1
     offset = 0
-    while offset < total:
-        products += requests.get(f"{URL}/api/v1/produtos?local={local.geohash}&termo={query.term}&categoria={query.category}&offset={offset}&raio={query.radius}&data=-1&ordem=0").json()["produtos"]
+    while True:
+        page = client.get_json(__products_url(query, local, offset, days=days, order=ORDER_NEWEST))
+        products = []
+        for product in to_products(page["produtos"], stores):
+            if product.id == since.product_id: # the next ones were scraped along with it
+                if len(products) > 0:
+                    yield products
+                return
+            if product.emission_date >= since.emission_date:
+                products.append(product)
+        if len(products) == 0:
+            return
+        yield products
         offset += OFFSET
+        if offset >= page["total"]:
+            return
 
-    products = [Product(id=product["id"], 
-                       emission_date=product["datahora"], 
-                       description=product["desc"], 
-                       distkm=product["distkm"], 
-                       store_id=product["estabelecimento"]["codigo"],
-                       store_name=product["estabelecimento"]["nm_emp"],
-                       store_address=f"{product['estabelecimento']['tp_logr']} {product['estabelecimento']['nm_logr']}, N {product['estabelecimento']['nr_logr']}",
-                       gtin=product["gtin"], 
-                       ncm=product["ncm"], 
-                       nrdoc=product["nrdoc"], 
-                       tempo=product["tempo"], 
-                       value=float(product["valor"]), 
-                       discount_value=float(product["valor_desconto"]), 
-                   ) for product in products]
+def __fetch_page(query: Query, local: Local, offset: int, stores: dict[str, Store] | None) -> list[Product]:
+    return to_products(client.get_json(__products_url(query, local, offset))["produtos"], stores)
 
-    return products
+def __products_url(query: Query, local: Local, offset: int, days: int = -1, order: int = ORDER_DEFAULT) -> str:
+    assert query.category is not None
+    return f"/api/v1/produtos?local={local.geohash}&termo={query.term}&categoria={query.category.nota_id}&offset={offset}&raio={query.radius}&data={days}&ordem={order}"
 
 def get_locals(region_names: list[str]) -> list[Local]:
-    locals = []
-    repo = LocalRepository()
-    for name in region_names:
-        local = repo.find_by_name(name)
-        if local is None:
-            res = requests.get(f"{URL}/mapa/search?regiao={name}")  
-            data = res.json()
-            local = Local(id=None, geohash=data[0]["geohash"], name=name)
-            try:
-                repo.save(local)
-            except Exception:
-                continue
-        locals.append(local)
-    return repo.find_all()
+    '''
+    Args:
+        region_names names of the regions, matched case insensitively against the stored locals
+    return: the requested locals, in the requested order. Regions not stored yet are
+    looked up concurrently and saved in a single transaction
+    '''
+    repo = CachedLocalRepository()
+    found = {local.name.upper(): local for local in repo.find_by_names(region_names)}
+    missing = list({name.upper(): name for name in region_names if name.upper() not in found}.values())
+    if len(missing) > 0:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            results = list(executor.map(__search_region, missing))
+        for name, local in zip(missing, repo.save_many(results)):
+            found[name.upper()] = local
+
+    return list(dict.fromkeys(found[name.upper()] for name in region_names))
+
+def __search_region(name: str) -> Local:
+    data = client.get_json(f"/mapa/search?regiao={name}")
+    if len(data) == 0:
+        raise RegionNotFound(f"Could not find region {name}")
+    return Local(id=None, geohash=data[0]["geohash"], name=name)
 
 @spinner(["Buscando categorias..."])
 def get_categories(query: Query) -> list[Category]:
-    repo = CategoryRepository()
-    related_categories = []
     if len(query.locals) == 0:
         raise Exception("Local should be defined")
 
-    for local in query.locals:
-        res = requests.get(f"{URL}/api/v1/categorias?local={local}&termo={query.term}")
-        data = res.json()
-        for category in data["categorias"]:
-            category = Category(id=None, nota_id=category["id"], description=category["desc"])
-            category_saved = repo.find_by_nota_id(id=category.nota_id)
-            if not category_saved:
-                category_saved = repo.save(category)
-            if category_saved not in related_categories:
-                related_categories.append(category_saved)
-    return related_categories
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        responses = list(executor.map(lambda local: client.get_json(f"/api/v1/categorias?local={local.geohash}&termo={query.term}"), query.locals))
 
+    related_categories: dict[str, Category] = {}
+    for data in responses:
+        for category in data["categorias"]:
+            nota_id = str(category["id"])
+            if nota_id not in related_categories:
+                related_categories[nota_id] = Category(id=None, nota_id=nota_id, description=category["desc"])
+    return CachedCategoryRepository().save_many(list(related_categories.values()))
@@ -0,0 +1,99 @@
+import hashlib
+from dataclasses import dataclass, field
+
+@dataclass(slots=True)
+class SyncPlan:
+    '''
+    Rows to write to one sheet so it matches a new scrape. Row 0 is the header,
+    writes maps a row index to its new values, blank rows clear what was there
+    '''
+    writes: dict[int, list] = field(default_factory=dict)
+    changed: dict[str, tuple[int, str]] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    rebaseline: bool = False
+
+    def ranges(self, title: str, max_rows: int) -> list[dict]:
+        '''
+        Args:
+            title of the sheet
+            max_rows rows of the longest range, longer runs of contiguous rows are split
+        return: the writes as spreadsheets.values.batchUpdate data, contiguous rows merged into a single range
+        '''
+        title = title.replace("'", "''")
+        data = []
+        start, values = None, []
+        for row in sorted(self.writes):
+            if start is None or row != start + len(values) or len(values) >= max_rows:
+                if values:
+                    data.append({"range": f"'{title}'!A{start + 1}", "values": values})
+                start, values = row, []
+            values.append(self.writes[row])
+        if values:
+            data.append({"range": f"'{title}'!A{start + 1}", "values": values})
+        return data
+
+def row_hash(row: list) -> str:
+    return hashlib.blake2b(repr(row).encode(), digest_size=8).hexdigest()
+
+def plan(stored: dict[str, tuple[int, str]], rows: list[tuple[str, list]], header: list) -> SyncPlan:
+    '''
+    Args:
+        stored row index and hash of every product written to the sheet, by product id
+        rows (product id, values) of every product of the new scrape, in order
+        header values of row 0
+    return: the inserts, updates and deletes turning the stored rows into rows. New products take
+    the place of deleted ones first, deleted rows left below the last product are then filled
+    with the last products, so the sheet stays without gaps
+    '''
+    result = SyncPlan(rebaseline=len(stored) == 0)
+    blank = [""] * len(header)
+    if result.rebaseline:
+        result.writes[0] = header
+
+    values: dict[str, list] = {}
+    state: dict[str, tuple[int, str]] = {}
+    inserts = []
+    for product_id, row in rows:
+        if product_id in values:
+            continue
+        values[product_id] = row
+        hash = row_hash(row)
+        if product_id in stored:
+            index, previous = stored[product_id]
+            if previous != hash:
+                result.writes[index] = row
+                result.changed[product_id] = (index, hash)
+                result.updated += 1
+            state[product_id] = (index, hash)
+        else:
+            inserts.append((product_id, row, hash))
+
+    result.removed = [product_id for product_id in stored if product_id not in values]
+    result.deleted = len(result.removed)
+    holes = sorted(stored[product_id][0] for product_id in result.removed)
+    next_row = max((index for index, _ in stored.values()), default=0) + 1
+    holes.reverse() # popped from the end, lowest row first
+    for product_id, row, hash in inserts:
+        if holes:
+            index = holes.pop()
+        else:
+            index, next_row = next_row, next_row + 1
+        result.writes[index] = row
+        result.changed[product_id] = state[product_id] = (index, hash)
+        result.inserted += 1
+    holes.reverse()
+
+    # the lowest hole takes the last product while it is above it
+    occupied = sorted(((index, product_id) for product_id, (index, _) in state.items()), reverse=True)
+    moved = 0
+    while moved < len(holes) and moved < len(occupied) and holes[moved] < occupied[moved][0]:
+        hole, (index, product_id) = holes[moved], occupied[moved]
+        result.writes[hole] = values[product_id]
+        result.changed[product_id] = (hole, state[product_id][1])
+        moved += 1
+    for index in holes[moved:] + [index for index, _ in occupied[:moved]]:
+        result.writes[index] = blank
+    return result
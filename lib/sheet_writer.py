@@ -1,11 +1,34 @@
 import datetime
+from typing import Iterator
+from rich.console import Console
+from database.product_repository import ProductRepository
 from database.query_repository import QueryRepository
+from database.sheet_repository import SheetRepository
+from database.sheet_row_repository import SheetRowRepository
+from database.sheet_upload_repository import SheetUploadRepository
 from database.spreadsheet_repository import SpreadsheetRepository
+from database.watermark_repository import WatermarkRepository
 from googleapiclient.errors import HttpError
 from context import google_credentials_context
-from lib.scrapper import get_products
+from lib.client import client
+from lib import sheet_sync
+from lib.encoder import ENCODINGS, to_values_row
+from lib.scrapper import iter_new_products, iter_products
+from lib.pipeline import StageTimer, threaded
+from lib.sheet_sync import SyncPlan
+from lib.uploader import SheetStream, SheetUploader
 from lib.util import spinner
-from models import Spreadsheet, Query, Sheet
+from models import Product, Spreadsheet, Query, Sheet, Store, Watermark
+from constraints import PIPELINE_QUEUE_SIZE, UPLOAD_CHUNK_CELLS
+
+console = Console()
+
+# only the id and title of each tab are read from Google
+SHEET_FIELDS = "sheets.properties(sheetId,title)"
+
+HEADER = ["id", "data de emissao", "descricao", "distancia em km", "id do estabelecimento", "nome do estabelecimento", "endereco do estabelecimento", "gtin", "ncm", "nrdoc", "tempo", "valor de venda", "valor de desconto"]
+# rows of a chunk of the upload
+CHUNK_ROWS = max(UPLOAD_CHUNK_CELLS // len(HEADER), 1)
 
 @spinner(tasks=["Creating spreadsheet..."])
 def add_spreadsheet(query: Query) -> Spreadsheet | None:
@@ -16,114 +39,280 @@ def add_spreadsheet(query: Query) -> Spreadsheet | None:
     try:
         with google_credentials_context() as context:
             body = {
-                "properties": { "title": f"{query.term} - {now.strftime('%d/%m/%Y')}" }
+                "properties": { "title": f"{query.term} - {now.strftime('%d/%m/%Y')}" },
+                "sheets": [{ "properties": { "title": local.name, "index": index }} for index, local in enumerate(query.locals)]
             }
             response = (
                 context.service.spreadsheets()
-                .create(body=body, fields="spreadsheetId")
+                .create(body=body, fields=f"spreadsheetId,{SHEET_FIELDS}")
                 .execute()
             )
             spreadsheet = Spreadsheet(id=None, google_id=response.get("spreadsheetId"), query=query)
             spreadsheet_repo.save(spreadsheet)
             query_repo.save(query)
+            assert spreadsheet.id is not None
+            SheetRepository().save_many(spreadsheet.id, __to_sheets(spreadsheet, response.get("sheets", [])))
         return spreadsheet
     except HttpError as error:
         print(f"An error occured: {error}")
         raise Exception("Could not finish request") 
 
 @spinner(tasks=["Fetching products...", "Populating sheets..."])
-def populate_spreadsheet(id: int):
+def populate_spreadsheet(id: int, incremental: bool = False, encoding: str = "values", sync: bool = False):
+    '''
+    Args:
+        id of the spreadsheet
+        incremental when True only products newer than the last populate are fetched and appended
+        encoding one of lib.encoder.ENCODINGS. "values" writes typed 2-D arrays through spreadsheets.values.append,
+        "cells" writes every value as text through appendCells
+        sync when True every product is fetched, but only the rows that changed since the last sync are
+        written, in place, and the rows of products gone are removed. Rows are written with the "values" encoding
+    '''
     repo = SpreadsheetRepository()
+    watermark_repo = WatermarkRepository()
     spreadsheet = repo.find_by_id(id)
     if not spreadsheet or not spreadsheet.query:
         print("Spreadsheet or query not found")
         return
 
-    sheets = __get_sheets(spreadsheet)
-    requests = []
-    if len(sheets) == 0: # if no valid sheets are found create sheets
-        for index, local in enumerate(spreadsheet.query.locals):
-            requests.append({
-                "addSheet": {
-                    "properties": {
-                        "title": local.name,
-                        "index": index
-                    }
-                }
-            })
+    sheets = __get_or_create_sheets(spreadsheet)
+    assert spreadsheet.id is not None and spreadsheet.query.id is not None
+    watermarks = watermark_repo.find_by_spreadsheet_id(spreadsheet.id) if incremental and not sync else {}
+    upload_repo = SheetUploadRepository()
+    # products appended by a populate that stopped midway are fetched again, the header went with them
+    uploaded = {sheet.id: upload_repo.find_by_sheet(spreadsheet.id, sheet.id) for sheet in sheets} if incremental and not sync else {}
+    if sync:
+        encoding = "values"
+    latest: dict[int, Watermark] = {}
+    timer = StageTimer()
+    scraped = threaded(__scrape(spreadsheet, sheets, timer, watermarks, latest), PIPELINE_QUEUE_SIZE)
+    ingested = threaded(__ingest(__dedup(scraped, timer), spreadsheet.query, timer), PIPELINE_QUEUE_SIZE)
+    headless = {sheet.id for sheet in sheets if sheet.local.id in watermarks or uploaded.get(sheet.id) or sync}
+    encoded = threaded(__encode(ingested, timer, headless, encoding), PIPELINE_QUEUE_SIZE)
+    uploader = SheetUploader(spreadsheet.google_id, encoding="ranges" if sync else encoding, timer=timer)
+    row_repo = SheetRowRepository()
+    plans: dict[str, SyncPlan] = {}
+    synced: dict[str, list] = {}
+    streams: dict[str, SheetStream] = {}
+    written: dict[str, list[str | None]] = {}
+    try:
+        for sheet, rows, done in encoded: # upload each local while it and the next ones are scraped
+            if sync: # the plan compares every row of the sheet
+                synced.setdefault(sheet.id, []).extend(rows)
+                if done:
+                    plans[sheet.id] = __plan_sync(spreadsheet, sheet, synced.pop(sheet.id), row_repo, timer)
+                    ranges = plans[sheet.id].ranges(sheet.title, CHUNK_ROWS)
+                    if len(ranges) > 0:
+                        uploader.submit(sheet, ranges)
+                continue
+            if uploaded.get(sheet.id):
+                rows = [(product_id, row) for product_id, row in rows if product_id not in uploaded[sheet.id]]
+            written.setdefault(sheet.id, []).extend(product_id for product_id, _ in rows)
+            if len(rows) > 0:
+                if sheet.id not in streams:
+                    streams[sheet.id] = uploader.open(sheet)
+                streams[sheet.id].write([row for _, row in rows])
+            if done:
+                if sheet.id in streams:
+                    streams.pop(sheet.id).close()
+                if len(written[sheet.id]) == (0 if sheet.id in headless else 1):
+                    print(f"No new products for term {spreadsheet.query.term} in local {sheet.title}")
+    finally:
+        for stream in streams.values(): # the uploads still waiting for rows end with the rows written so far
+            stream.close()
+    results = uploader.results()
+    failed = [result for result in results if not result.ok]
+    console.print(timer.table())
+    console.print(f"Scraper: {client.diagnostics()}")
+    for result in failed:
+        console.print(f"[bold red]Upload of {result.sheet.title} stopped after {result.uploaded} of {result.chunks} chunks: {result.error}[/bold red]")
+    failed_sheets = {result.sheet.id for result in failed}
+    if not sync:
+        for sheet in sheets:
+            if sheet.id not in failed_sheets:
+                upload_repo.delete_by_sheet(spreadsheet.id, sheet.id)
+        for result in failed: # the rows of the chunks sent are the first ones written to the sheet
+            landed = written[result.sheet.id][:result.uploaded_rows]
+            upload_repo.save_many(spreadsheet.id, result.sheet.id, [product_id for product_id in landed if product_id is not None])
+    for sheet in sheets:
+        plan = plans.get(sheet.id)
+        if plan is None:
+            continue
+        if sheet.id in failed_sheets: # the sheet is rewritten from scratch on the next sync
+            row_repo.delete_by_sheet(spreadsheet.id, sheet.id)
+            continue
+        row_repo.save_changes(spreadsheet.id, sheet.id, plan.changed, plan.removed)
+        console.print(f"{sheet.title}: {plan.inserted} inserted, {plan.updated} updated, {plan.deleted} deleted")
+    if any(isinstance(result.error, HttpError) and result.error.resp.status == 400 for result in failed):
+        # a tab was probably removed or renamed, read them again from Google next time
+        SheetRepository().delete_by_spreadsheet_id(id)
+    spreadsheet.is_populated = len(failed) == 0
+    spreadsheet.last_populated = datetime.datetime.now()
+    repo.save(spreadsheet)
+    # sheets that failed keep their previous watermark so an incremental populate fetches their products again,
+    # the ones already appended are skipped
+    failed_locals = {result.sheet.local.id for result in failed}
+    watermark_repo.save_many([watermark for local_id, watermark in latest.items() if local_id not in failed_locals])
+
+def __scrape(spreadsheet: Spreadsheet, sheets: list[Sheet], timer: StageTimer, watermarks: dict[int, Watermark],
+             latest: dict[int, Watermark]) -> Iterator[tuple[Sheet, list[Product] | None, list[Store]]]:
+    '''
+    yields every page of products of each sheet, with the stores of its products, followed by
+    (sheet, None, []) once the sheet is done.
+    Sheets with a watermark only get the products newer than it. The newest product seen for
+    each local is stored in latest
+    '''
+    assert spreadsheet.id is not None and spreadsheet.query is not None
+    query = spreadsheet.query
+    for sheet in sheets:
+        assert sheet.local.id is not None
+        since = watermarks.get(sheet.local.id)
+        stores: dict[str, Store] = {}
+        pages = iter_new_products(query, sheet.local, since, stores) if since else iter_products(query, sheet.local, stores)
+        while True:
+            with timer.measure("scrape"):
+                page = next(pages, None)
+            if page is None:
+                break
+            if len(page) == 0:
+                continue
+            newest = max(page, key=lambda product: (product.emission_date, product.id))
+            current = latest.get(sheet.local.id)
+            if current is None or (newest.emission_date, newest.id) > (current.emission_date, current.product_id):
+                latest[sheet.local.id] = Watermark(spreadsheet_id=spreadsheet.id, local_id=sheet.local.id, emission_date=newest.emission_date, product_id=newest.id)
+            yield sheet, page, [stores[store_id] for store_id in {product.store_id for product in page}]
+        yield sheet, None, []
+
+def __dedup(pages: Iterator[tuple[Sheet, list[Product] | None, list[Store]]], 
+            timer: StageTimer) -> Iterator[tuple[Sheet, list[Product] | None, list[Product], list[Store]]]:
+    '''
+    splits every page into the products not seen for a previous local yet and the ones already seen,
+    so products found for overlapping locals are stored and written to a sheet only once.
+    Products without an id are identified by Product.key
+    '''
+    seen: set[str] = set()
+    for sheet, page, stores in pages:
+        if page is None:
+            yield sheet, None, [], stores
+            continue
+        with timer.measure("dedup"):
+            fresh, repeated = [], []
+            for product in page:
+                if not product.id:
+                    product.id = product.key()
+                if product.id in seen:
+                    repeated.append(product)
+                else:
+                    seen.add(product.id)
+                    fresh.append(product)
+        yield sheet, fresh, repeated, stores
+
+def __ingest(pages: Iterator[tuple[Sheet, list[Product] | None, list[Product], list[Store]]], query: Query, 
+             timer: StageTimer) -> Iterator[tuple[Sheet, list[Product] | None]]:
+    '''
+    stores every page in the product history before passing it on. Products already stored for
+    a previous local only get their distance to this local recorded
+    '''
+    assert query.id is not None
+    product_repo = ProductRepository()
+    for sheet, page, repeated, stores in pages:
+        assert sheet.local.id is not None
+        with timer.measure("store"):
+            if page:
+                product_repo.save_many(page, stores, query.id, sheet.local.id)
+            if repeated:
+                product_repo.save_distances(repeated, query.id, sheet.local.id)
+        yield sheet, page
+
+def __encode(pages: Iterator[tuple[Sheet, list[Product] | None]], timer: StageTimer, headless: set[int],
+             encoding: str) -> Iterator[tuple[Sheet, list[tuple[str | None, list]], bool]]:
+    '''
+    yields the rows of each sheet as its pages are encoded, in batches of at least CHUNK_ROWS rows, and the
+    last rows of the sheet flagged as done. Every row comes as (product id, row), the header row, which
+    sheets in headless don't get, with no product id
+    '''
+    header, encode = ENCODINGS[encoding]
+    rows = None
+    for sheet, page in pages:
+        if rows is None:
+            rows = [] if sheet.id in headless else [(None, header(HEADER))]
+        if page is None:
+            yield sheet, rows, True
+            rows = None
+            continue
+        with timer.measure("encode"):
+            rows.extend([(product.id, encode(product)) for product in page])
+        if len(rows) >= CHUNK_ROWS:
+            yield sheet, rows, False
+            rows = []
+
+def __plan_sync(spreadsheet: Spreadsheet, sheet: Sheet, rows: list[tuple[str, list]], row_repo: SheetRowRepository,
+                timer: StageTimer) -> SyncPlan:
+    '''
+    return: the writes turning the rows last synced to the sheet into rows. A sheet never synced
+    before is cleared first, rows written by a populate without sync are not tracked
+    '''
+    assert spreadsheet.id is not None
+    with timer.measure("diff"):
+        plan = sheet_sync.plan(row_repo.find_by_sheet(spreadsheet.id, sheet.id), rows, to_values_row(HEADER))
+    if plan.rebaseline:
+        title = sheet.title.replace("'", "''")
         with google_credentials_context() as context:
-            body = {
-                "requests": requests
-            }
             (
                 context.service.spreadsheets()
-                .batchUpdate(spreadsheetId=spreadsheet.google_id, body=body)
+                .values()
+                .clear(spreadsheetId=spreadsheet.google_id, range=f"'{title}'", body={})
                 .execute()
             )
-        sheets = __get_sheets(spreadsheet)
-    
-    requests = [] 
-    for sheet in sheets: # build sheet request
-        values = get_products(spreadsheet.query, spreadsheet.get_geohash(sheet.title))
-        try:
-            data = [["id", "data de emissao", "descricao", "distancia em km", "id do estabelecimento", "nome do estabelecimento", "endereco do estabelecimento", "gtin", "ncm", "nrdoc", "tempo", "valor de venda", "valor de desconto"]]
-        except IndexError:
-            print(f"No products for term {spreadsheet.query.term} in local {sheet.title}")
-            continue
-        for value in values: 
-            product = []
-            for z in zip(value.__dict__.values()):
-                product.append(z[0])
-            data.append(product)
+    return plan
 
-        rows = []
-        for row in data:
-            row_data = {
-                "values": [{ "userEnteredValue": { "stringValue": str(cell) }} for cell in row]
-            }
-            rows.append(row_data)
+def __get_or_create_sheets(spreadsheet: Spreadsheet) -> list[Sheet]:
+    '''
+    return: the tab of every local of the query. Tabs are read from the sheet table, Google is only asked
+    for them when some local has no stored tab, and the tabs still missing after that are created
+    '''
+    assert spreadsheet.id is not None and spreadsheet.query is not None
+    sheet_repo = SheetRepository()
+    sheets = sheet_repo.find_by_spreadsheet_id(spreadsheet.id)
+    if set(spreadsheet.query.locals) <= {sheet.local for sheet in sheets}:
+        return sheets
 
-        requests.append({
-            "appendCells": {
-                "sheetId": sheet.id,
-                "rows": rows,
-                "fields": "userEnteredValue"
+    sheets = __get_sheets(spreadsheet)
+    found = {sheet.local for sheet in sheets}
+    missing = [local for local in spreadsheet.query.locals if local not in found]
+    if len(missing) > 0:
+        with google_credentials_context() as context:
+            body = {
+                "requests": [{ "addSheet": { "properties": { "title": local.name }}} for local in missing]
             }
-        })
-     
-    with google_credentials_context() as context:
-        body = { 
-            "requests": requests,
-            "includeSpreadsheetInResponse": False,
-            "responseIncludeGridData": False,
-            "responseRanges": [],
-        }
-        
-        (
-            context.service.spreadsheets()
-            .batchUpdate(spreadsheetId=spreadsheet.google_id, body=body)
-            .execute()
-        )
-    spreadsheet.is_populated = True
-    spreadsheet.last_populated = datetime.datetime.now()
-    repo.save(spreadsheet)
+            response = (
+                context.service.spreadsheets()
+                .batchUpdate(spreadsheetId=spreadsheet.google_id, body=body)
+                .execute()
+            )
+        sheets += __to_sheets(spreadsheet, [reply["addSheet"] for reply in response.get("replies", [])])
+    sheet_repo.delete_by_spreadsheet_id(spreadsheet.id)
+    sheet_repo.save_many(spreadsheet.id, sheets)
+    return sheets
 
 def __get_sheets(spreadsheet: Spreadsheet) -> list[Sheet]:
-    sheets = []
     with google_credentials_context() as context:
         response = (
             context.service.spreadsheets()
-            .get(spreadsheetId=spreadsheet.google_id)
+            .get(spreadsheetId=spreadsheet.google_id, fields=SHEET_FIELDS)
             .execute()
         )
+    return __to_sheets(spreadsheet, response.get("sheets", []))
 
-        for sheet in response.get("sheets"):
-            properties = sheet.get("properties")
-            id = properties.get("sheetId")
-            title = properties.get("title")
-            #print(f"id: {id}, title: {title}")
-            try:
-                sheets.append(Sheet(id, title, spreadsheet.get_geohash(title)))
-            except Exception:
-                continue
-    return sheets
+def __to_sheets(spreadsheet: Spreadsheet, sheets: list[dict]) -> list[Sheet]:
+    '''
+    return: the tabs named after a local of the query, other tabs are ignored
+    '''
+    result = []
+    for sheet in sheets:
+        properties = sheet.get("properties", {})
+        try:
+            result.append(Sheet(properties.get("sheetId"), properties.get("title"), spreadsheet.get_geohash(properties.get("title"))))
+        except Exception:
+            continue
+    return result
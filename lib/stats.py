@@ -0,0 +1,11 @@
+def rank(count: int, p: float) -> tuple[int, float]:
+    '''
+    Args:
+        count amount of sorted values
+        p between 0 and 1
+    return: index of the value below percentile p and how far the percentile is towards the next one,
+    the linear interpolation between the two closest ranks of numpy.percentile
+    '''
+    position = (count - 1) * p
+    lower = int(position)
+    return lower, position - lower
@@ -0,0 +1,108 @@
+import threading
+import time
+from constraints import (BREAKER_RESET, BREAKER_THRESHOLD, RATE_LIMIT, RATE_LIMIT_CONCURRENCY,
+                         RATE_LIMIT_LATENCY, RATE_LIMIT_MAX, RATE_LIMIT_MIN)
+from error.CircuitOpen import CircuitOpen
+
+class AdaptiveLimiter:
+    '''
+    Token bucket shared by every upstream call. Both the refill rate and the
+    amount of concurrent calls follow AIMD: they grow additively while calls
+    succeed under the target latency and are halved on 429/5xx or timeouts.
+    '''
+    def __init__(self, rate: float = RATE_LIMIT, min_rate: float = RATE_LIMIT_MIN, max_rate: float = RATE_LIMIT_MAX,
+                 concurrency: int = RATE_LIMIT_CONCURRENCY, target_latency: float = RATE_LIMIT_LATENCY) -> None:
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = concurrency
+        self.concurrency = float(concurrency)
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.decreased_at = 0.0
+        self.__condition = threading.Condition()
+
+    def acquire(self):
+        with self.__condition:
+            while True:
+                self.__refill()
+                if self.tokens >= 1 and self.in_flight < int(self.concurrency):
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                wait = (1 - self.tokens) / self.rate if self.tokens < 1 else None
+                self.__condition.wait(timeout=wait)
+
+    def release(self, latency: float, throttled: bool):
+        with self.__condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # failures of the same burst only back off once
+                if now - self.decreased_at >= self.target_latency:
+                    self.decreased_at = now
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.concurrency = max(1.0, self.concurrency / 2)
+            elif latency <= self.target_latency:
+                self.rate = min(self.max_rate, self.rate + 1)
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1 / self.concurrency)
+            self.__condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.__condition:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+            }
+
+    def __refill(self):
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+class CircuitBreaker:
+    '''
+    Opens after `threshold` consecutive failures so calls fail fast with
+    CircuitOpen. After `reset` seconds a single trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    '''
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset: float = BREAKER_RESET) -> None:
+        self.threshold = threshold
+        self.reset = reset
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.__trial = False
+        self.__lock = threading.Lock()
+
+    def before(self):
+        with self.__lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset:
+                self.state = self.HALF_OPEN
+                self.__trial = False
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self.__trial):
+                raise CircuitOpen(f"Circuit is {self.state}, upstream calls are failing fast")
+            if self.state == self.HALF_OPEN:
+                self.__trial = True
+
+    def record(self, ok: bool):
+        with self.__lock:
+            if ok:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self.__lock:
+            return {"state": self.state, "failures": self.failures}
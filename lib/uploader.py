@@ -0,0 +1,203 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+from googleapiclient.errors import HttpError
+from context import google_credentials_context
+from lib.client import RETRY_STATUS
+from lib.pipeline import StageTimer
+from models import Sheet
+from constraints import HTTP_BACKOFF, PIPELINE_QUEUE_SIZE, UPLOAD_CHUNK_CELLS, UPLOAD_CONCURRENCY, UPLOAD_RETRIES
+
+@dataclass(slots=True)
+class UploadResult:
+    sheet: Sheet
+    rows: int
+    chunks: int
+    uploaded: int
+    uploaded_rows: int = 0 # rows of the uploaded chunks, the first ones of the sheet
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class SheetStream:
+    '''
+    Rows of a sheet still being produced, handed in batches to the thread uploading them.
+    write blocks once maxsize batches are waiting to be uploaded
+    '''
+    def __init__(self, maxsize: int = PIPELINE_QUEUE_SIZE) -> None:
+        self.__batches: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def write(self, rows: list):
+        self.__batches.put(rows)
+
+    def close(self):
+        self.__batches.put(None)
+
+    def __iter__(self) -> Iterator[list]:
+        while (rows := self.__batches.get()) is not None:
+            yield rows
+
+class SheetUploader:
+    '''
+    Writes rows to the sheets of a spreadsheet in chunks of about chunk_cells cells.
+    Up to concurrency sheets are uploaded at the same time, the chunks of each sheet are
+    sent in order so the rows keep their order. A failed chunk is retried on its own, with
+    exponential backoff, the chunks already sent are never sent again. The rows of a sheet are
+    submitted whole or streamed, through open, while they are produced.
+    '''
+    def __init__(self, spreadsheet_id: str, chunk_cells: int = UPLOAD_CHUNK_CELLS, concurrency: int = UPLOAD_CONCURRENCY,
+                 retries: int = UPLOAD_RETRIES, backoff: float = HTTP_BACKOFF, timer: StageTimer | None = None,
+                 encoding: str = "cells", send: Callable[[Sheet, list], None] | None = None) -> None:
+        '''
+        Args:
+            encoding of the rows, "cells" rows are sent with appendCells, "values" rows with spreadsheets.values.append
+            and "ranges", spreadsheets.values.batchUpdate data entries, with spreadsheets.values.batchUpdate
+            send uploads one chunk of rows to a sheet, replaces the Sheets API call picked by encoding
+        '''
+        self.spreadsheet_id = spreadsheet_id
+        self.chunk_cells = chunk_cells
+        self.retries = retries
+        self.backoff = backoff
+        self.timer = timer or StageTimer()
+        self.send = send or {"cells": self.__append_cells, "values": self.__append_values, "ranges": self.__update_ranges}[encoding]
+        self.__executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upload")
+        self.__futures: list[Future] = []
+        self.__lock = threading.Lock()
+
+    def submit(self, sheet: Sheet, rows: list) -> Future:
+        '''
+        Queues the rows of a sheet and returns right away
+        return: future of the UploadResult of the sheet
+        '''
+        return self.__submit(sheet, [rows])
+
+    def open(self, sheet: Sheet) -> SheetStream:
+        '''
+        Queues the upload of a sheet whose rows are written to the returned stream, in order, while
+        they are produced. Each chunk is sent once it is full, the stream must be closed after the last rows
+        '''
+        stream = SheetStream()
+        self.__submit(sheet, stream)
+        return stream
+
+    def __submit(self, sheet: Sheet, batches: Iterable[list]) -> Future:
+        future = self.__executor.submit(self.__upload, sheet, batches)
+        with self.__lock:
+            self.__futures.append(future)
+        return future
+
+    def results(self) -> list[UploadResult]:
+        '''
+        Waits for every submitted sheet
+        return: the result of each sheet, in submission order
+        '''
+        self.__executor.shutdown(wait=True)
+        return [future.result() for future in self.__futures]
+
+    def chunks(self, rows: list) -> list[list]:
+        '''
+        return: rows split in consecutive chunks of at most chunk_cells cells, a row larger than that gets a chunk of its own
+        '''
+        return list(self.__chunks([rows]))
+
+    def __chunks(self, batches: Iterable[list]) -> Iterator[list]:
+        '''
+        yields each chunk of the rows of batches as soon as it is full
+        '''
+        chunk, cells = [], 0
+        for rows in batches:
+            for row in rows:
+                size = self.__cells(row)
+                if chunk and cells + size > self.chunk_cells:
+                    yield chunk
+                    chunk, cells = [], 0
+                chunk.append(row)
+                cells += size
+        if chunk:
+            yield chunk
+
+    def __cells(self, row) -> int:
+        if isinstance(row, list):
+            return len(row)
+        if "range" in row:
+            return sum(len(values) for values in row["values"])
+        return len(row["values"])
+
+    def __upload(self, sheet: Sheet, batches: Iterable[list]) -> UploadResult:
+        result = UploadResult(sheet=sheet, rows=0, chunks=0, uploaded=0)
+        for chunk in self.__chunks(batches):
+            result.rows += len(chunk)
+            result.chunks += 1
+            if result.error is not None: # the next chunks would be appended out of order, they are only counted
+                continue
+            try:
+                self.__send(sheet, chunk)
+            except Exception as error:
+                result.error = error
+                continue
+            result.uploaded += 1
+            result.uploaded_rows += len(chunk)
+        return result
+
+    def __send(self, sheet: Sheet, chunk: list):
+        attempt = 0
+        while True:
+            try:
+                with self.timer.measure("upload"):
+                    self.send(sheet, chunk)
+                return
+            except HttpError as error:
+                if error.resp.status not in RETRY_STATUS or attempt >= self.retries:
+                    raise
+            except (ConnectionError, TimeoutError):
+                if attempt >= self.retries:
+                    raise
+            # full jitter: concurrent sheets hitting the quota don't retry together
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+            attempt += 1
+
+    def __append_cells(self, sheet: Sheet, rows: list[dict]):
+        body = {
+            "requests": [{
+                "appendCells": {
+                    "sheetId": sheet.id,
+                    "rows": rows,
+                    "fields": "userEnteredValue"
+                }
+            }],
+            "includeSpreadsheetInResponse": False,
+            "responseIncludeGridData": False,
+            "responseRanges": [],
+        }
+        with google_credentials_context() as context:
+            (
+                context.service.spreadsheets()
+                .batchUpdate(spreadsheetId=self.spreadsheet_id, body=body)
+                .execute()
+            )
+
+    def __append_values(self, sheet: Sheet, rows: list[list]):
+        title = sheet.title.replace("'", "''")
+        with google_credentials_context() as context:
+            (
+                context.service.spreadsheets()
+                .values()
+                .append(spreadsheetId=self.spreadsheet_id, range=f"'{title}'!A1", valueInputOption="USER_ENTERED",
+                        insertDataOption="INSERT_ROWS", body={"values": rows})
+                .execute()
+            )
+
+    def __update_ranges(self, sheet: Sheet, data: list[dict]):
+        with google_credentials_context() as context:
+            (
+                context.service.spreadsheets()
+                .values()
+                .batchUpdate(spreadsheetId=self.spreadsheet_id, body={"valueInputOption": "USER_ENTERED", "data": data})
+                .execute()
+            )
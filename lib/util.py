@@ -39,6 +39,9 @@ def option_prompt(options: list, message: str, invalid_message: str = "Inalid Nu
         number = int(typer.prompt(invalid_message))
     return number
 
+def placeholders(values: list) -> str:
+    return ", ".join("?" for _ in values)
+
 def to_date(date: str | None):
     pattern = r"^(0[1-9]|[12][0-9]|3[01])-(0[1-9]|1[0-2])-\d{4}$"
     if date is None or re.match(pattern, date) is None:
@@ -1,28 +1,33 @@
 from rich.console import Console
-from context import database_context
-from database.category_repository import CategoryRepository
-from database.local_repository import LocalRepository
+from typing import Annotated
+from database.cached_repository import CachedCategoryRepository, CachedLocalRepository
+from database.migrations import migrate
 from database.query_repository import QueryRepository
 from database.spreadsheet_repository import SpreadsheetRepository
 import typer
-from commands import query, spreadsheet
+from lib.client import client
+from commands import products, query, spreadsheet
 
-local_repo = LocalRepository()
-category_repo = CategoryRepository()
+local_repo = CachedLocalRepository()
+category_repo = CachedCategoryRepository()
 query_repo = QueryRepository()
 spreadsheet_repo = SpreadsheetRepository()
 
 app = typer.Typer()
 app.add_typer(query.app, name="query")
 app.add_typer(spreadsheet.app, name="spreadsheet")
+app.add_typer(products.app, name="products")
 console = Console()
 
+@app.callback()
+def main(no_cache: Annotated[bool, typer.Option("--no-cache", help="Do not read or write the response cache")] = False,
+         refresh: Annotated[bool, typer.Option("--refresh", help="Ignore cached responses and store fresh ones")] = False):
+    if client.cache:
+        client.cache.enabled = not no_cache
+        client.cache.refresh = refresh
+
 def init_db():
-    with open('schema.sql', 'r') as file:
-        script = file.read()
-        with database_context() as connection:
-            cursor = connection.cursor()
-            cursor.executescript(script)
+    migrate()
 
 if __name__ == "__main__":
     init_db()
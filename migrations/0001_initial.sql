@@ -0,0 +1,88 @@
+CREATE TABLE IF NOT EXISTS local (
+    id INTEGER PRIMARY KEY,
+    geohash TEXT UNIQUE,
+    name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS category (
+    id INTEGER PRIMARY KEY,
+    nota_id TEXT UNIQUE, 
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS query (
+    id INTEGER PRIMARY KEY,
+    term TEXT,
+    radius REAL,
+    category_id INTEGER,
+    FOREIGN KEY (category_id) REFERENCES category(id)
+);
+
+CREATE TABLE IF NOT EXISTS query_local (
+    query_id INTEGER,
+    local_id INTEGER,
+    FOREIGN KEY (query_id) REFERENCES query(id),
+    FOREIGN KEY (local_id) REFERENCES local(id),
+    PRIMARY KEY (query_id, local_id)
+);
+
+CREATE TABLE IF NOT EXISTS spreadsheet (
+    id INTEGER PRIMARY KEY,
+    google_id TEXT UNIQUE,
+    query_id INTEGER,
+    is_populated INTEGER,
+    last_populated TEXT,
+    FOREIGN KEY (query_id) REFERENCES query(id)
+);
+
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    body BLOB,
+    created_at REAL,
+    accessed_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS watermark (
+    query_id INTEGER,
+    local_id INTEGER,
+    emission_date TEXT,
+    product_id TEXT,
+    FOREIGN KEY (query_id) REFERENCES query(id),
+    FOREIGN KEY (local_id) REFERENCES local(id),
+    PRIMARY KEY (query_id, local_id)
+);
+
+CREATE TABLE IF NOT EXISTS store (
+    id TEXT PRIMARY KEY,
+    enterprise_name TEXT,
+    tipo TEXT,
+    street_name TEXT,
+    number TEXT,
+    complement TEXT,
+    bairro TEXT,
+    city TEXT,
+    uf TEXT
+);
+
+CREATE TABLE IF NOT EXISTS product (
+    id TEXT PRIMARY KEY,
+    query_id INTEGER,
+    local_id INTEGER,
+    store_id TEXT,
+    emission_date TEXT,
+    description TEXT,
+    distkm REAL,
+    gtin TEXT,
+    ncm TEXT,
+    nrdoc TEXT,
+    tempo TEXT,
+    value REAL,
+    discount_value REAL,
+    FOREIGN KEY (query_id) REFERENCES query(id),
+    FOREIGN KEY (local_id) REFERENCES local(id),
+    FOREIGN KEY (store_id) REFERENCES store(id)
+);
+
+CREATE INDEX IF NOT EXISTS product_gtin_emission_date_idx ON product (gtin, emission_date);
+CREATE INDEX IF NOT EXISTS product_store_id_idx ON product (store_id);
+CREATE INDEX IF NOT EXISTS product_query_id_local_id_idx ON product (query_id, local_id);
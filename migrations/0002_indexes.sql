@@ -0,0 +1,13 @@
+CREATE INDEX IF NOT EXISTS local_name_nocase_idx ON local (name COLLATE NOCASE);
+
+CREATE INDEX IF NOT EXISTS query_category_id_idx ON query (category_id);
+
+CREATE INDEX IF NOT EXISTS query_local_local_id_idx ON query_local (local_id);
+
+CREATE INDEX IF NOT EXISTS spreadsheet_query_id_idx ON spreadsheet (query_id);
+
+CREATE INDEX IF NOT EXISTS watermark_local_id_idx ON watermark (local_id);
+
+CREATE INDEX IF NOT EXISTS product_local_id_idx ON product (local_id);
+
+CREATE INDEX IF NOT EXISTS http_cache_accessed_at_idx ON http_cache (accessed_at);
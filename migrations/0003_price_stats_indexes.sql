@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS product_query_id_local_id_idx;
+CREATE INDEX IF NOT EXISTS product_query_id_local_id_value_idx ON product (query_id, local_id, value);
+CREATE INDEX IF NOT EXISTS product_query_id_gtin_store_id_value_idx ON product (query_id, gtin, store_id, value);
@@ -0,0 +1,24 @@
+-- Full-text index over the product descriptions, reading the text from the product table itself.
+-- Rows are matched through the product rowid, kept in sync by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+    description,
+    content = 'product',
+    content_rowid = 'rowid',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN
+    INSERT INTO product_fts (rowid, description) VALUES (new.rowid, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN
+    INSERT INTO product_fts (product_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF description ON product BEGIN
+    INSERT INTO product_fts (product_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+    INSERT INTO product_fts (rowid, description) VALUES (new.rowid, new.description);
+END;
+
+-- indexes the products stored before this migration
+INSERT INTO product_fts (product_fts) VALUES ('rebuild');
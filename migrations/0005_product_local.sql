@@ -0,0 +1,15 @@
+-- Distance of a product to every local it was found for. Products found for several locals
+-- are stored once in product, under the first local they were found for
+CREATE TABLE IF NOT EXISTS product_local (
+    product_id TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    distkm REAL,
+    PRIMARY KEY (product_id, local_id),
+    FOREIGN KEY (product_id) REFERENCES product(id) ON DELETE CASCADE,
+    FOREIGN KEY (local_id) REFERENCES local(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS product_local_local_id_idx ON product_local (local_id);
+
+INSERT OR IGNORE INTO product_local (product_id, local_id, distkm)
+SELECT id, local_id, distkm FROM product WHERE local_id IS NOT NULL;
@@ -0,0 +1,13 @@
+-- Tabs of each spreadsheet, as returned by Google when they were created, so populate
+-- does not have to read them back. id is the sheetId given by Google
+CREATE TABLE IF NOT EXISTS sheet (
+    spreadsheet_id INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    local_id INTEGER NOT NULL,
+    PRIMARY KEY (spreadsheet_id, id),
+    FOREIGN KEY (spreadsheet_id) REFERENCES spreadsheet(id) ON DELETE CASCADE,
+    FOREIGN KEY (local_id) REFERENCES local(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS sheet_local_id_idx ON sheet (local_id);
@@ -0,0 +1,11 @@
+-- Row written for each product by populate --sync, with a hash of the values written
+-- so the next sync only sends the rows that changed. row is 0 based, 0 being the header
+CREATE TABLE IF NOT EXISTS sheet_row (
+    spreadsheet_id INTEGER NOT NULL,
+    sheet_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_id, product_id),
+    FOREIGN KEY (spreadsheet_id, sheet_id) REFERENCES sheet(spreadsheet_id, id) ON DELETE CASCADE
+);
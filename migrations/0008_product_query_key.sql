@@ -0,0 +1,82 @@
+-- Products are stored once per query, keyed by (query_id, id), so a product found by several
+-- queries belongs to each of them. Before this migration a product was only stored for the
+-- first query that found it, those links can't be recovered and come back on the next populate.
+-- The table is rebuilt keeping the rowids, which product_fts is keyed by.
+CREATE TABLE product_new (
+    id TEXT NOT NULL,
+    query_id INTEGER NOT NULL,
+    local_id INTEGER,
+    store_id TEXT,
+    emission_date TEXT,
+    description TEXT,
+    distkm REAL,
+    gtin TEXT,
+    ncm TEXT,
+    nrdoc TEXT,
+    tempo TEXT,
+    value REAL,
+    discount_value REAL,
+    PRIMARY KEY (query_id, id),
+    FOREIGN KEY (query_id) REFERENCES query(id),
+    FOREIGN KEY (local_id) REFERENCES local(id),
+    FOREIGN KEY (store_id) REFERENCES store(id)
+);
+
+INSERT INTO product_new (rowid, id, query_id, local_id, store_id, emission_date, description, distkm, gtin, ncm, nrdoc, tempo, value, discount_value)
+SELECT rowid, id, query_id, local_id, store_id, emission_date, description, distkm, gtin, ncm, nrdoc, tempo, value, discount_value
+FROM product
+WHERE query_id IS NOT NULL;
+
+-- Distance of a product found by a query to every local it was found for
+CREATE TABLE product_local_new (
+    query_id INTEGER NOT NULL,
+    local_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    distkm REAL,
+    PRIMARY KEY (query_id, local_id, product_id),
+    FOREIGN KEY (query_id, product_id) REFERENCES product_new(query_id, id) ON DELETE CASCADE,
+    FOREIGN KEY (local_id) REFERENCES local(id) ON DELETE CASCADE
+);
+
+INSERT INTO product_local_new (query_id, local_id, product_id, distkm)
+SELECT p.query_id, pl.local_id, pl.product_id, pl.distkm
+FROM product_local AS pl
+JOIN product_new AS p ON p.id = pl.product_id;
+
+INSERT OR IGNORE INTO product_local_new (query_id, local_id, product_id, distkm)
+SELECT query_id, local_id, id, distkm FROM product_new WHERE local_id IS NOT NULL;
+
+-- the triggers would remove every product from product_fts while the old table is dropped
+DROP TRIGGER product_fts_insert;
+DROP TRIGGER product_fts_delete;
+DROP TRIGGER product_fts_update;
+DROP TABLE product_local;
+DROP TABLE product;
+-- references to product_new are renamed along with it
+ALTER TABLE product_new RENAME TO product;
+ALTER TABLE product_local_new RENAME TO product_local;
+
+CREATE INDEX product_gtin_emission_date_idx ON product (gtin, emission_date);
+CREATE INDEX product_store_id_idx ON product (store_id);
+CREATE INDEX product_local_id_idx ON product (local_id);
+CREATE INDEX product_id_idx ON product (id);
+CREATE INDEX product_query_id_local_id_value_idx ON product (query_id, local_id, value);
+CREATE INDEX product_query_id_gtin_store_id_value_idx ON product (query_id, gtin, store_id, value);
+CREATE INDEX product_local_query_id_product_id_idx ON product_local (query_id, product_id);
+CREATE INDEX product_local_local_id_idx ON product_local (local_id);
+
+CREATE TRIGGER product_fts_insert AFTER INSERT ON product BEGIN
+    INSERT INTO product_fts (rowid, description) VALUES (new.rowid, new.description);
+END;
+
+CREATE TRIGGER product_fts_delete AFTER DELETE ON product BEGIN
+    INSERT INTO product_fts (product_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+END;
+
+CREATE TRIGGER product_fts_update AFTER UPDATE OF description ON product BEGIN
+    INSERT INTO product_fts (product_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+    INSERT INTO product_fts (rowid, description) VALUES (new.rowid, new.description);
+END;
+
+-- products without a query were left out of the new table
+INSERT INTO product_fts (product_fts) VALUES ('rebuild');
@@ -0,0 +1,9 @@
+-- Price of the product copied next to each local it was found for, so the prices of a
+-- local are read from a single index instead of joining every row back to product
+ALTER TABLE product_local ADD COLUMN value REAL;
+
+UPDATE product_local
+SET value = (SELECT p.value FROM product AS p WHERE p.query_id = product_local.query_id AND p.id = product_local.product_id);
+
+DROP INDEX IF EXISTS product_query_id_local_id_value_idx;
+CREATE INDEX IF NOT EXISTS product_local_query_id_local_id_value_idx ON product_local (query_id, local_id, value);
@@ -0,0 +1,89 @@
+-- Amount and sum of the prices of each query by gtin and store, and by local, kept up to date by the
+-- triggers below. price_stats and store_spread count and average the prices from these instead of
+-- reading every price, only the rows with every grouped column set are counted
+CREATE TABLE IF NOT EXISTS gtin_store_price (
+    query_id INTEGER NOT NULL,
+    gtin TEXT NOT NULL,
+    store_id TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (query_id, gtin, store_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS gtin_store_price_query_id_store_id_idx ON gtin_store_price (query_id, store_id, count, total);
+
+CREATE TABLE IF NOT EXISTS local_price (
+    query_id INTEGER NOT NULL,
+    local_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (query_id, local_id)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS gtin_store_price_insert AFTER INSERT ON product
+WHEN new.gtin IS NOT NULL AND new.store_id IS NOT NULL AND new.value IS NOT NULL BEGIN
+    INSERT INTO gtin_store_price (query_id, gtin, store_id, count, total) VALUES (new.query_id, new.gtin, new.store_id, 1, new.value)
+    ON CONFLICT(query_id, gtin, store_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS gtin_store_price_delete AFTER DELETE ON product
+WHEN old.gtin IS NOT NULL AND old.store_id IS NOT NULL AND old.value IS NOT NULL BEGIN
+    UPDATE gtin_store_price SET count = count - 1, total = total - old.value
+    WHERE query_id = old.query_id AND gtin = old.gtin AND store_id = old.store_id;
+    DELETE FROM gtin_store_price WHERE query_id = old.query_id AND gtin = old.gtin AND store_id = old.store_id AND count = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS gtin_store_price_update AFTER UPDATE OF query_id, gtin, store_id, value ON product BEGIN
+    UPDATE gtin_store_price SET count = count - 1, total = total - old.value
+    WHERE query_id = old.query_id AND gtin = old.gtin AND store_id = old.store_id AND old.value IS NOT NULL;
+    DELETE FROM gtin_store_price WHERE query_id = old.query_id AND gtin = old.gtin AND store_id = old.store_id AND count = 0;
+    INSERT INTO gtin_store_price (query_id, gtin, store_id, count, total)
+    SELECT new.query_id, new.gtin, new.store_id, 1, new.value
+    WHERE new.gtin IS NOT NULL AND new.store_id IS NOT NULL AND new.value IS NOT NULL
+    ON CONFLICT(query_id, gtin, store_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS local_price_insert AFTER INSERT ON product_local
+WHEN new.value IS NOT NULL BEGIN
+    INSERT INTO local_price (query_id, local_id, count, total) VALUES (new.query_id, new.local_id, 1, new.value)
+    ON CONFLICT(query_id, local_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+END;
+
+CREATE TRIGGER IF NOT EXISTS local_price_delete AFTER DELETE ON product_local
+WHEN old.value IS NOT NULL BEGIN
+    UPDATE local_price SET count = count - 1, total = total - old.value
+    WHERE query_id = old.query_id AND local_id = old.local_id;
+    DELETE FROM local_price WHERE query_id = old.query_id AND local_id = old.local_id AND count = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS local_price_update AFTER UPDATE OF query_id, local_id, value ON product_local BEGIN
+    UPDATE local_price SET count = count - 1, total = total - old.value
+    WHERE query_id = old.query_id AND local_id = old.local_id AND old.value IS NOT NULL;
+    DELETE FROM local_price WHERE query_id = old.query_id AND local_id = old.local_id AND count = 0;
+    INSERT INTO local_price (query_id, local_id, count, total)
+    SELECT new.query_id, new.local_id, 1, new.value
+    WHERE new.value IS NOT NULL
+    ON CONFLICT(query_id, local_id) DO UPDATE SET count = count + 1, total = total + excluded.total;
+END;
+
+DELETE FROM gtin_store_price;
+INSERT INTO gtin_store_price (query_id, gtin, store_id, count, total)
+SELECT query_id, gtin, store_id, COUNT(*), SUM(value)
+FROM product
+WHERE gtin IS NOT NULL AND store_id IS NOT NULL AND value IS NOT NULL
+GROUP BY query_id, gtin, store_id;
+
+DELETE FROM local_price;
+INSERT INTO local_price (query_id, local_id, count, total)
+SELECT query_id, local_id, COUNT(*), SUM(value)
+FROM product_local
+WHERE value IS NOT NULL
+GROUP BY query_id, local_id;
+
+-- Prices of each gtin and of each store sorted by value, the percentiles skip straight to their rank
+-- in them. The other grouped column is kept in the index so the prices are counted as in the totals
+-- without reading the table
+CREATE INDEX IF NOT EXISTS product_query_id_gtin_value_idx ON product (query_id, gtin, value, store_id);
+CREATE INDEX IF NOT EXISTS product_query_id_store_id_value_idx ON product (query_id, store_id, value, gtin);
+-- the spread is read from gtin_store_price
+DROP INDEX IF EXISTS product_query_id_gtin_store_id_value_idx;
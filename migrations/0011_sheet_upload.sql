@@ -0,0 +1,10 @@
+-- Products already appended to a sheet by a populate whose upload stopped before the end of the
+-- sheet. The sheet keeps its previous watermark, so the next incremental populate fetches these
+-- products again and only appends the ones missing. Cleared once a populate uploads the sheet whole
+CREATE TABLE IF NOT EXISTS sheet_upload (
+    spreadsheet_id INTEGER NOT NULL,
+    sheet_id INTEGER NOT NULL,
+    product_id TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, sheet_id, product_id),
+    FOREIGN KEY (spreadsheet_id, sheet_id) REFERENCES sheet(spreadsheet_id, id) ON DELETE CASCADE
+) WITHOUT ROWID;
@@ -0,0 +1,23 @@
+-- Watermarks are kept per spreadsheet, several spreadsheets can be populated for one query and
+-- each of them has its own header and its own newest product appended.
+-- The watermarks of a query are copied to the spreadsheets of the query already populated. The
+-- watermark table is left empty, not dropped, as the earlier migrations still index it
+CREATE TABLE IF NOT EXISTS spreadsheet_watermark (
+    spreadsheet_id INTEGER NOT NULL,
+    local_id INTEGER NOT NULL,
+    emission_date TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    PRIMARY KEY (spreadsheet_id, local_id),
+    FOREIGN KEY (spreadsheet_id) REFERENCES spreadsheet(id) ON DELETE CASCADE,
+    FOREIGN KEY (local_id) REFERENCES local(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS spreadsheet_watermark_local_id_idx ON spreadsheet_watermark (local_id);
+
+INSERT OR IGNORE INTO spreadsheet_watermark (spreadsheet_id, local_id, emission_date, product_id)
+SELECT s.id, w.local_id, w.emission_date, w.product_id
+FROM watermark AS w
+JOIN spreadsheet AS s ON s.query_id = w.query_id
+WHERE s.last_populated IS NOT NULL AND w.emission_date IS NOT NULL AND w.product_id IS NOT NULL;
+
+DELETE FROM watermark;
@@ -6,7 +6,7 @@ from rich.table import Table
 
 from error.RegionNotFound import RegionNotFound
 
-@dataclass
+@dataclass(slots=True)
 class Store: 
     id: str 
     bairro: str 
@@ -18,24 +18,41 @@ class Store:
     complement: str 
     street_name: str 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Category:
     id: Optional[int]
     nota_id: str
     description: str
-    def __eq__(self, value) -> bool:
-        return self.id == value.id and \
-            self.description.upper() == value.description.upper()
 
-@dataclass
+    def key(self) -> tuple[str, str]:
+        return (self.nota_id, self.description.casefold())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Category):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+@dataclass(slots=True, eq=False)
 class Local:
     id: Optional[int]
     geohash: str
     name: str
+
+    def key(self) -> tuple[str, str]:
+        return (self.geohash, self.name.casefold())
+
     def __eq__(self, other) -> bool:
-        return self.geohash == other.geohash and self.name.upper() == other.name.upper()
+        if not isinstance(other, Local):
+            return NotImplemented
+        return self.key() == other.key()
 
-@dataclass
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+@dataclass(slots=True)
 class Query:
     id: Optional[int]
     term: str
@@ -43,7 +60,7 @@ class Query:
     category: Optional[Category]
     radius: float = 10
 
-@dataclass
+@dataclass(slots=True)
 class Product:
     id: str  
     emission_date: Date  
@@ -59,13 +76,49 @@ class Product:
     value: float  
     discount_value: float  
 
-@dataclass
+    def key(self) -> str:
+        '''
+        return: the id given by the portal or, for products without one, the item of the receipt it came from
+        '''
+        return self.id or f"{self.gtin}:{self.store_id}:{self.nrdoc}"
+
+@dataclass(slots=True)
+class PriceStats:
+    key: str
+    label: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    p10: float
+    p90: float
+
+@dataclass(slots=True)
+class StoreSpread:
+    gtin: str
+    description: str
+    stores: int
+    cheapest_store: str
+    cheapest_price: float
+    priciest_store: str
+    priciest_price: float
+    spread: float
+
+@dataclass(slots=True)
+class Watermark:
+    spreadsheet_id: int
+    local_id: int
+    emission_date: str
+    product_id: str
+
+@dataclass(slots=True)
 class Sheet:
     id: str
     title: str
     local: Local
 
-@dataclass
+@dataclass(slots=True)
 class Spreadsheet:
     google_id: str
     query: Optional[Query]
@@ -0,0 +1,88 @@
+import unittest
+from context import connections, database_context
+from database.cached_repository import CachedCategoryRepository, CachedLocalRepository, IdentityMap, category_map, local_map
+from database.migrations import migrate
+from models import Category, Local
+
+class TestCachedRepository(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        self.local_repo = CachedLocalRepository()
+        self.category_repo = CachedCategoryRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+
+    def tearDown(self):
+        connections.connection().set_trace_callback(None)
+        local_map.clear()
+        category_map.clear()
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def statements(self, action) -> list[str]:
+        statements = []
+        connections.connection().set_trace_callback(statements.append)
+        action()
+        connections.connection().set_trace_callback(None)
+        return [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+
+    def test_reads_served_from_memory(self):
+        self.local_repo.find_all()
+        self.category_repo.find_all()
+
+        def reads():
+            self.assertEqual(self.local_repo.find_by_id(2).geohash, 'ezs43')
+            self.assertEqual(self.local_repo.find_by_geohash('ezs44').id, 3)
+            self.assertEqual(self.local_repo.find_by_name('LOCAL a').id, 1)
+            self.assertEqual(len(self.local_repo.find_by_names(['local a', 'local b'])), 2)
+            self.assertEqual(self.category_repo.find_by_nota_id('57').id, 2)
+            self.assertEqual(self.category_repo.find_by_id(1).description, 'Bebidas')
+
+        self.assertEqual(self.statements(reads), [])
+
+    def test_identity(self):
+        self.assertIs(self.local_repo.find_by_id(1), self.local_repo.find_by_geohash('ezs42'))
+
+    def test_save_and_delete_update_the_map(self):
+        local = self.local_repo.save(Local(id=None, geohash='ezs45', name='Local D'))
+        self.assertIs(self.local_repo.find_by_name('local d'), local)
+
+        local.name = 'Local E'
+        self.local_repo.save(local)
+        self.assertIsNone(self.local_repo.find_by_name('local d'))
+        self.assertIs(self.local_repo.find_by_name('local e'), local)
+
+        self.local_repo.delete_by_id(local.id or 0)
+        self.assertIsNone(self.local_repo.find_by_geohash('ezs45'))
+
+        category = self.category_repo.save_many([Category(id=None, nota_id='60', description='Outros')])[0]
+        self.assertIs(self.category_repo.find_by_nota_id('60'), category)
+        self.category_repo.delete_by_id(category.id or 0)
+        self.assertIsNone(self.category_repo.find_by_id(category.id or 0))
+
+    def test_find_by_query_ids(self):
+        locals = self.local_repo.find_by_query_ids([1, 2])
+
+        self.assertEqual([local.id for local in locals[1]], [1, 2])
+        self.assertEqual([local.id for local in locals[2]], [3])
+
+    def test_ttl(self):
+        identity_map = IdentityMap({"id": lambda local: local.id}, ttl=-1)
+        identity_map.load([Local(id=1, geohash='a', name='A')])
+
+        self.assertFalse(identity_map.is_loaded())
@@ -1,17 +1,17 @@
 import unittest
 
 from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
 from database.category_repository import CategoryRepository
 from models import Category
 
 class TestCategoryRepository(unittest.TestCase):
     def setUp(self):
+        local_map.clear()
+        category_map.clear()
         self.repo = CategoryRepository()
-        with open('schema.sql', 'r') as file:
-            script = file.read()
-            with database_context() as connection:
-                cursor = connection.cursor()
-                cursor.executescript(script)
+        migrate()
         with open('test_insertions.sql', 'r') as file:
             script = file.read()
             with database_context() as connection:
@@ -21,11 +21,16 @@ class TestCategoryRepository(unittest.TestCase):
     def tearDown(self):
         with database_context() as connection:
             cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
             cursor.execute("DROP TABLE IF EXISTS spreadsheet")
             cursor.execute("DROP TABLE IF EXISTS query_local")
             cursor.execute("DROP TABLE IF EXISTS query")
             cursor.execute("DROP TABLE IF EXISTS local")
             cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
 
     def test_find_by_id(self):
         query = self.repo.find_by_id(1)
@@ -93,3 +98,35 @@ class TestCategoryRepository(unittest.TestCase):
         self.assertEqual(category.description, 'Bebidas')
 
 
+    def test_find_by_nota_ids(self):
+        categories = self.repo.find_by_nota_ids(['55', '57', '99'])
+
+        self.assertEqual(len(categories), 2)
+        self.assertEqual({category.id for category in categories}, {1, 2})
+        self.assertEqual(self.repo.find_by_nota_ids([]), [])
+
+    def test_save_many(self):
+        saved = self.repo.save_many([
+            Category(id=None, nota_id='60', description='Outros'),
+            Category(id=None, nota_id='55', description='Bebidas'),
+        ])
+
+        self.assertEqual(len(saved), 2)
+        self.assertEqual(saved[0].id, 3)
+        self.assertEqual(saved[0].nota_id, '60')
+        self.assertEqual(saved[1].id, 1)
+        self.assertEqual(len(self.repo.find_all()), 3)
+
+    def test_find_by_ids(self):
+        categories = self.repo.find_by_ids([2, 10])
+
+        self.assertEqual([category.id for category in categories], [2])
+
+    def test_delete_by_ids(self):
+        self.repo.delete_by_ids([1, 2])
+
+        self.assertEqual(self.repo.find_all(), [])
+        self.assertIsNone(self.repo.find_by_query_id(1))
+
+    def test_exists_by_ids(self):
+        self.assertEqual(self.repo.exists_by_ids([1, 2, 10]), {1, 2})
@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import Mock
+import requests
+from lib.client import MenorPrecoClient
+from lib.throttle import CircuitBreaker
+
+def response(status: int) -> Mock:
+    res = Mock(status_code=status, headers={})
+    if status >= 400:
+        res.raise_for_status.side_effect = requests.HTTPError(str(status))
+    return res
+
+class TestMenorPrecoClient(unittest.TestCase):
+    def setUp(self):
+        self.client = MenorPrecoClient(base_url="https://host", retries=1, backoff=0,
+                                       breaker=CircuitBreaker(threshold=1, reset=0))
+        self.client.session.get = Mock()
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_retries_server_errors(self):
+        self.client.session.get.side_effect = [response(503), response(200)]
+
+        self.assertEqual(self.client.get("/a").status_code, 200)
+        self.assertEqual(self.client.session.get.call_count, 2)
+        self.assertEqual(self.client.limiter.snapshot()["in_flight"], 0)
+
+    def test_retries_read_errors_then_raises(self):
+        self.client.session.get.side_effect = requests.exceptions.ChunkedEncodingError()
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.client.get("/a")
+        self.assertEqual(self.client.session.get.call_count, 2)
+        self.assertEqual(self.client.limiter.snapshot()["in_flight"], 0)
+
+    def test_other_request_errors_are_released(self):
+        self.client.session.get.side_effect = requests.TooManyRedirects()
+
+        with self.assertRaises(requests.TooManyRedirects):
+            self.client.get("/a")
+        self.assertEqual(self.client.session.get.call_count, 1)
+        self.assertEqual(self.client.limiter.snapshot()["in_flight"], 0)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_failed_trial_does_not_keep_the_circuit_half_open(self):
+        self.client.session.get.side_effect = [requests.TooManyRedirects(), requests.TooManyRedirects(), response(200)]
+
+        for _ in range(2):
+            with self.assertRaises(requests.TooManyRedirects):
+                self.client.get("/a")
+        self.assertEqual(self.client.get("/a").status_code, 200)
+        self.assertEqual(self.client.breaker.state, CircuitBreaker.CLOSED)
@@ -0,0 +1,97 @@
+import gc
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from context import connections, database_context
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("CREATE TABLE IF NOT EXISTS uow_test (value INTEGER)")
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS uow_test")
+
+    def count(self) -> int:
+        with database_context() as connection:
+            return connection.execute("SELECT COUNT(*) FROM uow_test").fetchone()[0]
+
+    def test_reuses_connection(self):
+        with database_context() as first:
+            pass
+        with database_context() as second:
+            pass
+        self.assertIs(first, second)
+
+    def test_pragmas(self):
+        with database_context() as connection:
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            self.assertEqual(connection.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+            self.assertEqual(connection.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(connection.execute("PRAGMA temp_store").fetchone()[0], 2)
+
+    def test_nested_commit(self):
+        with database_context() as connection:
+            connection.execute("INSERT INTO uow_test VALUES (1)")
+            with database_context() as inner:
+                inner.execute("INSERT INTO uow_test VALUES (2)")
+            self.assertTrue(connection.in_transaction)
+        self.assertEqual(self.count(), 2)
+
+    def test_inner_rollback_keeps_outer(self):
+        with database_context() as connection:
+            connection.execute("INSERT INTO uow_test VALUES (1)")
+            with self.assertRaises(ValueError):
+                with database_context() as inner:
+                    inner.execute("INSERT INTO uow_test VALUES (2)")
+                    raise ValueError()
+        self.assertEqual(self.count(), 1)
+
+    def test_outer_rollback_discards_inner(self):
+        with self.assertRaises(ValueError):
+            with database_context() as connection:
+                with database_context() as inner:
+                    inner.execute("INSERT INTO uow_test VALUES (1)")
+                raise ValueError()
+        self.assertEqual(self.count(), 0)
+
+    def test_reads_do_not_wait_for_a_writer(self):
+        locked, done = threading.Event(), threading.Event()
+        def write():
+            with database_context(immediate=True) as connection:
+                connection.execute("INSERT INTO uow_test VALUES (1)")
+                locked.set()
+                done.wait(5)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            writer = executor.submit(write)
+            self.assertTrue(locked.wait(5))
+            try:
+                self.assertEqual(executor.submit(self.count).result(timeout=2), 0)
+            finally:
+                done.set()
+            writer.result()
+        self.assertEqual(self.count(), 1)
+
+    def test_close(self):
+        with database_context() as first:
+            pass
+        connections.close()
+        with database_context() as second:
+            pass
+        self.assertIsNot(first, second)
+
+    def test_closes_the_connection_of_finished_threads(self):
+        def work(value: int):
+            with database_context() as connection:
+                connection.execute("INSERT INTO uow_test VALUES (?)", (value,))
+        for _ in range(10):
+            with ThreadPoolExecutor(4) as executor:
+                list(executor.map(work, range(8)))
+        gc.collect()
+
+        self.assertEqual(self.count(), 80)
+        self.assertLessEqual(len(connections), 1)
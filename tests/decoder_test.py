@@ -0,0 +1,42 @@
+import json
+import unittest
+from lib.decoder import loads, to_products, to_store
+from models import Product, Store
+
+with open('tests/fixtures/produtos_newest.json', 'rb') as file:
+    BODY = file.read()
+
+class TestDecoder(unittest.TestCase):
+    def test_loads(self):
+        self.assertEqual(loads(BODY), json.loads(BODY))
+        self.assertEqual(loads(b'{"total": 0, "produtos": []}'), {"total": 0, "produtos": []})
+
+    def test_to_products(self):
+        page = loads(BODY)["produtos"]
+
+        products = to_products(page)
+
+        self.assertEqual([product.id for product in products], [product["id"] for product in page])
+        self.assertEqual(products[1], Product(id='b', emission_date='2024-11-23T18:00:00.000Z', description='REFRIGERANTE COCA COLA PET 2L',
+                                              distkm=1.15, store_id='1002', store_name='MERCADO B', store_address='RUA XV DE NOVEMBRO, N 11',
+                                              gtin='7894900011517', ncm='22021000', nrdoc='123451', tempo='1 dias', value=9.24,
+                                              discount_value=0.0))
+        self.assertIsInstance(products[0].value, float)
+        self.assertEqual(to_products([]), [])
+
+    def test_to_products_collects_stores(self):
+        known = Store(id='1001', bairro='CENTRO', city='CURITIBA', enterprise_name='MERCADO A', number='10',
+                      tipo='RUA', uf='PR', complement='', street_name='XV DE NOVEMBRO')
+        stores = {'1001': known}
+
+        to_products(loads(BODY)["produtos"], stores)
+
+        self.assertEqual(sorted(stores), ['1001', '1002', '1003'])
+        self.assertIs(stores['1001'], known)
+        self.assertEqual(stores['1003'], Store(id='1003', bairro='', city='CURITIBA', enterprise_name='MERCADO C', number='12',
+                                               tipo='RUA', uf='PR', complement='', street_name='XV DE NOVEMBRO'))
+
+    def test_to_store_optional_fields(self):
+        store = to_store({"codigo": "1", "nm_emp": "MERCADO", "tp_logr": "AV", "nm_logr": "BRASIL", "nr_logr": "5"})
+
+        self.assertEqual((store.bairro, store.city, store.uf, store.complement), ('', '', '', ''))
@@ -0,0 +1,30 @@
+import unittest
+from lib.encoder import product_to_cells, product_to_values, to_values_row
+from models import Product
+
+PRODUCT = Product(id='0001', emission_date='2024-11-22T10:15:00.000Z', description='=REFRI 2L', distkm='1.5', store_id='1001',
+                  store_name='MERCADO A', store_address='RUA XV, N 10', gtin='07894900011517', ncm='22021000', nrdoc='123',
+                  tempo='1 dia', value=9.99, discount_value=0.0)
+
+class TestEncoder(unittest.TestCase):
+    def test_product_to_values(self):
+        row = product_to_values(PRODUCT)
+
+        self.assertEqual(row[:4], ["'0001", '2024-11-22 10:15:00', "'=REFRI 2L", 1.5])
+        self.assertEqual(row[7], "'07894900011517")
+        self.assertEqual(row[-2:], [9.99, 0.0])
+        self.assertEqual(len(row), len(to_values_row(range(13))))
+
+    def test_unparsed_values_stay_text(self):
+        product = Product(**{**{name: getattr(PRODUCT, name) for name in PRODUCT.__slots__}, "emission_date": "ontem", "distkm": None})
+
+        row = product_to_values(product)
+
+        self.assertEqual(row[1], "'ontem")
+        self.assertIsNone(row[3])
+
+    def test_product_to_cells(self):
+        row = product_to_cells(PRODUCT)
+
+        self.assertEqual(len(row["values"]), 13)
+        self.assertEqual(row["values"][11], {"userEnteredValue": {"stringValue": "9.99"}})
@@ -0,0 +1,59 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from google.oauth2.credentials import Credentials
+import context
+from context import GoogleServiceManager
+
+def token(expiry: datetime.datetime) -> str:
+    return json.dumps({"token": "access", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret",
+                       "expiry": expiry.strftime("%Y-%m-%dT%H:%M:%SZ")})
+
+class TestGoogleServiceManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.token = os.path.join(self.directory.name, "token.json")
+        self.patches = [patch.object(context, "TOKEN", self.token), patch.object(context, "GOOGLE_APPLICATION_CREDENTIALS", "credentials.json")]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        self.directory.cleanup()
+
+    def write(self, expires_in: datetime.timedelta):
+        with open(self.token, "w") as file:
+            file.write(token(datetime.datetime.now(datetime.timezone.utc) + expires_in))
+
+    def test_service_is_built_once_per_thread(self):
+        self.write(datetime.timedelta(hours=1))
+        manager = GoogleServiceManager()
+
+        with patch.object(Credentials, "from_authorized_user_file", wraps=Credentials.from_authorized_user_file) as load:
+            service = manager.service()
+            self.assertIs(manager.service(), service)
+            other = []
+            thread = threading.Thread(target=lambda: other.append(manager.service()))
+            thread.start()
+            thread.join()
+
+        self.assertIsNot(other[0], service)
+        self.assertEqual(load.call_count, 1)
+
+    def test_refreshes_only_near_expiry(self):
+        self.write(datetime.timedelta(hours=1))
+        manager = GoogleServiceManager(refresh_margin=60)
+
+        with patch.object(Credentials, "refresh") as refresh:
+            credentials = manager.credentials()
+            manager.credentials()
+            self.assertEqual(refresh.call_count, 0)
+
+            credentials.expiry = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) + datetime.timedelta(seconds=30)
+            manager.credentials()
+            self.assertEqual(refresh.call_count, 1)
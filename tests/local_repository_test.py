@@ -1,16 +1,17 @@
 import unittest
 from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
 from database.local_repository import LocalRepository
-from models import Local
+from database.product_repository import ProductRepository
+from models import Local, Product, Store
 
 class TestLocalRepository(unittest.TestCase):
     def setUp(self):
+        local_map.clear()
+        category_map.clear()
         self.repo = LocalRepository()
-        with open('schema.sql', 'r') as file:
-            script = file.read()
-            with database_context() as connection:
-                cursor = connection.cursor()
-                cursor.executescript(script)
+        migrate()
         with open('test_insertions.sql', 'r') as file:
             script = file.read()
             with database_context() as connection:
@@ -20,11 +21,18 @@ class TestLocalRepository(unittest.TestCase):
     def tearDown(self):
         with database_context() as connection:
             cursor = connection.cursor()
+            for table in ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "watermark"]:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
             cursor.execute("DROP TABLE IF EXISTS spreadsheet")
             cursor.execute("DROP TABLE IF EXISTS query_local")
             cursor.execute("DROP TABLE IF EXISTS query")
             cursor.execute("DROP TABLE IF EXISTS local")
             cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
 
     def test_find_by_id(self):
         local = self.repo.find_by_id(1)
@@ -91,3 +99,60 @@ class TestLocalRepository(unittest.TestCase):
         self.assertEqual(local[1].geohash, 'ezs43')
         self.assertEqual(local[1].name, 'Local B')
 
+
+    def test_find_by_names(self):
+        locals = self.repo.find_by_names(['local a', 'LOCAL C', 'Unknown'])
+
+        self.assertEqual(len(locals), 2)
+        self.assertEqual({local.id for local in locals}, {1, 3})
+        self.assertEqual(self.repo.find_by_names([]), [])
+
+    def test_save_many(self):
+        saved = self.repo.save_many([
+            Local(id=None, geohash='ezs45', name='Local D'),
+            Local(id=None, geohash='ezs42', name='Local A2'),
+        ])
+
+        self.assertEqual(len(saved), 2)
+        self.assertEqual(saved[0].id, 4)
+        self.assertEqual(saved[0].name, 'Local D')
+        self.assertEqual(saved[1].id, 1)
+        self.assertEqual(saved[1].name, 'Local A')
+        self.assertEqual(len(self.repo.find_all()), 4)
+
+    def test_find_by_query_ids(self):
+        locals = self.repo.find_by_query_ids([1, 2, 5])
+
+        self.assertEqual([local.id for local in locals[1]], [1, 2])
+        self.assertEqual([local.id for local in locals[2]], [3])
+        self.assertNotIn(5, locals)
+
+    def test_find_by_ids(self):
+        locals = self.repo.find_by_ids([1, 3, 10])
+
+        self.assertEqual([local.id for local in locals], [1, 3])
+
+    def test_delete_by_ids(self):
+        self.repo.delete_by_ids([1, 3])
+
+        self.assertEqual([local.id for local in self.repo.find_all()], [2])
+        self.assertEqual([local.id for local in self.repo.find_by_query_id(1)], [2])
+
+    def test_delete_by_ids_keeps_products_found_for_other_locals(self):
+        product = Product(id='a', emission_date='2024-11-22T10:00:00', description='REFRIGERANTE 2L', distkm=1.5,
+                          store_id='1001', store_name='MERCADO A', store_address='RUA XV, N 10', gtin='7894900011517',
+                          ncm='22021000', nrdoc='123', tempo='1 dia', value=9.99, discount_value=0.0)
+        store = Store(id='1001', bairro='CENTRO', city='CURITIBA', enterprise_name='MERCADO A', number='10',
+                      tipo='RUA', uf='PR', complement='', street_name='XV')
+        product_repo = ProductRepository()
+        product_repo.save_many([product], [store], query_id=1, local_id=1)
+        product_repo.save_distances([product], query_id=1, local_id=2)
+
+        self.repo.delete_by_ids([1])
+
+        self.assertEqual([product.id for product in product_repo.find_by_query_id(1, local_id=2)], ['a'])
+        self.assertEqual([(stats.key, stats.count) for stats in product_repo.price_stats(1, "local")], [(2, 1)])
+        self.assertEqual([(stats.key, stats.count) for stats in product_repo.price_stats(1, "gtin")], [('7894900011517', 1)])
+
+    def test_exists_by_ids(self):
+        self.assertEqual(self.repo.exists_by_ids([1, 2, 10]), {1, 2})
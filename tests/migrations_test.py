@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+import unittest
+from context import connections, database_context
+from database.migrations import MIGRATIONS_PATH, current_version, migrate, migrations
+
+TABLES = ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "spreadsheet_watermark", "watermark", "http_cache", "sheet_upload", "sheet_row", "sheet", "spreadsheet", "query_local", "query", "local", "category"]
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            for table in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def tearDown(self):
+        connections.connection().set_trace_callback(None)
+        self.setUp()
+
+    def test_migrate(self):
+        version = migrate()
+
+        self.assertEqual(version, migrations()[-1][0])
+        self.assertEqual(current_version(), version)
+        with database_context() as connection:
+            tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue(set(TABLES) <= tables)
+        self.assertIn("local_name_nocase_idx", indexes)
+        self.assertIn("query_local_local_id_idx", indexes)
+
+    def test_migrate_skips_current_schema(self):
+        migrate()
+        statements = []
+        connections.connection().set_trace_callback(statements.append)
+
+        migrate()
+
+        self.assertEqual([statement for statement in statements if not statement.startswith("PRAGMA")], [])
+
+    def test_migrate_applies_only_pending(self):
+        migrate()
+        with database_context() as connection:
+            connection.execute("DROP INDEX local_name_nocase_idx")
+            connection.execute("PRAGMA user_version = 1")
+
+        migrate()
+
+        with database_context() as connection:
+            row = connection.execute("SELECT name FROM sqlite_master WHERE name = 'local_name_nocase_idx'").fetchone()
+        self.assertIsNotNone(row)
+
+    def test_product_query_key_keeps_products(self):
+        with tempfile.TemporaryDirectory() as path:
+            for version, file_path in migrations():
+                if version < 8:
+                    shutil.copy(file_path, path)
+            migrate(path)
+        with database_context() as connection:
+            connection.executescript(open('test_insertions.sql').read())
+            connection.execute("INSERT INTO store (id, enterprise_name) VALUES ('1001', 'MERCADO A')")
+            connection.execute('''
+                INSERT INTO product (id, query_id, local_id, store_id, description, distkm, gtin, value)
+                VALUES ('a', 1, 1, '1001', 'REFRIGERANTE 2L', 1.5, '789', 9.99)
+            ''')
+            connection.execute("INSERT INTO product_local (product_id, local_id, distkm) VALUES ('a', 2, 3.0)")
+
+        migrate(MIGRATIONS_PATH)
+
+        with database_context() as connection:
+            self.assertEqual(connection.execute("SELECT query_id, id, value FROM product").fetchall(), [(1, 'a', 9.99)])
+            self.assertEqual(connection.execute("SELECT query_id, local_id, product_id, distkm, value FROM product_local ORDER BY local_id").fetchall(),
+                             [(1, 1, 'a', 1.5, 9.99), (1, 2, 'a', 3.0, 9.99)])
+            self.assertEqual(connection.execute("SELECT rowid FROM product_fts WHERE product_fts MATCH 'refrigerante'").fetchall(),
+                             connection.execute("SELECT rowid FROM product").fetchall())
+            self.assertEqual(connection.execute("SELECT * FROM gtin_store_price").fetchall(), [(1, '789', '1001', 1, 9.99)])
+            self.assertEqual(connection.execute("SELECT * FROM local_price").fetchall(), [(1, 1, 1, 9.99), (1, 2, 1, 9.99)])
+            self.assertEqual(connection.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+    def test_spreadsheet_watermark_copies_the_query_watermarks(self):
+        with tempfile.TemporaryDirectory() as path:
+            for version, file_path in migrations():
+                if version < 12:
+                    shutil.copy(file_path, path)
+            migrate(path)
+        with database_context() as connection:
+            connection.executescript(open('test_insertions.sql').read())
+            connection.execute("INSERT INTO spreadsheet (id, google_id, query_id, is_populated, last_populated) VALUES (3, 'google-id-789', 1, 1, '23-11-2024')")
+            connection.executemany("INSERT INTO watermark (query_id, local_id, emission_date, product_id) VALUES (?, ?, ?, ?)",
+                                   [(1, 1, '2024-11-22', 'a'), (1, 2, '2024-11-21', 'b'), (2, 3, '2024-11-20', 'c')])
+
+        migrate(MIGRATIONS_PATH)
+
+        with database_context() as connection:
+            # spreadsheet 2 was never populated
+            self.assertEqual(connection.execute("SELECT * FROM spreadsheet_watermark ORDER BY spreadsheet_id, local_id").fetchall(),
+                             [(1, 1, '2024-11-22', 'a'), (1, 2, '2024-11-21', 'b'), (3, 1, '2024-11-22', 'a'), (3, 2, '2024-11-21', 'b')])
+            self.assertEqual(connection.execute("SELECT * FROM watermark").fetchall(), [])
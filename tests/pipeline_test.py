@@ -0,0 +1,65 @@
+import time
+import unittest
+from lib.pipeline import StageTimer, threaded
+
+class TestThreaded(unittest.TestCase):
+    def test_items_in_order(self):
+        self.assertEqual(list(threaded(iter(range(100)), maxsize=2)), list(range(100)))
+        self.assertEqual(list(threaded([None, [], 0], maxsize=1)), [None, [], 0])
+        self.assertEqual(list(threaded([], maxsize=1)), [])
+
+    def test_error_reaches_the_consumer_after_the_items_before_it(self):
+        def source():
+            yield 1
+            yield 2
+            raise ValueError("page failed")
+
+        items = []
+        with self.assertRaisesRegex(ValueError, "page failed"):
+            for item in threaded(source(), maxsize=1):
+                items.append(item)
+        self.assertEqual(items, [1, 2])
+
+    def test_producer_waits_for_the_consumer(self):
+        produced = []
+        def source():
+            for item in range(100):
+                produced.append(item)
+                yield item
+
+        items = threaded(source(), maxsize=2)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.05)
+        # the item handed over, the ones buffered and the one waiting to be buffered
+        self.assertLessEqual(len(produced), 4)
+        items.close()
+
+    def test_producer_stops_when_the_consumer_does(self):
+        produced = []
+        def source():
+            for item in range(100):
+                produced.append(item)
+                yield item
+
+        items = threaded(source(), maxsize=1)
+        next(items)
+        items.close()
+        time.sleep(0.3)
+        stopped = len(produced)
+        time.sleep(0.2)
+
+        self.assertEqual(len(produced), stopped)
+        self.assertLess(stopped, 100)
+
+class TestStageTimer(unittest.TestCase):
+    def test_measure(self):
+        timer = StageTimer()
+        for _ in range(3):
+            with timer.measure("scrape"):
+                pass
+        with self.assertRaises(ValueError):
+            with timer.measure("upload"):
+                raise ValueError()
+
+        self.assertEqual(timer.counts, {"scrape": 3, "upload": 1})
+        self.assertEqual(set(timer.elapsed), {"scrape", "upload"})
@@ -0,0 +1,183 @@
+import unittest
+from context import database_context
+from database.migrations import migrate
+from database.product_repository import ProductRepository
+from models import Product, Store
+
+def product(id: str, store_id: str = '1001', gtin: str = '7894900011517', value: float = 9.99) -> Product:
+    return Product(id=id, emission_date='2024-11-22T10:00:00', description='REFRIGERANTE 2L', distkm=1.5,
+                   store_id=store_id, store_name='MERCADO A', store_address='RUA XV, N 10', gtin=gtin,
+                   ncm='22021000', nrdoc='123', tempo='1 dia', value=value, discount_value=0.0)
+
+def store(id: str = '1001', name: str = 'MERCADO A') -> Store:
+    return Store(id=id, bairro='CENTRO', city='CURITIBA', enterprise_name=name, number='10',
+                 tipo='RUA', uf='PR', complement='', street_name='XV')
+
+class TestProductRepository(unittest.TestCase):
+    def setUp(self):
+        self.repo = ProductRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS product_fts")
+            cursor.execute("DROP TABLE IF EXISTS gtin_store_price")
+            cursor.execute("DROP TABLE IF EXISTS local_price")
+            cursor.execute("DROP TABLE IF EXISTS product_local")
+            cursor.execute("DROP TABLE IF EXISTS product")
+            cursor.execute("DROP TABLE IF EXISTS store")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_save_many(self):
+        inserted = self.repo.save_many([product('a'), product('b')], [store()], query_id=1, local_id=1)
+        self.assertEqual(inserted, 2)
+
+        inserted = self.repo.save_many([product('b'), product('c')], [store()], query_id=1, local_id=2)
+        self.assertEqual(inserted, 1)
+        self.assertEqual(self.repo.count(), 3)
+
+    def test_products_found_by_several_queries(self):
+        self.repo.save_many([product('a', value=2.0), product('b')], [store()], query_id=1, local_id=1)
+        inserted = self.repo.save_many([product('a', value=2.0)], [store()], query_id=2, local_id=3)
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual([p.id for p in self.repo.find_by_query_id(2)], ['a'])
+        self.assertEqual([p.id for p in self.repo.find_by_query_id(2, local_id=3)], ['a'])
+        self.assertEqual([(stats.key, stats.count) for stats in self.repo.price_stats(2, "gtin")], [('7894900011517', 1)])
+        self.assertEqual([p.id for p in self.repo.search('refrigerante', local_id=3)], ['a'])
+        self.assertEqual(sorted(p.id for p in self.repo.search('refrigerante')), ['a', 'b'])
+        self.assertEqual([p.id for p in self.repo.find_by_ids(['a'])], ['a'])
+
+        self.repo.delete_by_query_id(1)
+        self.assertEqual([p.id for p in self.repo.find_by_query_id(2)], ['a'])
+
+    def test_find_by_id(self):
+        self.repo.save_many([product('a')], [store()], query_id=1, local_id=1)
+
+        found = self.repo.find_by_id('a')
+
+        self.assertEqual(found, product('a'))
+        self.assertIsNone(self.repo.find_by_id('z'))
+
+    def test_find_by_query_id(self):
+        self.repo.save_many([product('a'), product('b')], [store()], query_id=1, local_id=1)
+        self.repo.save_many([product('c')], [store()], query_id=1, local_id=2)
+
+        self.assertEqual(len(self.repo.find_by_query_id(1)), 3)
+        self.assertEqual([p.id for p in self.repo.find_by_query_id(1, local_id=2)], ['c'])
+        self.assertEqual(self.repo.find_by_query_id(2), [])
+
+    def test_find_store_by_id(self):
+        self.repo.save_many([product('a')], [store()], query_id=1, local_id=1)
+
+        self.assertEqual(self.repo.find_store_by_id('1001'), store())
+        self.assertIsNone(self.repo.find_store_by_id('9999'))
+
+    def test_delete_by_query_id(self):
+        self.repo.save_many([product('a')], [store()], query_id=1, local_id=1)
+        self.repo.delete_by_query_id(1)
+
+        self.assertEqual(self.repo.count(), 0)
+
+    def test_price_stats(self):
+        prices = [product(str(i), gtin='1', value=float(i)) for i in range(1, 12)]
+        self.repo.save_many(prices + [product('x', gtin='2', value=5.0)], [store()], query_id=1, local_id=1)
+
+        stats = self.repo.price_stats(1, "gtin")
+
+        self.assertEqual([s.key for s in stats], ['1', '2'])
+        self.assertEqual(stats[0].label, 'REFRIGERANTE 2L')
+        self.assertEqual((stats[0].count, stats[0].min, stats[0].max, stats[0].mean), (11, 1.0, 11.0, 6.0))
+        self.assertEqual((stats[0].median, stats[0].p10, stats[0].p90), (6.0, 2.0, 10.0))
+        self.assertEqual((stats[1].count, stats[1].median, stats[1].p10), (1, 5.0, 5.0))
+        self.assertEqual(len(self.repo.price_stats(1, "gtin", limit=1)), 1)
+        self.assertEqual(self.repo.price_stats(2, "gtin"), [])
+
+    def test_price_stats_by_local(self):
+        self.repo.save_many([product('a', value=2.0), product('b', value=3.0)], [store()], query_id=1, local_id=1)
+        self.repo.save_many([product('c', value=4.0)], [store()], query_id=1, local_id=2)
+        self.repo.save_distances([product('a', value=2.0)], query_id=1, local_id=2)
+
+        stats = self.repo.price_stats(1, "local")
+
+        self.assertEqual([(s.key, s.label, s.count, s.median) for s in stats], [(1, 'Local A', 2, 2.5), (2, 'Local B', 2, 3.0)])
+        self.assertRaises(ValueError, self.repo.price_stats, 1, "category")
+
+    def test_price_totals_follow_changes(self):
+        self.repo.save_many([product('a', value=2.0), product('b', store_id='1002', value=4.0)],
+                            [store(), store('1002', 'MERCADO B')], query_id=1, local_id=1)
+        self.repo.save_distances([product('a', value=3.0)], query_id=1, local_id=1)
+
+        self.assertEqual([(s.key, s.count, s.mean) for s in self.repo.price_stats(1, "local")], [(1, 2, 3.5)])
+        self.assertEqual([(s.key, s.count, s.mean) for s in self.repo.price_stats(1, "store")], [('1001', 1, 2.0), ('1002', 1, 4.0)])
+
+        self.repo.delete_by_query_id(1)
+
+        self.assertEqual(self.repo.price_stats(1, "gtin"), [])
+        self.assertEqual(self.repo.price_stats(1, "local"), [])
+        self.assertEqual(self.repo.store_spread(1), [])
+
+    def test_store_spread(self):
+        self.repo.save_many([product('a', store_id='1001', value=4.0), product('b', store_id='1001', value=6.0),
+                             product('c', store_id='1002', value=8.0), product('d', store_id='1003', value=7.0),
+                             product('e', store_id='1003', gtin='2', value=1.0)],
+                            [store('1001', 'MERCADO A'), store('1002', 'MERCADO B'), store('1003', 'MERCADO C')], query_id=1, local_id=1)
+
+        spreads = self.repo.store_spread(1)
+
+        self.assertEqual(len(spreads), 1)
+        self.assertEqual((spreads[0].gtin, spreads[0].stores), ('7894900011517', 3))
+        self.assertEqual((spreads[0].cheapest_store, spreads[0].cheapest_price), ('MERCADO A', 5.0))
+        self.assertEqual((spreads[0].priciest_store, spreads[0].priciest_price, spreads[0].spread), ('MERCADO B', 8.0, 3.0))
+
+    def test_search(self):
+        coca, acucar = product('b', value=8.0), product('c')
+        coca.description, acucar.description = 'COCA-COLA PET 2L', 'Açúcar Cristal 1kg'
+        self.repo.save_many([product('a', value=3.0), coca, acucar], [store()], query_id=1, local_id=1)
+        self.repo.save_many([product('d', value=4.0)], [store()], query_id=1, local_id=2)
+
+        self.assertEqual([p.id for p in self.repo.search('coca 2l')], ['b'])
+        self.assertEqual([p.id for p in self.repo.search('acucar')], ['c'])
+        self.assertEqual({p.id for p in self.repo.search('refri 2', max_price=5.0)}, {'a', 'd'})
+        self.assertEqual([p.id for p in self.repo.search('refri', local_id=2)], ['d'])
+        self.assertEqual(self.repo.search('"'), [])
+        self.assertEqual(self.repo.search(' '), [])
+
+    def test_search_follows_deletes(self):
+        self.repo.save_many([product('a')], [store()], query_id=1, local_id=1)
+        self.repo.delete_by_query_id(1)
+
+        self.assertEqual(self.repo.search('refrigerante'), [])
+
+    def test_save_distances(self):
+        near, far = product('a'), product('b')
+        self.repo.save_many([near, far], [store()], query_id=1, local_id=1)
+        far.distkm, near.distkm = 7.5, 0.5
+        self.repo.save_distances([far], query_id=1, local_id=2)
+
+        self.assertEqual(self.repo.count(), 2)
+        self.assertEqual([(p.id, p.distkm) for p in self.repo.find_by_query_id(1, local_id=2)], [('b', 7.5)])
+        self.assertEqual({p.id for p in self.repo.find_by_query_id(1, local_id=1)}, {'a', 'b'})
+        self.assertEqual([p.id for p in self.repo.search('refrigerante', local_id=2)], ['b'])
+
+        self.repo.delete_by_query_id(1)
+        self.assertEqual(self.repo.find_by_query_id(1, local_id=2), [])
+
+    def test_product_key(self):
+        self.assertEqual(product('a').key(), 'a')
+        self.assertEqual(product('').key(), '7894900011517:1001:123')
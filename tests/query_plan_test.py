@@ -0,0 +1,148 @@
+import re
+import unittest
+from context import connections, database_context
+from database.category_repository import CategoryRepository
+from database.local_repository import LocalRepository
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
+from database.product_repository import ProductRepository
+from database.sheet_repository import SheetRepository
+from database.sheet_row_repository import SheetRowRepository
+from database.sheet_upload_repository import SheetUploadRepository
+from database.query_repository import QueryRepository
+from database.spreadsheet_repository import SpreadsheetRepository
+from database.watermark_repository import WatermarkRepository
+from lib.cache import ResponseCache
+from models import Category, Local, Product, Query, Sheet, Spreadsheet, Store, Watermark
+
+class TestQueryPlan(unittest.TestCase):
+    '''
+    Runs every repository method while recording the statements sent to SQLite and
+    asserts that each filtered statement is answered through an index
+    '''
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+
+    def tearDown(self):
+        connections.connection().set_trace_callback(None)
+        with database_context() as connection:
+            cursor = connection.cursor()
+            for table in ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "spreadsheet_watermark", "watermark", "http_cache", "sheet_upload", "sheet_row", "sheet", "spreadsheet", "query_local", "query", "local", "category"]:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def exercise(self):
+        category_repo = CategoryRepository()
+        category_repo.find_by_id(1)
+        category_repo.exists_by_id(1)
+        category_repo.find_by_query_id(1)
+        category_repo.find_by_nota_id('55')
+        category_repo.find_by_nota_ids(['55', '57'])
+        category_repo.find_by_ids([1, 2])
+        category_repo.exists_by_ids([1, 2])
+        category_repo.save_many([Category(id=None, nota_id='60', description='Outros')])
+        category_repo.delete_by_id(category_repo.save(Category(id=None, nota_id='61', description='Mais')).id or 0)
+
+        local_repo = LocalRepository()
+        local_repo.find_by_id(1)
+        local_repo.find_by_query_id(1)
+        local_repo.find_by_query_ids([1, 2])
+        local_repo.find_by_name('local a')
+        local_repo.find_by_names(['local a', 'local b'])
+        local_repo.find_by_ids([1, 2])
+        local_repo.exists_by_ids([1, 2])
+        local_repo.save_many([Local(id=None, geohash='ezs46', name='Local E')])
+        local = local_repo.save(Local(id=None, geohash='ezs45', name='Local D'))
+        local_repo.save(local)
+        local_repo.delete_by_id(local.id or 0)
+
+        query_repo = QueryRepository()
+        query_repo.find_by_id(1)
+        query_repo.find_by_ids([1, 2])
+        query_repo.find_by_spreadsheet_id(1)
+        query_repo.exists_by_id(1)
+        query_repo.exists_by_ids([1, 2])
+        query = query_repo.save(Query(id=None, term='pizza', locals=[Local(id=1, geohash='ezs42', name='Local A')], radius=5,
+                                      category=Category(id=1, nota_id='55', description='Bebidas')))
+        query_repo.save(query)
+
+        spreadsheet_repo = SpreadsheetRepository()
+        spreadsheet_repo.find_by_id(1)
+        spreadsheet_repo.find_by_google_id('google-id-123')
+        spreadsheet_repo.exists_by_id(1)
+        spreadsheet_repo.find_by_ids([1, 2])
+        spreadsheet_repo.exists_by_ids([1, 2])
+        spreadsheet = spreadsheet_repo.save(Spreadsheet(id=None, google_id='google-id-789', query=query))
+        spreadsheet_repo.save(spreadsheet)
+        sheet_repo = SheetRepository()
+        sheet_repo.save_many(spreadsheet.id or 0, [Sheet(id=10, title='Local A', local=Local(id=1, geohash='ezs42', name='Local A'))])
+        sheet_repo.find_by_spreadsheet_id(spreadsheet.id or 0)
+        sheet_row_repo = SheetRowRepository()
+        sheet_row_repo.save_changes(spreadsheet.id or 0, 10, {'a': (1, 'hash')}, ['b'])
+        sheet_row_repo.find_by_sheet(spreadsheet.id or 0, 10)
+        sheet_row_repo.delete_by_sheet(spreadsheet.id or 0, 10)
+        sheet_upload_repo = SheetUploadRepository()
+        sheet_upload_repo.save_many(spreadsheet.id or 0, 10, ['a'])
+        sheet_upload_repo.find_by_sheet(spreadsheet.id or 0, 10)
+        sheet_upload_repo.delete_by_sheet(spreadsheet.id or 0, 10)
+        sheet_repo.delete_by_spreadsheet_id(spreadsheet.id or 0)
+        spreadsheet_repo.delete_by_id(spreadsheet.id or 0)
+
+        watermark_repo = WatermarkRepository()
+        watermark_repo.save_many([Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22', product_id='a')])
+        watermark_repo.find_by_spreadsheet_id(1)
+        watermark_repo.delete_by_spreadsheet_id(1)
+
+        product_repo = ProductRepository()
+        store = Store(id='1', bairro='', city='', enterprise_name='A', number='1', tipo='RUA', uf='PR', complement='', street_name='X')
+        product = Product(id='a', emission_date='2024-11-22', description='D', distkm=1.0, store_id='1', store_name='A',
+                          store_address='RUA X, N 1', gtin='1', ncm='1', nrdoc='1', tempo='', value=1.0, discount_value=0.0)
+        product_repo.save_many([product], [store], query_id=1, local_id=1)
+        product_repo.find_by_id('a')
+        product_repo.find_by_ids(['a'])
+        product_repo.find_by_query_id(1)
+        product_repo.find_by_query_id(1, local_id=1)
+        product_repo.find_store_by_id('1')
+        product_repo.save_distances([product], query_id=1, local_id=2)
+        for by in ["gtin", "store", "local"]:
+            product_repo.price_stats(1, by)
+        product_repo.store_spread(1)
+        product_repo.search('d', local_id=1, max_price=2.0)
+        product_repo.delete_by_query_id(1)
+
+        query_repo.delete_by_id(query.id or 0)
+        local_repo.delete_by_id(3)
+
+        cache = ResponseCache(ttl={"/mapa/search": 60}, max_entries=1)
+        cache.put("https://host/mapa/search?regiao=a", b'[]')
+        cache.get("https://host/mapa/search?regiao=a")
+
+    def test_filtered_statements_use_an_index(self):
+        statements = []
+        connections.connection().set_trace_callback(statements.append)
+        self.exercise()
+        connections.connection().set_trace_callback(None)
+
+        # statements run by triggers and virtual tables are traced as comments
+        filtered = {statement for statement in statements
+                    if not statement.startswith("--") and re.search(r"\bWHERE\b", statement, re.IGNORECASE)}
+        self.assertGreater(len(filtered), 30)
+        with database_context() as connection:
+            for statement in filtered:
+                plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}")]
+                # literal rows, common table expressions, read after their own statements are checked, and subqueries are not tables
+                names = set(re.findall(r"(\w+)\s*(?:\([\w, ]*\))?\s+AS\s*\(", statement, re.IGNORECASE))
+                aliases = {alias for name, alias in re.findall(r"\b(?:FROM|JOIN)\s+(\w+)\s+AS\s+(\w+)", statement, re.IGNORECASE) if name in names}
+                literals = {f"SCAN {name}" for name in names | aliases}
+                for detail in plan:
+                    if detail in literals or "CONSTANT ROW" in detail or re.match(r"SCAN \(subquery-\d+\)", detail):
+                        continue
+                    if detail.startswith("SCAN") and "INDEX" not in detail:
+                        self.fail(f"Full scan ({detail}) in: {' '.join(statement.split())}")
@@ -1,17 +1,17 @@
 import unittest
 from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
 from database.query_repository import QueryRepository
-from models import Category, Query
+from models import Category, Local, Query
 
 
 class TestQueryRepository(unittest.TestCase):
     def setUp(self):
+        local_map.clear()
+        category_map.clear()
         self.repo = QueryRepository()
-        with open('schema.sql', 'r') as file:
-            script = file.read()
-            with database_context() as connection:
-                cursor = connection.cursor()
-                cursor.executescript(script)
+        migrate()
         with open('test_insertions.sql', 'r') as file:
             script = file.read()
             with database_context() as connection:
@@ -21,11 +21,16 @@ class TestQueryRepository(unittest.TestCase):
     def tearDown(self):
         with database_context() as connection:
             cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
             cursor.execute("DROP TABLE IF EXISTS spreadsheet")
             cursor.execute("DROP TABLE IF EXISTS query_local")
             cursor.execute("DROP TABLE IF EXISTS query")
             cursor.execute("DROP TABLE IF EXISTS local")
             cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
 
     def test_find_by_id(self):
         query = self.repo.find_by_id(1)
@@ -83,3 +88,47 @@ class TestQueryRepository(unittest.TestCase):
         
         self.assertTrue(exists)
         self.assertFalse(dont_exists)
+
+    def test_find_all_loads_relations(self):
+        queries = self.repo.find_all()
+
+        assert queries[0].category is not None
+        self.assertEqual(queries[0].category.nota_id, '55')
+        self.assertEqual([local.id for local in queries[0].locals], [1, 2])
+        self.assertEqual([local.id for local in queries[1].locals], [3])
+
+    def test_find_by_ids(self):
+        queries = self.repo.find_by_ids([2])
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(queries[0].id, 2)
+        assert queries[0].category is not None
+        self.assertEqual(queries[0].category.description, 'Alimentos')
+        self.assertEqual(self.repo.find_by_ids([]), [])
+
+    def test_save_many(self):
+        category = Category(id=1, nota_id='55', description='Bebidas')
+        existing = self.repo.find_by_id(1)
+        assert existing is not None
+        existing.term = 'refri 1l'
+        new_query = Query(id=None, term='pizza', locals=[Local(id=None, geohash='ezs44', name='Local C')], radius=5.0, category=category)
+
+        self.repo.save_many([existing, new_query])
+
+        self.assertEqual(new_query.id, 3)
+        saved = self.repo.find_by_ids([1, 3])
+        self.assertEqual(saved[0].term, 'refri 1l')
+        self.assertEqual([local.id for local in saved[1].locals], [3])
+
+    def test_delete_by_ids(self):
+        self.repo.delete_by_ids([1, 2])
+
+        self.assertEqual(self.repo.find_all(), [])
+        with database_context() as connection:
+            cursor = connection.cursor()
+            self.assertEqual(cursor.execute("SELECT COUNT(*) FROM query_local").fetchone()[0], 0)
+            self.assertEqual(cursor.execute("SELECT COUNT(*) FROM spreadsheet WHERE query_id IS NOT NULL").fetchone()[0], 0)
+
+    def test_exists_by_ids(self):
+        self.assertEqual(self.repo.exists_by_ids([1, 2, 5]), {1, 2})
+        self.assertEqual(self.repo.exists_by_ids([]), set())
@@ -0,0 +1,68 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from context import database_context
+from database.migrations import migrate
+from lib.cache import ResponseCache, normalize_url
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(ttl={"/api/v1/produtos": 60, "/mapa/search": 60}, max_entries=2)
+        migrate()
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS http_cache")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_put_and_get(self):
+        self.cache.put("https://host/api/v1/produtos?b=2&a=1", b'{"total": 0}')
+
+        self.assertEqual(self.cache.get("https://HOST/api/v1/produtos?a=1&b=2"), b'{"total": 0}')
+        self.assertIsNone(self.cache.get("https://host/api/v1/produtos?a=1"))
+
+    def test_expired(self):
+        cache = ResponseCache(ttl={"/api/v1/produtos": -1})
+        cache.put("https://host/api/v1/produtos?a=1", b'{}')
+
+        self.assertIsNone(cache.get("https://host/api/v1/produtos?a=1"))
+
+    def test_unknown_endpoint_is_not_cached(self):
+        self.cache.put("https://host/other?a=1", b'{}')
+
+        self.assertIsNone(self.cache.get("https://host/other?a=1"))
+
+    def test_disabled_and_refresh(self):
+        self.cache.put("https://host/mapa/search?regiao=centro", b'[]')
+
+        self.cache.refresh = True
+        self.assertIsNone(self.cache.get("https://host/mapa/search?regiao=centro"))
+
+        self.cache.refresh = False
+        self.cache.enabled = False
+        self.assertIsNone(self.cache.get("https://host/mapa/search?regiao=centro"))
+
+    def test_lru_eviction(self):
+        self.cache.put("https://host/mapa/search?regiao=a", b'a')
+        self.cache.put("https://host/mapa/search?regiao=b", b'b')
+        self.cache.get("https://host/mapa/search?regiao=a")
+        self.cache.put("https://host/mapa/search?regiao=c", b'c')
+
+        self.assertEqual(self.cache.get("https://host/mapa/search?regiao=a"), b'a')
+        self.assertIsNone(self.cache.get("https://host/mapa/search?regiao=b"))
+        self.assertEqual(self.cache.get("https://host/mapa/search?regiao=c"), b'c')
+
+    def test_concurrent_get_and_put(self):
+        cache = ResponseCache(ttl={"/mapa/search": 60}, max_entries=50)
+        def work(i: int):
+            url = f"https://host/mapa/search?regiao={i % 10}"
+            for _ in range(20):
+                cache.put(url, b'[]')
+                cache.get(url)
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(work, range(8)))
+
+        self.assertEqual(cache.get("https://host/mapa/search?regiao=0"), b'[]')
+
+    def test_normalize_url(self):
+        self.assertEqual(normalize_url("HTTPS://Host/p?z=1&a=2"), "https://host/p?a=2&z=1")
@@ -0,0 +1,157 @@
+import json
+import time
+import unittest
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlsplit
+from constraints import ORDER_NEWEST
+from context import database_context
+from database.cached_repository import CachedCategoryRepository, CachedLocalRepository, category_map, local_map
+from database.migrations import migrate
+from error.RegionNotFound import RegionNotFound
+from lib.client import client
+from lib.scrapper import get_categories, get_locals, get_products, iter_new_products, iter_products
+from models import Category, Local, Query, Watermark
+
+LOCAL = Local(id=1, geohash='ezs42', name='Local A')
+QUERY = Query(id=1, term='refri 2l', locals=[LOCAL], category=Category(id=1, nota_id='55', description='Bebidas'))
+
+# /api/v1/produtos sorted newest first, d was emitted after c but comes a page later
+with open('tests/fixtures/produtos_newest.json', 'r') as file:
+    NEWEST = json.load(file)
+
+# 10 pages of 3 products
+MANY = {"total": 30, "produtos": [{**product, "id": f"{n:02d}"} for n, product in zip(range(30), NEWEST["produtos"] * 4)]}
+
+def params(path: str) -> dict[str, str]:
+    return {key: values[0] for key, values in parse_qs(urlsplit(path).query).items()}
+
+class TestScrapper(unittest.TestCase):
+    def setUp(self):
+        self.paths: list[str] = []
+        self.payload = NEWEST
+        self.delay = lambda offset: 0
+        self.patches = [patch.object(client, "cache", None), patch.object(client, "get", self.get), patch("lib.scrapper.OFFSET", 3)]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+
+    def get(self, path: str) -> Mock:
+        self.paths.append(path)
+        offset = int(params(path)["offset"])
+        time.sleep(self.delay(offset))
+        page = {"total": self.payload["total"], "produtos": self.payload["produtos"][offset:offset + 3]}
+        return Mock(content=json.dumps(page).encode())
+
+    def ids(self, since: Watermark) -> list[list[str]]:
+        return [[product.id for product in page] for page in iter_new_products(QUERY, LOCAL, since)]
+
+    def test_new_products_stop_at_the_watermark(self):
+        since = Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22T10:00:00.000Z', product_id='e')
+
+        self.assertEqual(self.ids(since), [['a', 'b'], ['d']])
+        self.assertEqual([params(path)["offset"] for path in self.paths], ['0', '3'])
+        self.assertEqual(params(self.paths[0])["ordem"], str(ORDER_NEWEST))
+
+    def test_new_products_out_of_order_are_kept(self):
+        since = Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22T11:00:00.000Z', product_id='gone')
+
+        self.assertEqual(self.ids(since), [['a', 'b'], ['d']])
+        self.assertEqual([params(path)["offset"] for path in self.paths], ['0', '3', '6'])
+
+    def test_new_products_stop_at_a_page_without_new_ones(self):
+        since = Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-23T00:00:00.000Z', product_id='gone')
+
+        self.assertEqual(self.ids(since), [['a', 'b']])
+        self.assertEqual([params(path)["offset"] for path in self.paths], ['0', '3'])
+
+    def test_products_keep_the_api_order(self):
+        self.payload = MANY
+        self.delay = lambda offset: (30 - offset) / 1000 # the first pages arrive last
+
+        products = get_products(QUERY, LOCAL)
+
+        self.assertEqual([product.id for product in products], [f"{n:02d}" for n in range(30)])
+        self.assertEqual(sorted(int(params(path)["offset"]) for path in self.paths), list(range(0, 30, 3)))
+
+    def test_products_read_ahead_at_most_max_workers_pages(self):
+        self.payload = MANY
+        with patch("lib.scrapper.MAX_WORKERS", 2):
+            pages = iter_products(QUERY, LOCAL)
+            next(pages)
+            self.assertEqual(len(self.paths), 1)
+
+            next(pages)
+            time.sleep(0.05)
+            # the first page, the one just handed over and the two downloaded ahead of it
+            self.assertEqual(len(self.paths), 4)
+            self.assertEqual(len(list(pages)), 8)
+
+class TestScrapperReferences(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+        self.paths: list[str] = []
+        self.regions = {'Centro': 'ezs48', 'Batel': 'ezs49'}
+        self.categories = {'ezs42': [{"id": 55, "desc": "Bebidas"}, {"id": 99, "desc": "Limpeza"}],
+                           'ezs43': [{"id": 99, "desc": "Limpeza"}, {"id": 57, "desc": "Alimentos"}]}
+        self.patches = [patch.object(client, "cache", None), patch.object(client, "get", self.get)]
+        for patcher in self.patches:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patches:
+            patcher.stop()
+        local_map.clear()
+        category_map.clear()
+        with database_context() as connection:
+            cursor = connection.cursor()
+            for table in ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "spreadsheet_watermark", "watermark", "http_cache",
+                          "sheet_upload", "sheet_row", "sheet", "spreadsheet", "query_local", "query", "local", "category"]:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def get(self, path: str) -> Mock:
+        self.paths.append(path)
+        if path.startswith("/mapa/search"):
+            name = params(path)["regiao"]
+            body = [{"geohash": self.regions[name]}] if name in self.regions else []
+        else:
+            body = {"categorias": self.categories[params(path)["local"]]}
+        return Mock(content=json.dumps(body).encode())
+
+    def test_get_locals_looks_up_missing_regions_once(self):
+        locals = get_locals(['Local A', 'Centro', 'LOCAL A', 'Batel', 'Centro'])
+
+        self.assertEqual([(local.name, local.geohash) for local in locals], [('Local A', 'ezs42'), ('Centro', 'ezs48'), ('Batel', 'ezs49')])
+        self.assertEqual(sorted(self.paths), ['/mapa/search?regiao=Batel', '/mapa/search?regiao=Centro'])
+        local_map.clear()
+        self.assertEqual(CachedLocalRepository().find_by_name('Batel'), locals[2])
+
+    def test_get_locals_saves_nothing_when_a_region_is_not_found(self):
+        with self.assertRaises(RegionNotFound):
+            get_locals(['Centro', 'Nowhere'])
+
+        local_map.clear()
+        self.assertIsNone(CachedLocalRepository().find_by_name('Centro'))
+
+    def test_get_categories_of_every_local_are_saved_once(self):
+        locals = CachedLocalRepository().find_by_names(['Local A', 'Local B'])
+        query = Query(id=None, term='refri 2l', locals=locals, category=None)
+
+        categories = get_categories(query)
+
+        self.assertEqual([(category.nota_id, category.description) for category in categories],
+                         [('55', 'Bebidas'), ('99', 'Limpeza'), ('57', 'Alimentos')])
+        self.assertEqual((categories[0].id, categories[2].id), (1, 2)) # already stored
+        self.assertEqual(sorted(params(path)["local"] for path in self.paths), ['ezs42', 'ezs43'])
+        category_map.clear()
+        self.assertEqual(len(CachedCategoryRepository().find_all()), 3)
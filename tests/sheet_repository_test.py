@@ -0,0 +1,61 @@
+import unittest
+from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
+from database.sheet_repository import SheetRepository
+from database.spreadsheet_repository import SpreadsheetRepository
+from models import Local, Sheet
+
+LOCAL_A = Local(id=1, geohash='ezs42', name='Local A')
+LOCAL_B = Local(id=2, geohash='ezs43', name='Local B')
+
+class TestSheetRepository(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        self.repo = SheetRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_save_many_and_find_by_spreadsheet_id(self):
+        self.repo.save_many(1, [Sheet(id=20, title='Local B', local=LOCAL_B), Sheet(id=10, title='Local A', local=LOCAL_A)])
+        self.repo.save_many(1, [Sheet(id=20, title='Local B renamed', local=LOCAL_B)])
+
+        sheets = self.repo.find_by_spreadsheet_id(1)
+
+        self.assertEqual([(sheet.id, sheet.title, sheet.local) for sheet in sheets], [(20, 'Local B renamed', LOCAL_B), (10, 'Local A', LOCAL_A)])
+        self.assertEqual(self.repo.find_by_spreadsheet_id(2), [])
+
+    def test_deleted_with_the_spreadsheet(self):
+        self.repo.save_many(1, [Sheet(id=10, title='Local A', local=LOCAL_A)])
+
+        SpreadsheetRepository().delete_by_id(1)
+
+        self.assertEqual(self.repo.find_by_spreadsheet_id(1), [])
+
+    def test_delete_by_spreadsheet_id(self):
+        self.repo.save_many(1, [Sheet(id=10, title='Local A', local=LOCAL_A)])
+        self.repo.save_many(2, [Sheet(id=10, title='Local C', local=Local(id=3, geohash='ezs44', name='Local C'))])
+
+        self.repo.delete_by_spreadsheet_id(1)
+
+        self.assertEqual(self.repo.find_by_spreadsheet_id(1), [])
+        self.assertEqual(len(self.repo.find_by_spreadsheet_id(2)), 1)
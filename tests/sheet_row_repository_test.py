@@ -0,0 +1,57 @@
+import unittest
+from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
+from database.sheet_repository import SheetRepository
+from database.sheet_row_repository import SheetRowRepository
+from models import Local, Sheet
+
+LOCAL_A = Local(id=1, geohash='ezs42', name='Local A')
+
+class TestSheetRowRepository(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        self.repo = SheetRowRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+        SheetRepository().save_many(1, [Sheet(id=10, title='Local A', local=LOCAL_A)])
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_save_changes_and_find_by_sheet(self):
+        self.repo.save_changes(1, 10, {'a': (1, 'h1'), 'b': (2, 'h2'), 'c': (3, 'h3')}, [])
+        self.repo.save_changes(1, 10, {'c': (1, 'h4')}, ['a'])
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), {'b': (2, 'h2'), 'c': (1, 'h4')})
+        self.assertEqual(self.repo.find_by_sheet(1, 20), {})
+
+    def test_delete_by_sheet(self):
+        self.repo.save_changes(1, 10, {'a': (1, 'h1')}, [])
+
+        self.repo.delete_by_sheet(1, 10)
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), {})
+
+    def test_deleted_with_the_sheet(self):
+        self.repo.save_changes(1, 10, {'a': (1, 'h1')}, [])
+
+        SheetRepository().delete_by_spreadsheet_id(1)
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), {})
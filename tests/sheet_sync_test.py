@@ -0,0 +1,64 @@
+import unittest
+from lib.sheet_sync import SyncPlan, plan, row_hash
+
+HEADER = ["id", "valor"]
+BLANK = ["", ""]
+
+def rows(*ids: str) -> list[tuple[str, list]]:
+    return [(id, [id, 1.0]) for id in ids]
+
+def stored(*ids: str) -> dict[str, tuple[int, str]]:
+    return {id: (index + 1, row_hash([id, 1.0])) for index, id in enumerate(ids)}
+
+class TestSheetSync(unittest.TestCase):
+    def test_rebaseline(self):
+        result = plan({}, rows('a', 'b'), HEADER)
+
+        self.assertTrue(result.rebaseline)
+        self.assertEqual(result.writes, {0: HEADER, 1: ['a', 1.0], 2: ['b', 1.0]})
+        self.assertEqual((result.inserted, result.updated, result.deleted), (2, 0, 0))
+        self.assertEqual(result.changed, stored('a', 'b'))
+
+    def test_nothing_changed(self):
+        result = plan(stored('a', 'b'), rows('a', 'b'), HEADER)
+
+        self.assertFalse(result.rebaseline)
+        self.assertEqual(result.writes, {})
+        self.assertEqual(result.changed, {})
+
+    def test_update(self):
+        result = plan(stored('a', 'b'), [('a', ['a', 1.0]), ('b', ['b', 2.0])], HEADER)
+
+        self.assertEqual(result.writes, {2: ['b', 2.0]})
+        self.assertEqual(result.changed, {'b': (2, row_hash(['b', 2.0]))})
+        self.assertEqual((result.inserted, result.updated, result.deleted), (0, 1, 0))
+
+    def test_insert_fills_the_deleted_rows_first(self):
+        result = plan(stored('a', 'b', 'c'), rows('a', 'c', 'd', 'e'), HEADER)
+
+        self.assertEqual(result.writes, {2: ['d', 1.0], 4: ['e', 1.0]})
+        self.assertEqual(result.removed, ['b'])
+        self.assertEqual((result.inserted, result.updated, result.deleted), (2, 0, 1))
+
+    def test_delete_compacts_the_sheet(self):
+        result = plan(stored('a', 'b', 'c', 'd'), rows('c', 'd'), HEADER)
+
+        self.assertEqual(result.writes, {1: ['d', 1.0], 2: ['c', 1.0], 3: BLANK, 4: BLANK})
+        self.assertEqual(result.changed, {'d': (1, row_hash(['d', 1.0])), 'c': (2, row_hash(['c', 1.0]))})
+        self.assertEqual(sorted(result.removed), ['a', 'b'])
+
+    def test_delete_everything(self):
+        result = plan(stored('a', 'b'), [], HEADER)
+
+        self.assertEqual(result.writes, {1: BLANK, 2: BLANK})
+        self.assertEqual(result.changed, {})
+
+    def test_ranges(self):
+        result = SyncPlan(writes={0: HEADER, 1: ['a', 1.0], 2: ['b', 1.0], 5: ['c', 1.0]})
+
+        self.assertEqual(result.ranges("Local A's", max_rows=2), [
+            {"range": "'Local A''s'!A1", "values": [HEADER, ['a', 1.0]]},
+            {"range": "'Local A''s'!A3", "values": [['b', 1.0]]},
+            {"range": "'Local A''s'!A6", "values": [['c', 1.0]]},
+        ])
+        self.assertEqual(SyncPlan().ranges("Local A", max_rows=2), [])
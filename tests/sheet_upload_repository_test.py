@@ -0,0 +1,57 @@
+import unittest
+from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
+from database.sheet_repository import SheetRepository
+from database.sheet_upload_repository import SheetUploadRepository
+from models import Local, Sheet
+
+LOCAL_A = Local(id=1, geohash='ezs42', name='Local A')
+
+class TestSheetUploadRepository(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        self.repo = SheetUploadRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+        SheetRepository().save_many(1, [Sheet(id=10, title='Local A', local=LOCAL_A)])
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_save_many_and_find_by_sheet(self):
+        self.repo.save_many(1, 10, ['a', 'b'])
+        self.repo.save_many(1, 10, ['b', 'c'])
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), {'a', 'b', 'c'})
+        self.assertEqual(self.repo.find_by_sheet(1, 20), set())
+
+    def test_delete_by_sheet(self):
+        self.repo.save_many(1, 10, ['a'])
+
+        self.repo.delete_by_sheet(1, 10)
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), set())
+
+    def test_deleted_with_the_sheet(self):
+        self.repo.save_many(1, 10, ['a'])
+
+        SheetRepository().delete_by_spreadsheet_id(1)
+
+        self.assertEqual(self.repo.find_by_sheet(1, 10), set())
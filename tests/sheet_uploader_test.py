@@ -0,0 +1,111 @@
+import threading
+import unittest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from lib.uploader import SheetUploader
+from models import Local, Sheet
+
+def sheet(id: int) -> Sheet:
+    return Sheet(id=str(id), title=f"Local {id}", local=Local(id=id, geohash=f"ezs4{id}", name=f"Local {id}"))
+
+def rows(amount: int, width: int = 2) -> list[dict]:
+    return [{"values": [{"userEnteredValue": {"stringValue": str(i)}}] * width} for i in range(amount)]
+
+def http_error(status: int) -> HttpError:
+    return HttpError(Response({"status": status}), b'')
+
+class TestSheetUploader(unittest.TestCase):
+    def setUp(self):
+        self.sent: list[tuple[str, int]] = []
+        self.lock = threading.Lock()
+
+    def record(self, sheet: Sheet, chunk: list[dict]):
+        with self.lock:
+            self.sent.append((sheet.id, len(chunk)))
+
+    def test_chunks(self):
+        uploader = SheetUploader("google-id", chunk_cells=10, send=self.record)
+
+        self.assertEqual([len(chunk) for chunk in uploader.chunks(rows(12))], [5, 5, 2])
+        self.assertEqual(uploader.chunks([]), [])
+        self.assertEqual([len(chunk) for chunk in uploader.chunks(rows(3, width=20))], [1, 1, 1])
+
+    def test_chunks_ranges(self):
+        uploader = SheetUploader("google-id", chunk_cells=10, encoding="ranges", send=self.record)
+        data = [{"range": "'Local 1'!A1", "values": [["a", "b"]] * 4}, {"range": "'Local 1'!A9", "values": [["a", "b"]] * 3}]
+
+        self.assertEqual([len(chunk) for chunk in uploader.chunks(data)], [1, 1])
+        self.assertEqual([len(chunk) for chunk in uploader.chunks([{"range": "'Local 1'!A1", "values": [["a"]] * 3}] * 4)], [3, 1])
+
+    def test_upload(self):
+        uploader = SheetUploader("google-id", chunk_cells=10, concurrency=2, send=self.record)
+        uploader.submit(sheet(1), rows(12))
+        uploader.submit(sheet(2), rows(3))
+
+        results = uploader.results()
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual([(result.chunks, result.uploaded) for result in results], [(3, 3), (1, 1)])
+        self.assertEqual([size for id, size in self.sent if id == '1'], [5, 5, 2])
+
+    def test_retries_only_the_failed_chunk(self):
+        failures = [http_error(503), http_error(429)]
+        def flaky(sheet: Sheet, chunk: list[dict]):
+            if len(self.sent) == 1 and failures:
+                raise failures.pop()
+            self.record(sheet, chunk)
+        uploader = SheetUploader("google-id", chunk_cells=10, backoff=0, send=flaky)
+        uploader.submit(sheet(1), rows(12))
+
+        result, = uploader.results()
+
+        self.assertTrue(result.ok)
+        self.assertEqual(self.sent, [('1', 5), ('1', 5), ('1', 2)])
+
+    def test_stops_the_sheet_on_a_permanent_error(self):
+        def broken(sheet: Sheet, chunk: list[dict]):
+            if sheet.id == '1' and len([id for id, _ in self.sent if id == '1']) == 1:
+                raise http_error(400)
+            self.record(sheet, chunk)
+        uploader = SheetUploader("google-id", chunk_cells=10, backoff=0, send=broken)
+        uploader.submit(sheet(1), rows(12))
+        uploader.submit(sheet(2), rows(12))
+
+        first, second = uploader.results()
+
+        self.assertFalse(first.ok)
+        self.assertEqual((first.chunks, first.uploaded, first.uploaded_rows), (3, 1, 5))
+        self.assertTrue(second.ok)
+
+    def test_streamed_chunks_are_sent_while_rows_are_written(self):
+        sent = threading.Event()
+        def signal(sheet: Sheet, chunk: list[dict]):
+            self.record(sheet, chunk)
+            sent.set()
+        uploader = SheetUploader("google-id", chunk_cells=10, send=signal)
+        stream = uploader.open(sheet(1))
+        stream.write(rows(4))
+        stream.write(rows(4))
+
+        self.assertTrue(sent.wait(1))
+        self.assertEqual(self.sent, [('1', 5)])
+        stream.write(rows(4))
+        stream.close()
+        result, = uploader.results()
+
+        self.assertEqual((result.rows, result.chunks, result.uploaded), (12, 3, 3))
+        self.assertEqual(self.sent, [('1', 5), ('1', 5), ('1', 2)])
+
+    def test_stream_is_drained_after_a_permanent_error(self):
+        def broken(sheet: Sheet, chunk: list[dict]):
+            raise http_error(400)
+        uploader = SheetUploader("google-id", chunk_cells=10, backoff=0, send=broken)
+        stream = uploader.open(sheet(1))
+        for _ in range(10): # more batches than the stream holds, the writes would block if they weren't read
+            stream.write(rows(5))
+        stream.close()
+
+        result, = uploader.results()
+
+        self.assertFalse(result.ok)
+        self.assertEqual((result.rows, result.chunks, result.uploaded), (50, 10, 0))
@@ -0,0 +1,101 @@
+import threading
+import unittest
+from functools import partial
+from unittest.mock import patch
+from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
+from database.sheet_repository import SheetRepository
+from database.sheet_upload_repository import SheetUploadRepository
+from database.watermark_repository import WatermarkRepository
+from lib.sheet_writer import populate_spreadsheet
+from lib.uploader import SheetUploader
+from models import Local, Product, Sheet, Store
+
+TABLES = ["product_fts", "gtin_store_price", "local_price", "product_local", "product", "store", "spreadsheet_watermark", "watermark", "http_cache",
+          "sheet_upload", "sheet_row", "sheet", "spreadsheet", "query_local", "query", "local", "category"]
+
+LOCAL_A = Local(id=1, geohash='ezs42', name='Local A')
+LOCAL_B = Local(id=2, geohash='ezs43', name='Local B')
+
+def product(id: str) -> Product:
+    return Product(id=id, emission_date='2024-11-22T10:00:00', description='REFRIGERANTE 2L', distkm=1.5,
+                   store_id='1001', store_name='MERCADO A', store_address='RUA XV, N 10', gtin='7894900011517',
+                   ncm='22021000', nrdoc='123', tempo='1 dia', value=9.99, discount_value=0.0)
+
+STORE = Store(id='1001', bairro='CENTRO', city='CURITIBA', enterprise_name='MERCADO A', number='10',
+              tipo='RUA', uf='PR', complement='', street_name='XV')
+
+class TestPopulateSpreadsheet(unittest.TestCase):
+    def setUp(self):
+        local_map.clear()
+        category_map.clear()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+        SheetRepository().save_many(1, [Sheet(id=10, title='Local A', local=LOCAL_A), Sheet(id=20, title='Local B', local=LOCAL_B)])
+        self.products = {'ezs42': [product(f"a{i}") for i in range(1, 7)], 'ezs43': [product('b1'), product('b2')]}
+        self.sent: dict[int, list[str]] = {}
+        self.chunks: dict[int, int] = {}
+        self.failure: tuple[int, int] | None = None
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            for table in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def pages(self, query, local: Local, *args):
+        stores = args[-1]
+        stores[STORE.id] = STORE
+        yield self.products[local.geohash]
+
+    def send(self, sheet: Sheet, chunk: list[list]):
+        with self.lock:
+            self.chunks[sheet.id] = self.chunks.get(sheet.id, 0) + 1
+            if (sheet.id, self.chunks[sheet.id]) == self.failure:
+                raise ValueError("quota")
+            self.sent.setdefault(sheet.id, []).extend(row[0] for row in chunk)
+
+    def populate(self, id: int = 1):
+        # rows of 13 cells, 2 rows per chunk
+        uploader = partial(SheetUploader, chunk_cells=26, backoff=0, send=self.send)
+        with patch("lib.sheet_writer.iter_products", self.pages), patch("lib.sheet_writer.iter_new_products", self.pages), \
+             patch("lib.sheet_writer.SheetUploader", uploader):
+            populate_spreadsheet(id, incremental=True)
+
+    def test_failure_in_the_middle_of_a_sheet(self):
+        self.failure = (10, 3)
+        self.populate()
+
+        self.assertEqual(self.sent[10], ["'id", "'a1", "'a2", "'a3"])
+        self.assertEqual(SheetUploadRepository().find_by_sheet(1, 10), {'a1', 'a2', 'a3'})
+        self.assertEqual(list(WatermarkRepository().find_by_spreadsheet_id(1)), [2])
+
+        self.failure = None
+        self.products['ezs43'] = []
+        self.populate()
+
+        self.assertEqual(self.sent[10], ["'id"] + [f"'a{i}" for i in range(1, 7)])
+        self.assertEqual(self.sent[20], ["'id", "'b1", "'b2"])
+        self.assertEqual(SheetUploadRepository().find_by_sheet(1, 10), set())
+        self.assertEqual(set(WatermarkRepository().find_by_spreadsheet_id(1)), {1, 2})
+
+    def test_spreadsheets_of_the_same_query_keep_their_own_watermarks(self):
+        with database_context() as connection:
+            connection.execute("INSERT INTO spreadsheet (id, google_id, query_id, is_populated) VALUES (3, 'google-id-789', 1, 0)")
+        SheetRepository().save_many(3, [Sheet(id=30, title='Local A', local=LOCAL_A), Sheet(id=40, title='Local B', local=LOCAL_B)])
+        self.populate(1)
+        self.products['ezs42'].append(product('a7'))
+
+        self.populate(3)
+
+        self.assertEqual(self.sent[30], ["'id"] + [f"'a{i}" for i in range(1, 8)])
+        self.assertEqual(self.sent[40], ["'id", "'b1", "'b2"])
+        self.assertEqual(WatermarkRepository().find_by_spreadsheet_id(1)[1].product_id, 'a6')
+        self.assertEqual(WatermarkRepository().find_by_spreadsheet_id(3)[1].product_id, 'a7')
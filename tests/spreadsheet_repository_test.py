@@ -1,17 +1,17 @@
 import unittest
 from context import database_context
+from database.cached_repository import category_map, local_map
+from database.migrations import migrate
 from lib.util import to_date
 from models import Category, Spreadsheet, Query
 from database.spreadsheet_repository import SpreadsheetRepository
 
 class TestSpreadsheetRepository(unittest.TestCase):
     def setUp(self):
+        local_map.clear()
+        category_map.clear()
         self.repo = SpreadsheetRepository()
-        with open('schema.sql', 'r') as file:
-            script = file.read()
-            with database_context() as connection:
-                cursor = connection.cursor()
-                cursor.executescript(script)
+        migrate()
         with open('test_insertions.sql', 'r') as file:
             script = file.read()
             with database_context() as connection:
@@ -21,11 +21,16 @@ class TestSpreadsheetRepository(unittest.TestCase):
     def tearDown(self):
         with database_context() as connection:
             cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
             cursor.execute("DROP TABLE IF EXISTS spreadsheet")
             cursor.execute("DROP TABLE IF EXISTS query_local")
             cursor.execute("DROP TABLE IF EXISTS query")
             cursor.execute("DROP TABLE IF EXISTS local")
             cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
 
     def test_find_by_id(self):
         spreadsheet = self.repo.find_by_id(1)
@@ -50,6 +55,11 @@ class TestSpreadsheetRepository(unittest.TestCase):
         self.assertEqual(spreadsheet_1.id, 2)
         self.assertEqual(spreadsheet_1.google_id, 'google-id-456')
 
+        assert spreadsheet_0.query is not None and spreadsheet_1.query is not None
+        self.assertEqual(spreadsheet_0.query.id, 1)
+        self.assertEqual(len(spreadsheet_0.query.locals), 2)
+        self.assertEqual(spreadsheet_1.query.id, 2)
+
     def test_save(self):
         repo = SpreadsheetRepository()
 
@@ -100,3 +110,30 @@ class TestSpreadsheetRepository(unittest.TestCase):
         spreadsheet = self.repo.find_by_google_id('invalid-id')
         self.assertIsNone(spreadsheet) 
 
+
+    def test_find_by_ids(self):
+        spreadsheets = self.repo.find_by_ids([2, 10])
+
+        self.assertEqual([spreadsheet.id for spreadsheet in spreadsheets], [2])
+
+    def test_save_many(self):
+        existing = self.repo.find_by_id(2)
+        assert existing is not None
+        existing.is_populated = True
+        query = Query(id=1, term='pizza', locals=[], radius=5, category=None)
+        new_spreadsheet = Spreadsheet(id=None, google_id='google-id-789', query=query)
+
+        self.repo.save_many([existing, new_spreadsheet])
+
+        self.assertEqual(new_spreadsheet.id, 3)
+        saved = self.repo.find_by_ids([2, 3])
+        self.assertTrue(saved[0].is_populated)
+        self.assertEqual(saved[1].google_id, 'google-id-789')
+
+    def test_delete_by_ids(self):
+        self.repo.delete_by_ids([1, 2])
+
+        self.assertEqual(self.repo.find_all(), [])
+
+    def test_exists_by_ids(self):
+        self.assertEqual(self.repo.exists_by_ids([1, 2, 5]), {1, 2})
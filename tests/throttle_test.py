@@ -0,0 +1,93 @@
+import threading
+import unittest
+from error.CircuitOpen import CircuitOpen
+from lib.throttle import AdaptiveLimiter, CircuitBreaker
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveLimiter(rate=10, min_rate=4, max_rate=11, concurrency=4, target_latency=2)
+
+    def test_acquire_and_release(self):
+        self.limiter.acquire()
+        self.limiter.acquire()
+        self.assertEqual(self.limiter.snapshot()["in_flight"], 2)
+
+        self.limiter.release(0.1, throttled=False)
+        self.limiter.release(0.1, throttled=False)
+        self.assertEqual(self.limiter.snapshot()["in_flight"], 0)
+
+    def test_grows_while_fast(self):
+        for _ in range(3):
+            self.limiter.acquire()
+            self.limiter.release(0.1, throttled=False)
+
+        self.assertEqual(self.limiter.rate, 11)
+        self.assertEqual(self.limiter.snapshot()["concurrency"], 4)
+
+    def test_slow_calls_do_not_grow(self):
+        self.limiter.acquire()
+        self.limiter.release(5, throttled=False)
+
+        self.assertEqual(self.limiter.rate, 10)
+
+    def test_halves_once_per_burst(self):
+        for _ in range(2):
+            self.limiter.acquire()
+        self.limiter.release(0.1, throttled=True)
+        self.limiter.release(0.1, throttled=True)
+
+        self.assertEqual(self.limiter.rate, 5)
+        self.assertEqual(self.limiter.snapshot()["concurrency"], 2)
+
+        self.limiter.decreased_at = 0.0
+        self.limiter.acquire()
+        self.limiter.release(0.1, throttled=True)
+        self.assertEqual(self.limiter.rate, 4)
+        self.assertEqual(self.limiter.snapshot()["concurrency"], 1)
+
+    def test_acquire_waits_for_a_release(self):
+        limiter = AdaptiveLimiter(rate=50, concurrency=1)
+        limiter.acquire()
+        acquired = threading.Event()
+        waiting = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        waiting.start()
+
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(0.1, throttled=False)
+        self.assertTrue(acquired.wait(1))
+        waiting.join()
+        self.assertEqual(limiter.snapshot()["in_flight"], 1)
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(threshold=2, reset=60)
+        breaker.record(False)
+        breaker.record(True)
+        breaker.record(False)
+        breaker.before()
+
+        breaker.record(False)
+        self.assertEqual(breaker.snapshot(), {"state": CircuitBreaker.OPEN, "failures": 2})
+        with self.assertRaises(CircuitOpen):
+            breaker.before()
+
+    def test_half_open_lets_a_single_trial_through(self):
+        breaker = CircuitBreaker(threshold=1, reset=0)
+        breaker.record(False)
+
+        breaker.before()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.before()
+
+    def test_trial_closes_or_reopens(self):
+        breaker = CircuitBreaker(threshold=1, reset=0)
+        breaker.record(False)
+        breaker.before()
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        breaker.before()
+        breaker.record(True)
+        self.assertEqual(breaker.snapshot(), {"state": CircuitBreaker.CLOSED, "failures": 0})
+        breaker.before()
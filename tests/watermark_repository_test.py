@@ -0,0 +1,56 @@
+import unittest
+from context import database_context
+from database.migrations import migrate
+from database.watermark_repository import WatermarkRepository
+from models import Watermark
+
+class TestWatermarkRepository(unittest.TestCase):
+    def setUp(self):
+        self.repo = WatermarkRepository()
+        migrate()
+        with open('test_insertions.sql', 'r') as file:
+            script = file.read()
+            with database_context() as connection:
+                cursor = connection.cursor()
+                cursor.executescript(script)
+
+    def tearDown(self):
+        with database_context() as connection:
+            cursor = connection.cursor()
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet_watermark")
+            cursor.execute("DROP TABLE IF EXISTS watermark")
+            cursor.execute("DROP TABLE IF EXISTS sheet_upload")
+            cursor.execute("DROP TABLE IF EXISTS sheet_row")
+            cursor.execute("DROP TABLE IF EXISTS sheet")
+            cursor.execute("DROP TABLE IF EXISTS spreadsheet")
+            cursor.execute("DROP TABLE IF EXISTS query_local")
+            cursor.execute("DROP TABLE IF EXISTS query")
+            cursor.execute("DROP TABLE IF EXISTS local")
+            cursor.execute("DROP TABLE IF EXISTS category")
+            cursor.execute("PRAGMA user_version = 0")
+
+    def test_save_many_and_find_by_spreadsheet_id(self):
+        self.repo.save_many([
+            Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22T10:00:00', product_id='a'),
+            Watermark(spreadsheet_id=1, local_id=2, emission_date='2024-11-21T10:00:00', product_id='b'),
+        ])
+
+        watermarks = self.repo.find_by_spreadsheet_id(1)
+
+        self.assertEqual(len(watermarks), 2)
+        self.assertEqual(watermarks[1].product_id, 'a')
+        self.assertEqual(watermarks[2].emission_date, '2024-11-21T10:00:00')
+        self.assertEqual(self.repo.find_by_spreadsheet_id(2), {})
+
+    def test_save_many_keeps_newest(self):
+        self.repo.save_many([Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22T10:00:00', product_id='a')])
+        self.repo.save_many([Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-20T10:00:00', product_id='old')])
+        self.repo.save_many([Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-23T10:00:00', product_id='new')])
+
+        self.assertEqual(self.repo.find_by_spreadsheet_id(1)[1].product_id, 'new')
+
+    def test_delete_by_spreadsheet_id(self):
+        self.repo.save_many([Watermark(spreadsheet_id=1, local_id=1, emission_date='2024-11-22T10:00:00', product_id='a')])
+        self.repo.delete_by_spreadsheet_id(1)
+
+        self.assertEqual(self.repo.find_by_spreadsheet_id(1), {})